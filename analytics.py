@@ -0,0 +1,214 @@
+# analytics.py
+# Incrementally maintained FoodAlert statistics for the analytics dashboard.
+#
+# Three rollup tables hold counts that would otherwise need a full scan of
+# food_alert on every view:
+#
+#   analytics_daily   day         posted, collected (of those posted that day),
+#                                 collected_on (claims made that day)
+#   analytics_poster  posted_by   posted, collected
+#   analytics_class   prediction  posted, collected
+#
+# SQLite triggers on food_alert keep them current: an insert adds the new
+# row's contribution, a delete subtracts the old row's, and an update does
+# both, so posting, claiming, deleting and (re)classifying are all covered
+# whichever code path runs them. Other databases get no triggers; the app
+# then computes the same numbers with live GROUP BY queries.
+#
+# Archiving (archive.py) deletes rows, so the rollups only cover food_alert;
+# summary() adds the archive's counts back in when given them.
+#
+# Usage:
+#   python analytics.py rebuild     # recompute from food_alert, then verify
+#   python analytics.py verify      # compare the rollups with a live scan
+import logging
+import sys
+
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+UNCLASSIFIED = "unknown"  # analytics_class key for alerts without a prediction
+
+TABLES = {
+    "analytics_daily": ("day", ("posted", "collected", "collected_on")),
+    "analytics_poster": ("posted_by", ("posted", "collected")),
+    "analytics_class": ("prediction", ("posted", "collected")),
+}
+
+# Live equivalents of each rollup (also used to rebuild them)
+_COLLECTED = "CASE WHEN collected THEN 1 ELSE 0 END"
+LIVE_QUERIES = {
+    "analytics_daily": (
+        "SELECT day, SUM(posted), SUM(collected), SUM(collected_on) FROM ("
+        f" SELECT date(date_posted) AS day, 1 AS posted, {_COLLECTED} AS collected, 0 AS collected_on"
+        " FROM food_alert"
+        " UNION ALL"
+        " SELECT date(collected_at), 0, 0, 1 FROM food_alert WHERE collected_at IS NOT NULL"
+        ") AS contributions GROUP BY day"
+    ),
+    "analytics_poster": f"SELECT posted_by, COUNT(*), SUM({_COLLECTED}) FROM food_alert GROUP BY posted_by",
+    "analytics_class": (
+        f"SELECT COALESCE(prediction, '{UNCLASSIFIED}'), COUNT(*), SUM({_COLLECTED}) "
+        f"FROM food_alert GROUP BY COALESCE(prediction, '{UNCLASSIFIED}')"
+    ),
+}
+
+
+# ---------- Schema ----------
+def _upsert(table, key_expr, values, condition="1"):
+    key, columns = TABLES[table]
+    return (f"INSERT INTO {table} ({key}, {', '.join(columns)}) SELECT {key_expr}, {', '.join(values)} "
+            f"WHERE {condition} ON CONFLICT({key}) DO UPDATE SET "
+            + ", ".join(f"{c} = {c} + excluded.{c}" for c in columns) + ";")
+
+
+def _contribution(row, sign):
+    """Statements adding (sign "1") or removing (sign "-1") one alert row's counts."""
+    collected = f"{sign} * COALESCE({row}.collected, 0)"
+    return " ".join([
+        _upsert("analytics_daily", f"date({row}.date_posted)", [sign, collected, "0"]),
+        _upsert("analytics_daily", f"date({row}.collected_at)", ["0", "0", sign],
+                condition=f"{row}.collected_at IS NOT NULL"),
+        _upsert("analytics_poster", f"{row}.posted_by", [sign, collected]),
+        _upsert("analytics_class", f"COALESCE({row}.prediction, '{UNCLASSIFIED}')", [sign, collected]),
+    ])
+
+
+def install_analytics(conn):
+    """Create the rollup tables and triggers, then fill them. Returns False if unsupported."""
+    if conn.dialect.name != "sqlite":
+        return False
+    for table, (key, columns) in TABLES.items():
+        key_type = "INTEGER" if key == "posted_by" else "TEXT"
+        conn.execute(text(f"CREATE TABLE IF NOT EXISTS {table} ({key} {key_type} PRIMARY KEY, "
+                          + ", ".join(f"{c} INTEGER NOT NULL DEFAULT 0" for c in columns) + ")"))
+    try:
+        conn.execute(text("CREATE TRIGGER IF NOT EXISTS food_alert_analytics_insert AFTER INSERT ON food_alert "
+                          f"BEGIN {_contribution('NEW', '1')} END"))
+        conn.execute(text("CREATE TRIGGER IF NOT EXISTS food_alert_analytics_update "
+                          "AFTER UPDATE OF date_posted, collected, collected_at, posted_by, prediction ON food_alert "
+                          f"BEGIN {_contribution('OLD', '-1')} {_contribution('NEW', '1')} END"))
+        conn.execute(text("CREATE TRIGGER IF NOT EXISTS food_alert_analytics_delete AFTER DELETE ON food_alert "
+                          f"BEGIN {_contribution('OLD', '-1')} END"))
+    except OperationalError as e:
+        # UPSERT needs SQLite 3.24+
+        logging.warning(f"Analytics triggers unavailable, the dashboard will scan food_alert: {e}")
+        return False
+    rebuild(conn)
+    return True
+
+
+def has_analytics(conn):
+    if conn.dialect.name != "sqlite":
+        return False
+    return conn.execute(text("SELECT 1 FROM sqlite_master WHERE type = 'trigger' "
+                             "AND name = 'food_alert_analytics_insert'")).first() is not None
+
+
+# ---------- Rebuild / verify ----------
+def rebuild(conn):
+    for table, (key, columns) in TABLES.items():
+        conn.execute(text(f"DELETE FROM {table}"))
+        conn.execute(text(f"INSERT INTO {table} ({key}, {', '.join(columns)}) {LIVE_QUERIES[table]}"))
+
+
+def _nonzero(rows):
+    return {row[0]: tuple(int(v or 0) for v in row[1:]) for row in rows if any(row[1:])}
+
+
+def verify(conn):
+    """{table: [(key, rollup counts, live counts)]} for every row that differs."""
+    mismatches = {}
+    for table, (key, columns) in TABLES.items():
+        stored = _nonzero(conn.execute(text(f"SELECT {key}, {', '.join(columns)} FROM {table}")))
+        live = _nonzero(conn.execute(text(LIVE_QUERIES[table])))
+        diff = [(k, stored.get(k), live.get(k)) for k in sorted(set(stored) | set(live), key=str)
+                if stored.get(k) != live.get(k)]
+        if diff:
+            mismatches[table] = diff
+    return mismatches
+
+
+# ---------- Reads ----------
+def _read(conn, table, order_by, limit=None, use_rollups=True):
+    key, columns = TABLES[table]
+    if use_rollups:
+        sql = f"SELECT {key}, {', '.join(columns)} FROM {table}"
+    else:
+        sql = (f"WITH live ({key}, {', '.join(columns)}) AS ({LIVE_QUERIES[table]}) "
+               f"SELECT {key}, {', '.join(columns)} FROM live")
+    sql += " WHERE " + " OR ".join(f"{c} <> 0" for c in columns)
+    sql += f" ORDER BY {order_by}" + (f" LIMIT {int(limit)}" if limit else "")
+    return [dict(zip((key,) + columns, (row[0],) + tuple(int(v or 0) for v in row[1:])))
+            for row in conn.execute(text(sql))]
+
+
+def _merge(rows, table, archived, sort_key, limit=None):
+    """Add archived counts ({key: counts}) to rows read from the database, then re-sort and limit."""
+    key, columns = TABLES[table]
+    merged = {r[key]: r for r in rows}
+    for k, counts in archived.items():
+        row = merged.setdefault(k, dict.fromkeys(columns, 0) | {key: k})
+        for c, n in zip(columns, counts):
+            row[c] += n
+    rows = sorted(merged.values(), key=sort_key)
+    return rows[:limit] if limit else rows
+
+
+def summary(conn, days=30, top_posters=10, use_rollups=True, archived=None):
+    """Dashboard numbers, from the rollups (or a live scan when use_rollups=False).
+
+    `archived` is ArchiveStore.counts(): alerts moved out of food_alert, counted as if still there.
+    """
+    if archived is None:
+        by_day = _read(conn, "analytics_daily", "day DESC", days, use_rollups)[::-1]
+        by_poster = _read(conn, "analytics_poster", "posted DESC, posted_by", top_posters, use_rollups)
+        by_class = _read(conn, "analytics_class", "posted DESC, prediction", None, use_rollups)
+    else:
+        by_day = _merge(_read(conn, "analytics_daily", "day DESC", None, use_rollups), "analytics_daily",
+                        archived["analytics_daily"], lambda r: r["day"])[-days:]
+        by_poster = _merge(_read(conn, "analytics_poster", "posted DESC, posted_by", None, use_rollups),
+                           "analytics_poster", archived["analytics_poster"],
+                           lambda r: (-r["posted"], r["posted_by"]), top_posters)
+        by_class = _merge(_read(conn, "analytics_class", "posted DESC, prediction", None, use_rollups),
+                          "analytics_class", archived["analytics_class"], lambda r: (-r["posted"], r["prediction"]))
+
+    posted = sum(r["posted"] for r in by_class)
+    collected = sum(r["collected"] for r in by_class)
+    for rows in (by_day, by_poster, by_class):
+        for r in rows:
+            r["collection_rate"] = round(r["collected"] / r["posted"], 4) if r["posted"] else None
+    return {
+        "posted": posted,
+        "collected": collected,
+        "available": posted - collected,
+        "collection_rate": round(collected / posted, 4) if posted else None,
+        "archived": archived["archived"] if archived else 0,
+        "by_day": by_day,
+        "by_poster": by_poster,
+        "by_class": by_class,
+    }
+
+
+if __name__ == "__main__":
+    from app import app, db
+
+    command = sys.argv[1] if len(sys.argv) > 1 else "verify"
+    if command not in ("rebuild", "verify"):
+        sys.exit("usage: python analytics.py [rebuild|verify]")
+    with app.app_context():
+        with db.engine.begin() as conn:
+            if not has_analytics(conn):
+                if not install_analytics(conn):
+                    sys.exit("Analytics rollups need SQLite 3.24+")
+                print("Installed analytics rollups")
+            elif command == "rebuild":
+                rebuild(conn)
+                print("Rebuilt analytics rollups from food_alert")
+            problems = verify(conn)
+    for table, rows in problems.items():
+        print(f"{table}: {len(rows)} mismatching row(s)")
+        for key, stored, live in rows[:20]:
+            print(f"    {key}: rollup {stored} != live {live}")
+    print("Rollups match the live scan" if not problems else "Rollups are out of date, run: python analytics.py rebuild")
+    sys.exit(1 if problems else 0)
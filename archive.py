@@ -0,0 +1,352 @@
+# archive.py
+# Retention: alerts collected long ago move out of food_alert into a
+# compressed Parquet archive, their images into a downscaled image store.
+#
+#   archive/alerts/collected_month=2026-01/part-<first id>-<last id>.parquet
+#   archive/images/ab/<digest>.webp        at most ARCHIVE_IMAGE_SIZE px
+#
+# Archiver.run_once() moves every alert collected more than `after_days` ago,
+# oldest first, in batches of `batch_size`. Each batch is:
+#
+#   1. one read of the rows (no write lock held)
+#   2. a WebP copy of each image, shared by identical uploads
+#   3. one Parquet part per collection month, written to a temp file and
+#      renamed into place
+#   4. one short transaction deleting exactly those rows (and their finished
+#      classification jobs)
+#
+# so writers only ever wait for step 4, and a crash between steps 3 and 4
+# merely archives the same rows again: readers keep the newest copy of each
+# id. Originals are left to the upload GC once no alert references them.
+#
+# ArchiveStore is the read side: query() loads archived rows for a date range
+# (month partitions and Parquet row-group statistics skip the rest) and
+# counts() gives the analytics dashboard the archived share of its totals.
+# Needs pandas and pyarrow.
+#
+# Usage:
+#   python archive.py run [--days 90] [--batch-size 500] [--dry-run]
+#   python archive.py query --start 2025-01-01 --end 2025-07-01 [--output alerts.csv]
+#   python archive.py stats
+import argparse
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+
+from PIL import Image
+
+from analytics import UNCLASSIFIED
+from prediction_cache import sha256_stream
+
+try:
+    import fcntl
+except ImportError:  # Windows: single-process development server only
+    fcntl = None
+
+COLUMNS = ["id", "description", "quantity", "location", "date_posted", "collected", "collected_by",
+           "collected_at", "posted_by", "prediction", "latitude", "longitude", "image_filename"]
+
+
+def _month_partition(month):
+    return f"collected_month={month}"
+
+
+# ---------- Read side ----------
+class ArchiveStore:
+    def __init__(self, root):
+        self.root = root
+        self.alerts_dir = os.path.join(root, "alerts")
+        self.images_dir = os.path.join(root, "images")
+        self._counts = None
+        self._counts_key = None
+        self._lock = threading.Lock()
+
+    def image_path(self, name):
+        return os.path.join(self.images_dir, name)
+
+    def parts(self, start=None, end=None):
+        """Part files whose collection month overlaps [start, end), oldest first."""
+        if not os.path.isdir(self.alerts_dir):
+            return []
+        first = start.strftime("%Y-%m") if start else None
+        last = end.strftime("%Y-%m") if end else None
+        paths = []
+        for partition in sorted(os.listdir(self.alerts_dir)):
+            month = partition.partition("=")[2]
+            if (first and month < first) or (last and month > last):
+                continue
+            directory = os.path.join(self.alerts_dir, partition)
+            paths.extend(os.path.join(directory, f) for f in sorted(os.listdir(directory)) if f.endswith(".parquet"))
+        return paths
+
+    def query(self, start=None, end=None, columns=None, posted_by=None):
+        """Archived alerts collected in [start, end) as a DataFrame, one row per id."""
+        import pandas as pd
+
+        filters = []
+        if start:
+            filters.append(("collected_at", ">=", pd.Timestamp(start)))
+        if end:
+            filters.append(("collected_at", "<", pd.Timestamp(end)))
+        if posted_by is not None:
+            filters.append(("posted_by", "==", int(posted_by)))
+        read_columns = None if columns is None else list(dict.fromkeys(["id", *columns]))
+        frames = [pd.read_parquet(path, columns=read_columns, filters=filters or None)
+                  for path in self.parts(start, end)]
+        frames = [f for f in frames if len(f)]
+        if not frames:
+            return pd.DataFrame(columns=read_columns or COLUMNS + ["archived_image", "archived_at"])
+        rows = pd.concat(frames, ignore_index=True).drop_duplicates("id", keep="last")
+        return rows[columns] if columns is not None else rows
+
+    def counts(self):
+        """Archived contributions to the analytics rollups, {table: {key: counts}}.
+
+        Recomputed only when a part file is added or replaced.
+        """
+        key = tuple((p, os.stat(p).st_mtime_ns) for p in self.parts())
+        if not key:
+            return {"analytics_daily": {}, "analytics_poster": {}, "analytics_class": {}, "archived": 0}
+        with self._lock:
+            if key != self._counts_key:
+                self._counts = self._compute_counts()
+                self._counts_key = key
+            return self._counts
+
+    def _compute_counts(self):
+        rows = self.query(columns=["date_posted", "collected", "collected_at", "posted_by", "prediction"])
+        if rows.empty:
+            return {"analytics_daily": {}, "analytics_poster": {}, "analytics_class": {}, "archived": 0}
+        collected = rows["collected"].fillna(False).astype(int)
+        posted_day = rows["date_posted"].dt.strftime("%Y-%m-%d")
+        daily = {}
+        for day, n, c in zip(posted_day, [1] * len(rows), collected):
+            counts = daily.setdefault(day, [0, 0, 0])
+            counts[0] += n
+            counts[1] += c
+        for day in rows["collected_at"].dropna().dt.strftime("%Y-%m-%d"):
+            daily.setdefault(day, [0, 0, 0])[2] += 1
+        by_poster = rows.assign(collected=collected).groupby("posted_by")["collected"].agg(["count", "sum"])
+        by_class = (rows.assign(collected=collected, prediction=rows["prediction"].fillna(UNCLASSIFIED))
+                    .groupby("prediction")["collected"].agg(["count", "sum"]))
+        return {
+            "analytics_daily": {day: tuple(c) for day, c in daily.items()},
+            "analytics_poster": {int(k): (int(r["count"]), int(r["sum"])) for k, r in by_poster.iterrows()},
+            "analytics_class": {str(k): (int(r["count"]), int(r["sum"])) for k, r in by_class.iterrows()},
+            "archived": len(rows),
+        }
+
+
+# ---------- Archival job ----------
+class Archiver:
+    """Moves long-collected alerts into an ArchiveStore, on demand or every `interval_seconds`.
+
+    `release_uploads(names)` is called with the image names the archived rows
+    referenced, after they were deleted (the app wakes its upload GC).
+    """
+
+    def __init__(self, app, db, model, job_model, store, upload_store, after_days=90, batch_size=500,
+                 interval_seconds=3600, image_size=512, image_quality=60, release_uploads=None):
+        self.app = app
+        self.db = db
+        self.model = model
+        self.job_model = job_model
+        self.store = store
+        self.upload_store = upload_store
+        self.after_days = after_days
+        self.batch_size = batch_size
+        self.interval = interval_seconds
+        self.image_size = image_size
+        self.image_quality = image_quality
+        self.release_uploads = release_uploads
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="archiver", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def wake(self):
+        self._wake.set()
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            if self._stop.is_set():
+                break
+            try:
+                self.run_once()
+            except Exception as e:
+                logging.error(f"Archival failed: {e}", exc_info=True)
+
+    def run_once(self, dry_run=False):
+        """Archive everything that is due; returns the number of alerts moved (or due, with dry_run)."""
+        os.makedirs(self.store.root, exist_ok=True)
+        with open(os.path.join(self.store.root, ".lock"), "w") as lock:
+            if fcntl is not None:
+                try:
+                    fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except BlockingIOError:
+                    return 0  # another process is archiving
+            cutoff = datetime.utcnow() - timedelta(days=self.after_days)
+            moved = 0
+            with self.app.app_context():
+                if dry_run:
+                    return self._due(cutoff).count()
+                while not self._stop.is_set():
+                    count = self._archive_batch(cutoff)
+                    moved += count
+                    if count < self.batch_size:
+                        break
+            if moved:
+                logging.info(f"Archived {moved} alert(s) collected before {cutoff:%Y-%m-%d}")
+            return moved
+
+    def _due(self, cutoff):
+        Alert = self.model
+        return Alert.query.filter(Alert.collected == True, self.db.or_(  # noqa: E712
+            Alert.collected_at < cutoff,
+            self.db.and_(Alert.collected_at.is_(None), Alert.date_posted < cutoff),  # claimed before 0003
+        ))
+
+    def _archive_batch(self, cutoff):
+        import pandas as pd
+
+        Alert = self.model
+        rows = (self._due(cutoff).order_by(Alert.collected_at, Alert.id).limit(self.batch_size)
+                .with_entities(*(getattr(Alert, c) for c in COLUMNS)).all())
+        self.db.session.rollback()  # end the read transaction before the slow part
+        if not rows:
+            return 0
+
+        images = {r.image_filename for r in rows if r.image_filename}
+        archived_images = {name: self._archive_image(name) for name in images}
+        frame = pd.DataFrame([tuple(r) for r in rows], columns=COLUMNS)
+        frame["collected_at"] = pd.to_datetime(frame["collected_at"])
+        frame["date_posted"] = pd.to_datetime(frame["date_posted"])
+        # Fixed types, so parts whose rows are all NULL in a column still share one schema
+        frame = frame.astype({"id": "int64", "posted_by": "Int64", "collected_by": "Int64",
+                              "latitude": "float64", "longitude": "float64"})
+        frame["archived_image"] = [archived_images.get(r.image_filename) for r in rows]
+        frame["archived_at"] = pd.Timestamp(datetime.utcnow())
+        month = frame["collected_at"].fillna(frame["date_posted"]).dt.strftime("%Y-%m")
+        for key, part in frame.groupby(month):
+            self._write_part(key, part)
+
+        ids = [int(i) for i in frame["id"]]
+        # SQLite does not enforce the ON DELETE CASCADE unless foreign keys are on
+        self.job_model.query.filter(self.job_model.alert_id.in_(ids)).delete(synchronize_session=False)
+        Alert.query.filter(Alert.id.in_(ids)).delete(synchronize_session=False)
+        self.db.session.commit()
+
+        if self.release_uploads:
+            self.release_uploads(images)
+        return len(ids)
+
+    def _write_part(self, month, part):
+        directory = os.path.join(self.store.alerts_dir, _month_partition(month))
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"part-{int(part['id'].min()):010d}-{int(part['id'].max()):010d}.parquet")
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            part.to_parquet(tmp_path, engine="pyarrow", compression="zstd", index=False)
+            os.replace(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def _archive_image(self, image_filename):
+        """Downscaled WebP copy of an upload; returns its archive name or None."""
+        if not image_filename:
+            return None
+        source = self.upload_store.path(image_filename)
+        if not os.path.exists(source):
+            return None
+        if self.upload_store.is_blob(image_filename):
+            digest = os.path.splitext(os.path.basename(image_filename))[0]
+        else:
+            with open(source, "rb") as f:
+                digest = sha256_stream(f)
+        name = f"{digest[:2]}/{digest}.webp"
+        path = self.store.image_path(name)
+        if os.path.exists(path):
+            return name
+        try:
+            with Image.open(source) as img:
+                img.draft("RGB", (self.image_size, self.image_size))
+                img = img.convert("RGB")
+                img.thumbnail((self.image_size, self.image_size), Image.BILINEAR)
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                tmp_path = f"{path}.{os.getpid()}.tmp"
+                try:
+                    img.save(tmp_path, "WEBP", quality=self.image_quality, method=4)
+                    os.replace(tmp_path, path)
+                finally:
+                    if os.path.exists(tmp_path):
+                        os.remove(tmp_path)
+        except OSError as e:
+            logging.warning(f"Could not archive image {image_filename}: {e}")
+            return None
+        return name
+
+
+# ---------- CLI ----------
+def _parse_date(value):
+    return datetime.strptime(value, "%Y-%m-%d")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Archive collected alerts and query the archive")
+    sub = parser.add_subparsers(dest="command", required=True)
+    run = sub.add_parser("run", help="archive every alert that is due now")
+    run.add_argument("--days", type=int, help="collected more than this many days ago (default ARCHIVE_AFTER_DAYS)")
+    run.add_argument("--batch-size", type=int)
+    run.add_argument("--dry-run", action="store_true", help="only count the alerts that are due")
+    query = sub.add_parser("query", help="export archived alerts")
+    query.add_argument("--start", type=_parse_date, help="collected on or after (YYYY-MM-DD)")
+    query.add_argument("--end", type=_parse_date, help="collected before (YYYY-MM-DD)")
+    query.add_argument("--posted-by", type=int)
+    query.add_argument("--output", help=".csv or .parquet file (default: print)")
+    sub.add_parser("stats", help="archive size and counts per class")
+    args = parser.parse_args()
+
+    from app import app
+
+    svc = app.extensions["food_waste"]
+    if args.command == "run":
+        archiver = svc.archiver
+        if args.days is not None:
+            archiver.after_days = args.days
+        if args.batch_size:
+            archiver.batch_size = args.batch_size
+        start = time.perf_counter()
+        count = archiver.run_once(dry_run=args.dry_run)
+        verb = "due for archival" if args.dry_run else "archived"
+        print(f"[INFO] {count} alert(s) {verb} in {time.perf_counter() - start:.1f}s")
+    elif args.command == "query":
+        rows = svc.archive.query(args.start, args.end, posted_by=args.posted_by)
+        if not args.output:
+            print(rows.to_string(index=False, max_rows=50))
+        elif args.output.endswith(".parquet"):
+            rows.to_parquet(args.output, index=False)
+        else:
+            rows.to_csv(args.output, index=False)
+        print(f"[INFO] {len(rows)} archived alert(s)")
+    else:
+        parts = svc.archive.parts()
+        size = sum(os.path.getsize(p) for p in parts)
+        counts = svc.archive.counts()
+        print(f"[INFO] {counts['archived']} archived alert(s) in {len(parts)} part file(s), {size / 1024:.0f} KB")
+        for label, (posted, collected) in sorted(counts["analytics_class"].items()):
+            print(f"    {label:<14} {posted}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+# benchmarks/bench_analytics.py
+# Analytics summary latency: trigger-maintained rollups vs. a live GROUP BY scan,
+# plus the write overhead the triggers add to posting and claiming.
+#
+#   python benchmarks/bench_analytics.py --alerts 100000
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+def percentiles(samples):
+    samples = sorted(samples)
+    return {"p50_ms": round(statistics.median(samples), 3),
+            "p95_ms": round(samples[int(len(samples) * 0.95) - 1], 3)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Analytics rollups vs. live aggregation")
+    parser.add_argument("--alerts", type=int, default=100_000)
+    parser.add_argument("--posters", type=int, default=200)
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--writes", type=int, default=2000, help="single-row inserts/claims to time")
+    parser.add_argument("--json", help="also write results to this file")
+    args = parser.parse_args()
+
+    json_path = os.path.abspath(args.json) if args.json else None
+    workdir = tempfile.mkdtemp(prefix="bench_analytics_")
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+    os.chdir(workdir)  # keep the app's upload/cache files out of the repo
+
+    import analytics
+    import app as webapp
+    from sqlalchemy import text
+
+    app, db, FoodAlert = webapp.app, webapp.db, webapp.FoodAlert
+    rng = random.Random(0)
+    classes = ["cooked_food", "fruits", "others", "vegetables", None]
+
+    def alert_row(i):
+        posted = datetime(2024, 1, 1) + timedelta(minutes=3 * i)
+        collected = rng.random() < 0.6
+        return {"description": f"Leftover meal {i}", "quantity": "10", "location": "seeded",
+                "date_posted": posted, "collected": collected,
+                "collected_at": posted + timedelta(hours=rng.randint(1, 48)) if collected else None,
+                "prediction": rng.choice(classes), "posted_by": rng.randint(1, args.posters)}
+
+    def time_writes(conn, label):
+        t0 = time.perf_counter()
+        for i in range(args.writes):
+            conn.execute(FoodAlert.__table__.insert(), [alert_row(args.alerts + i)])
+        conn.execute(text("UPDATE food_alert SET collected = 1, collected_at = CURRENT_TIMESTAMP "
+                          "WHERE id IN (SELECT id FROM food_alert WHERE NOT collected LIMIT :n)"), {"n": args.writes})
+        elapsed = (time.perf_counter() - t0) * 1000.0 / (2 * args.writes)
+        print(f"[INFO] {label}: {elapsed:.3f} ms per write")
+        return round(elapsed, 4)
+
+    with app.app_context():
+        db.create_all()
+        print(f"[INFO] Seeding {args.alerts} alerts into {workdir}")
+        rows = [alert_row(i) for i in range(args.alerts)]
+        for i in range(0, len(rows), 10_000):
+            db.session.execute(FoodAlert.__table__.insert(), rows[i:i + 10_000])
+        db.session.commit()
+
+        with db.engine.begin() as conn:
+            write_plain = time_writes(conn, "writes without triggers")
+            conn.rollback()
+        with db.engine.begin() as conn:
+            analytics.install_analytics(conn)
+        with db.engine.begin() as conn:
+            write_rollup = time_writes(conn, "writes with triggers")
+            assert not analytics.verify(conn), "rollups drifted from food_alert"
+            conn.rollback()
+
+        results = {}
+        with db.engine.connect() as conn:
+            answers = {}
+            for name, use_rollups in (("live", False), ("rollups", True)):
+                samples = []
+                for _ in range(args.queries):
+                    t0 = time.perf_counter()
+                    answers[name] = analytics.summary(conn, use_rollups=use_rollups)
+                    samples.append((time.perf_counter() - t0) * 1000.0)
+                results[name] = percentiles(samples)
+
+    agree = answers["live"] == answers["rollups"]
+    print(f"\n{'method':<10}{'p50 ms':>10}{'p95 ms':>10}")
+    for name, r in results.items():
+        print(f"{name:<10}{r['p50_ms']:>10}{r['p95_ms']:>10}")
+    print(f"\nWrite cost: {write_plain} ms -> {write_rollup} ms per insert/claim")
+    print(f"Same summary as the live scan: {'yes' if agree else 'NO'}")
+
+    if json_path:
+        with open(json_path, "w") as f:
+            json.dump({"args": vars(args), "results": results, "write_ms": {"plain": write_plain,
+                       "rollups": write_rollup}, "agree": agree}, f, indent=2)
+        print(f"[INFO] Results written to {json_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+# benchmarks/bench_archive.py
+# How long archival (archive.py) makes concurrent writers wait.
+#
+# Seeds a database with --alerts alerts, most of them collected long ago, then
+# archives them twice from the same starting copy while a writer thread keeps
+# posting new alerts and timing each commit:
+#
+#   batched     Archiver.run_once(): ARCHIVE_BATCH_SIZE rows per delete
+#   one-shot    a single DELETE of every due row, the shortest a
+#               one-transaction archival could hold the write lock (it would
+#               also write the Parquet file inside it)
+#
+# Reported: total archival time, writer commit latency (p50 / p99 / max) and
+# the number of rows left in food_alert.
+#
+#   python benchmarks/bench_archive.py --alerts 200000
+#   python benchmarks/bench_archive.py --batch-size 2000 --images 20
+import argparse
+import io
+import os
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+
+from PIL import Image
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+def percentile(samples, q):
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * q))]
+
+
+class Writer(threading.Thread):
+    """Posts one alert per commit until stopped; records each commit's latency."""
+
+    def __init__(self, engine, table):
+        super().__init__(daemon=True)
+        self.engine = engine
+        self.table = table
+        self.latencies = []
+        self.stop = threading.Event()
+
+    def run(self):
+        i = 0
+        while not self.stop.is_set():
+            start = time.perf_counter()
+            with self.engine.begin() as conn:
+                conn.execute(self.table.insert(), [{
+                    "description": f"Fresh meal {i}", "quantity": "5", "location": "seeded",
+                    "date_posted": datetime.utcnow(), "collected": False, "posted_by": 1}])
+            self.latencies.append((time.perf_counter() - start) * 1000)
+            i += 1
+            time.sleep(0.005)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Writer stalls during batched vs. one-shot archival")
+    parser.add_argument("--alerts", type=int, default=100_000)
+    parser.add_argument("--due", type=float, default=0.8, help="share of alerts collected long ago")
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--images", type=int, default=10, help="distinct uploads shared by the alerts")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="bench_archive_")
+    db_path = os.path.join(workdir, "bench.db")
+    os.environ["DATABASE_URL"] = f"sqlite:///{db_path}"
+    os.environ["ARCHIVE_BATCH_SIZE"] = str(args.batch_size)
+    os.chdir(workdir)  # keep the app's upload/cache/archive files out of the repo
+
+    import app as webapp
+    from migrations import run_migrations
+
+    app, db, FoodAlert = webapp.app, webapp.db, webapp.FoodAlert
+    svc = app.extensions["food_waste"]
+    rng = random.Random(0)
+    now = datetime.utcnow()
+    try:
+        with app.app_context():
+            db.create_all()
+            run_migrations(db.engine)
+            names = []
+            for i in range(args.images):
+                buf = io.BytesIO()
+                Image.new("RGB", (1600, 1200), (rng.randrange(256), 90, 40)).save(buf, "JPEG", quality=85)
+                buf.seek(0)
+                names.append(svc.upload_store.save(buf, f"meal{i}.jpg").name)
+
+            print(f"[INFO] Seeding {args.alerts} alerts into {workdir}")
+            rows = []
+            for i in range(args.alerts):
+                old = rng.random() < args.due
+                collected_at = now - timedelta(days=rng.randint(100, 700) if old else rng.randint(0, 60))
+                rows.append({"description": f"Leftover meal {i}", "quantity": "10", "location": "seeded",
+                             "date_posted": collected_at - timedelta(hours=rng.randint(1, 48)),
+                             "collected": True, "collected_by": 2, "collected_at": collected_at,
+                             "prediction": rng.choice(["cooked_food", "fruits", "vegetables", None]),
+                             "posted_by": rng.randint(1, 200),
+                             "image_filename": rng.choice(names) if names else None})
+            for i in range(0, len(rows), 10_000):
+                db.session.execute(FoodAlert.__table__.insert(), rows[i:i + 10_000])
+            db.session.commit()
+            db.engine.dispose()
+        shutil.copy(db_path, db_path + ".seed")
+
+        def one_shot():
+            with app.app_context():
+                cutoff = now - timedelta(days=svc.archiver.after_days)
+                FoodAlert.query.filter(FoodAlert.collected == True, FoodAlert.collected_at < cutoff).delete(  # noqa: E712
+                    synchronize_session=False)
+                db.session.commit()
+
+        print(f"{'strategy':<10} {'archival':>9} {'writes':>7} {'p50':>8} {'p99':>8} {'max':>9} {'hot rows':>9}")
+        for label, archive in (("batched", svc.archiver.run_once), ("one-shot", one_shot)):
+            with app.app_context():
+                db.engine.dispose()
+            shutil.copy(db_path + ".seed", db_path)
+            shutil.rmtree(svc.archive.root, ignore_errors=True)
+            with app.app_context():
+                writer = Writer(db.engine, FoodAlert.__table__)
+                writer.start()
+                time.sleep(0.5)
+                start = time.perf_counter()
+                archive()
+                elapsed = time.perf_counter() - start
+                time.sleep(0.2)
+                writer.stop.set()
+                writer.join()
+                remaining = FoodAlert.query.count()
+                db.session.rollback()
+            if label == "batched":
+                parts = svc.archive.parts()
+                size = sum(os.path.getsize(p) for p in parts)
+            samples = writer.latencies
+            print(f"{label:<10} {elapsed:>8.1f}s {len(samples):>7} {statistics.median(samples):>5.1f} ms "
+                  f"{percentile(samples, 0.99):>5.1f} ms {max(samples):>6.1f} ms {remaining:>9}")
+        print(f"[INFO] Batched archive: {len(parts)} part file(s), {size / 1024:.0f} KB")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
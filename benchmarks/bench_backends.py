@@ -0,0 +1,70 @@
+# benchmarks/bench_backends.py
+# Cold-start time and resident memory per inference backend.
+#
+# Each backend is measured in a fresh interpreter, the way a new web worker
+# would start: import inference.py, load the model, run the first prediction.
+#
+#   python benchmarks/bench_backends.py
+#   python benchmarks/bench_backends.py --backends numpy tflite-int8 keras
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PROBE = r"""
+import json, sys, time
+t0 = time.perf_counter()
+import numpy as np
+from inference import load_backend
+backend = load_backend(sys.argv[1], sys.argv[2])
+t_load = time.perf_counter()
+backend.predict(np.zeros((1, 128, 128, 3), dtype=np.float32))
+t_first = time.perf_counter()
+
+rss_kb = 0
+with open("/proc/self/status") as f:
+    for line in f:
+        if line.startswith("VmRSS:"):
+            rss_kb = int(line.split()[1])
+
+print(json.dumps({
+    "backend": backend.name,
+    "load_s": round(t_load - t0, 3),
+    "first_prediction_s": round(t_first - t0, 3),
+    "rss_mb": round(rss_kb / 1024, 1),
+    "tensorflow_imported": "tensorflow" in sys.modules,
+}))
+"""
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cold start and RSS per inference backend")
+    parser.add_argument("--model-dir", default=".")
+    parser.add_argument("--backends", nargs="+", default=["numpy", "tflite-fp16", "tflite-int8", "keras"])
+    parser.add_argument("--json", help="also write results to this file")
+    args = parser.parse_args()
+
+    results = []
+    print(f"{'backend':<14}{'load s':>9}{'first pred s':>14}{'RSS MB':>9}{'imports TF':>12}")
+    for name in args.backends:
+        proc = subprocess.run([sys.executable, "-c", PROBE, name, os.path.abspath(args.model_dir)],
+                              cwd=ROOT, capture_output=True, text=True)
+        if proc.returncode != 0:
+            print(f"{name:<14}  failed: {proc.stderr.strip().splitlines()[-1]}")
+            continue
+        row = json.loads(proc.stdout.strip().splitlines()[-1])
+        results.append(row)
+        print(f"{name:<14}{row['load_s']:>9}{row['first_prediction_s']:>14}"
+              f"{row['rss_mb']:>9}{str(row['tensorflow_imported']):>12}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\n[INFO] Results written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+# benchmarks/bench_batching.py
+# Load benchmark: per-request model.predict vs. the micro-batching scheduler.
+#
+# Simulates N concurrent uploaders, each classifying a stream of 128x128 images,
+# and reports throughput and p50/p99 latency for both inference paths.
+#
+#   python benchmarks/bench_batching.py
+#   python benchmarks/bench_batching.py --concurrency 1 8 32 --requests 50 --max-batch-size 32
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from food_waste.model_registry import CLASS_LABELS  # noqa: E402
+from inference import BatchScheduler  # noqa: E402
+
+
+def load_model(path):
+    import tensorflow as tf
+    from tensorflow.keras import layers, models
+
+    if os.path.exists(path):
+        print(f"[INFO] Using trained model: {path}")
+        return tf.keras.models.load_model(path)
+
+    # Same architecture as train_model.py, untrained: timing does not depend on weights.
+    print(f"[INFO] {path} not found, using an untrained model with the same architecture")
+    return models.Sequential([
+        layers.Input(shape=(128, 128, 3)),
+        layers.Rescaling(1./255),
+        layers.Conv2D(32, (3,3), activation='relu'),
+        layers.MaxPooling2D(),
+        layers.Conv2D(64, (3,3), activation='relu'),
+        layers.MaxPooling2D(),
+        layers.Conv2D(128, (3,3), activation='relu'),
+        layers.MaxPooling2D(),
+        layers.Flatten(),
+        layers.Dense(128, activation='relu'),
+        layers.Dropout(0.5),
+        layers.Dense(len(CLASS_LABELS), activation='softmax')
+    ])
+
+
+def run_load(classify, concurrency, requests_per_client, images):
+    latencies = []
+    lock = threading.Lock()
+    start_barrier = threading.Barrier(concurrency + 1)
+
+    def client(idx):
+        local = []
+        start_barrier.wait()
+        for i in range(requests_per_client):
+            img = images[(idx + i) % len(images)]
+            t0 = time.perf_counter()
+            classify(img)
+            local.append(time.perf_counter() - t0)
+        with lock:
+            latencies.extend(local)
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(concurrency)]
+    for t in threads:
+        t.start()
+    start_barrier.wait()
+    t0 = time.perf_counter()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - t0
+
+    lat_ms = np.array(latencies) * 1000.0
+    return {
+        "concurrency": concurrency,
+        "requests": len(latencies),
+        "throughput_rps": round(len(latencies) / elapsed, 2),
+        "p50_ms": round(float(np.percentile(lat_ms, 50)), 2),
+        "p99_ms": round(float(np.percentile(lat_ms, 99)), 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-request vs. batched inference load test")
+    parser.add_argument("--model", default="food_waste_model.h5")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--requests", type=int, default=40, help="requests per uploader")
+    parser.add_argument("--max-batch-size", type=int, default=16)
+    parser.add_argument("--max-wait-ms", type=float, default=5.0)
+    parser.add_argument("--json", help="also write results to this file")
+    args = parser.parse_args()
+
+    model = load_model(args.model)
+    rng = np.random.default_rng(0)
+    images = rng.random((64, 128, 128, 3), dtype=np.float32)
+
+    # Warm up both code paths so graph tracing is not counted.
+    model.predict(images[:1], verbose=0)
+    model.predict_on_batch(images[:args.max_batch_size])
+
+    def per_request(img):
+        # Current app.py path: one predict() call per uploaded image.
+        preds = model.predict(np.expand_dims(img, axis=0), verbose=0)
+        return CLASS_LABELS[int(np.argmax(preds))]
+
+    scheduler = BatchScheduler(model.predict_on_batch, CLASS_LABELS,
+                               max_batch_size=args.max_batch_size,
+                               max_wait_ms=args.max_wait_ms)
+
+    results = []
+    print(f"\n{'path':<12}{'clients':>8}{'req/s':>10}{'p50 ms':>10}{'p99 ms':>10}")
+    for concurrency in args.concurrency:
+        for name, classify in (("per-request", per_request), ("batched", scheduler.predict)):
+            row = run_load(classify, concurrency, args.requests, images)
+            row["path"] = name
+            results.append(row)
+            print(f"{name:<12}{concurrency:>8}{row['throughput_rps']:>10}{row['p50_ms']:>10}{row['p99_ms']:>10}")
+
+    scheduler.close()
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"max_batch_size": args.max_batch_size,
+                       "max_wait_ms": args.max_wait_ms,
+                       "results": results}, f, indent=2)
+        print(f"\n[INFO] Results written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+# benchmarks/bench_bulk_ingest.py
+# Posting N alerts one form POST at a time vs. one POST /bulk_alerts.
+#
+#   single      N POSTs to /mess_dashboard (one commit and one job each)
+#   multipart   one /bulk_alerts request: alerts.csv plus N "images" files
+#   zip         one /bulk_alerts request: a zip of the CSV and the images
+#
+# Every mode gets its own distinct JPEGs, so no upload is deduplicated or
+# answered from the prediction cache. Classification workers are off
+# (CLASSIFY_WORKERS=0): this measures ingestion, not the model. Requests go
+# through the Flask test client, in process, against a temporary database.
+#
+#   python benchmarks/bench_bulk_ingest.py
+#   python benchmarks/bench_bulk_ingest.py --alerts 1000 --image-size 1280x960
+import argparse
+import io
+import os
+import shutil
+import sys
+import tempfile
+import time
+import zipfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "benchmarks"))
+
+from loadtest import synthetic_images, write_stub_model  # noqa: E402
+
+
+def batch_csv(count, prefix):
+    lines = ["description,quantity,location,image"]
+    lines += [f"Leftover meal {i},{i % 40 + 5} plates,Outlet {i % 25},{prefix}{i}.jpg" for i in range(count)]
+    return "\n".join(lines).encode()
+
+
+def post_single(client, images, prefix):
+    for i, data in enumerate(images):
+        response = client.post("/mess_dashboard", content_type="multipart/form-data", data={
+            "description": f"Leftover meal {i}", "quantity": f"{i % 40 + 5} plates", "location": f"Outlet {i % 25}",
+            "image": (io.BytesIO(data), f"{prefix}{i}.jpg")})
+        assert response.status_code == 302, response.status_code
+    return len(images)
+
+
+def post_multipart(client, images, prefix):
+    response = client.post("/bulk_alerts", content_type="multipart/form-data", data={
+        "alerts": (io.BytesIO(batch_csv(len(images), prefix)), "alerts.csv"),
+        "images": [(io.BytesIO(data), f"{prefix}{i}.jpg") for i, data in enumerate(images)]})
+    return response.get_json()["created"]
+
+
+def post_zip(client, images, prefix):
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w", zipfile.ZIP_STORED) as archive:  # JPEGs do not compress
+        archive.writestr("alerts.csv", batch_csv(len(images), prefix))
+        for i, data in enumerate(images):
+            archive.writestr(f"{prefix}{i}.jpg", data)
+    buf.seek(0)
+    response = client.post("/bulk_alerts", content_type="multipart/form-data",
+                           data={"alerts": (buf, "alerts.zip")})
+    return response.get_json()["created"]
+
+
+def settle(app, svc, FoodAlert):
+    """Wait for the thumbnails and previews of every upload, so modes do not overlap."""
+    with app.app_context():
+        names = {name for (name,) in FoodAlert.query.with_entities(FoodAlert.image_filename)}
+    for name in names:
+        svc.derivatives.path(name, "preview")
+
+
+MODES = {"single": post_single, "multipart": post_multipart, "zip": post_zip}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Single-post vs. bulk alert ingestion")
+    parser.add_argument("--alerts", type=int, default=300)
+    parser.add_argument("--image-size", default="640x480")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="bench_bulk_ingest_")
+    write_stub_model(os.path.join(workdir, "model"))
+    os.environ.update(DATABASE_URL=f"sqlite:///{os.path.join(workdir, 'bench.db')}",
+                      MODEL_DIR=os.path.join(workdir, "model"), INFERENCE_BACKEND="numpy",
+                      CLASSIFY_WORKERS="0", BULK_MAX_ROWS=str(max(1000, args.alerts)))
+    os.chdir(workdir)  # keep the app's upload/cache files out of the repo
+
+    import app as webapp
+    from migrations import run_migrations
+
+    app, db = webapp.app, webapp.db
+    svc = app.extensions["food_waste"]
+    size = tuple(map(int, args.image_size.split("x")))
+    try:
+        with app.app_context():
+            db.create_all()
+            run_migrations(db.engine)
+            db.session.add(webapp.User(username="bench", password="-", role="mess"))
+            db.session.commit()
+            user_id = webapp.User.query.filter_by(username="bench").one().id
+        client = app.test_client()
+        with client.session_transaction() as sess:
+            sess["role"], sess["user_id"] = "mess", user_id
+        client.get("/mess_dashboard")  # start the app's services outside the timings
+
+        print(f"[INFO] {args.alerts} alerts, {args.image_size} JPEGs")
+        print(f"{'mode':<10} {'total':>9} {'per alert':>10}")
+        for seed, (name, post) in enumerate(MODES.items(), start=1):
+            images = synthetic_images(args.alerts, size=size, seed=seed)
+            start = time.perf_counter()
+            created = post(client, images, f"{name}_")
+            elapsed = time.perf_counter() - start
+            assert created == args.alerts, f"{name}: created {created} of {args.alerts}"
+            print(f"{name:<10} {elapsed * 1000:>6.0f} ms {elapsed / args.alerts * 1000:>7.2f} ms")
+            settle(app, svc, webapp.FoodAlert)
+    finally:
+        svc.stop()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
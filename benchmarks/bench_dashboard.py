@@ -0,0 +1,141 @@
+# benchmarks/bench_dashboard.py
+# Dashboard latency before/after the composite indexes and keyset pagination.
+#
+# Seeds a throwaway SQLite database with --alerts FoodAlert rows, then times:
+#   before  the old handlers: filter_by(...).all() + render every row, no indexes
+#   after   the current handlers through the test client (indexed keyset pages),
+#           for the first page and for a page --depth pages deep
+#
+#   python benchmarks/bench_dashboard.py --alerts 100000
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+def timed(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - t0) * 1000.0)
+    return round(statistics.median(samples), 2)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="NGO/mess dashboard latency before and after indexing")
+    parser.add_argument("--alerts", type=int, default=100_000)
+    parser.add_argument("--messes", type=int, default=50)
+    parser.add_argument("--uncollected", type=float, default=0.2, help="fraction still available")
+    parser.add_argument("--depth", type=int, default=20, help="page number for the deep-page timing")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--json", help="also write results to this file")
+    args = parser.parse_args()
+
+    json_path = os.path.abspath(args.json) if args.json else None
+    workdir = tempfile.mkdtemp(prefix="bench_dashboard_")
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+    os.chdir(workdir)  # keep the app's upload/cache files out of the repo
+
+    from flask import render_template
+    from sqlalchemy import text
+
+    import app as webapp
+    from food_waste.services import keyset_page
+    from migrations import food_alert_dashboard_indexes
+
+    app, db, FoodAlert, User = webapp.app, webapp.db, webapp.FoodAlert, webapp.User
+    app.template_folder = os.path.join(ROOT, "templates")
+    page_size = app.config["DASHBOARD_PAGE_SIZE"]
+
+    with app.app_context():
+        db.create_all()
+        print(f"[INFO] Seeding {args.alerts} alerts into {workdir}")
+        db.session.execute(User.__table__.insert(), [
+            {"username": f"mess{i}", "password": "x", "role": "mess"} for i in range(args.messes)
+        ])
+        rng = random.Random(0)
+        start = datetime(2024, 1, 1)
+        rows = [{
+            "description": f"Leftover meal {i}",
+            "quantity": str(rng.randint(1, 50)),
+            "location": f"Block {rng.randint(1, 20)}",
+            "date_posted": start + timedelta(minutes=i * 5 + rng.randint(0, 4)),
+            "collected": rng.random() >= args.uncollected,
+            "prediction": "cooked_food",
+            "posted_by": rng.randint(1, args.messes),
+        } for i in range(args.alerts)]
+        for i in range(0, len(rows), 10_000):
+            db.session.execute(FoodAlert.__table__.insert(), rows[i:i + 10_000])
+        db.session.commit()
+
+        # ---------- Before: no indexes, load + render everything ----------
+        db.session.execute(text("DROP INDEX IF EXISTS ix_food_alert_collected_date"))
+        db.session.execute(text("DROP INDEX IF EXISTS ix_food_alert_posted_by_date"))
+        db.session.execute(text("ANALYZE"))
+        db.session.commit()
+
+        def old_ngo():
+            with app.test_request_context("/ngo_dashboard"):
+                alerts = FoodAlert.query.filter_by(collected=False).all()
+                render_template("ngo_dashboard.html", alerts=alerts, next_cursor=None)
+                db.session.remove()
+
+        def old_mess():
+            with app.test_request_context("/mess_dashboard"):
+                alerts = FoodAlert.query.filter_by(posted_by=1).all()
+                render_template("mess_dashboard.html", alerts=alerts, next_cursor=None)
+                db.session.remove()
+
+        results = {"alerts": args.alerts, "page_size": page_size, "before_ms": {}, "after_ms": {}}
+        results["before_ms"]["ngo_dashboard"] = timed(old_ngo, args.repeat)
+        results["before_ms"]["mess_dashboard"] = timed(old_mess, args.repeat)
+
+        # ---------- After: indexes + keyset pages through the real routes ----------
+        with db.engine.begin() as conn:
+            food_alert_dashboard_indexes(conn)
+            conn.execute(text("ANALYZE"))
+
+    client = app.test_client()
+
+    def as_role(role):
+        with client.session_transaction() as sess:
+            sess["role"], sess["user_id"], sess["username"] = role, 1, role
+
+    def deep_cursor(endpoint):
+        cursor = None
+        with app.app_context():
+            query = FoodAlert.query.filter_by(collected=False) if endpoint == "ngo_dashboard" \
+                else FoodAlert.query.filter_by(posted_by=1)
+            for _ in range(args.depth - 1):
+                _, cursor = keyset_page(query, cursor, page_size)
+        return cursor
+
+    for endpoint, role in (("ngo_dashboard", "ngo"), ("mess_dashboard", "mess")):
+        as_role(role)
+        cursor = deep_cursor(endpoint)
+        results["after_ms"][endpoint] = timed(lambda: client.get(f"/{endpoint}"), args.repeat)
+        results["after_ms"][f"{endpoint}_page{args.depth}"] = timed(
+            lambda: client.get(f"/{endpoint}", query_string={"cursor": cursor}), args.repeat)
+
+    print(f"\n{'view':<28}{'before ms':>12}{'after ms':>12}")
+    for key, after in results["after_ms"].items():
+        before = results["before_ms"].get(key.split("_page")[0]) if "_page" not in key else "-"
+        print(f"{key:<28}{before:>12}{after:>12}")
+
+    if json_path:
+        with open(json_path, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\n[INFO] Results written to {json_path}")
+
+
+if __name__ == "__main__":
+    main()
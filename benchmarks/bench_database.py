@@ -0,0 +1,134 @@
+# benchmarks/bench_database.py
+# Mixed read/write load against SQLite: default rollback journal vs. the tuned
+# WAL profile from database.py.
+#
+# Writer threads insert FoodAlert rows and commit one at a time (uploads);
+# reader threads run the NGO dashboard page query (keyset, indexed). Reported
+# per profile: reads/s, writes/s, p50/p99 read latency and lock errors.
+#
+#   python benchmarks/bench_database.py --readers 16 --writers 4 --seconds 10
+import argparse
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+
+import numpy as np
+from sqlalchemy import create_engine, text
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from database import database_settings, engine_options, install_sqlite_pragmas, sqlite_pragmas  # noqa: E402
+
+SCHEMA = [
+    "CREATE TABLE food_alert (id INTEGER PRIMARY KEY, description VARCHAR(200) NOT NULL, "
+    "quantity VARCHAR(50) NOT NULL, location VARCHAR(100) NOT NULL, date_posted DATETIME, "
+    "collected BOOLEAN, image_filename VARCHAR(200), prediction VARCHAR(100), posted_by INTEGER NOT NULL)",
+    "CREATE INDEX ix_food_alert_collected_date ON food_alert (collected, date_posted, id)",
+]
+INSERT = text("INSERT INTO food_alert (description, quantity, location, date_posted, collected, prediction, posted_by) "
+              "VALUES ('Leftover rice', '10', 'Block A', CURRENT_TIMESTAMP, 0, 'cooked_food', 1)")
+READ = text("SELECT * FROM food_alert WHERE collected = 0 ORDER BY date_posted DESC, id DESC LIMIT 50")
+
+
+def make_engine(path, profile):
+    settings = database_settings({"DATABASE_URL": f"sqlite:///{path}"})
+    if profile == "default":
+        # What app.py used before: stock engine, rollback journal, FULL sync
+        engine = create_engine(settings["url"], connect_args={"check_same_thread": False})
+        install_sqlite_pragmas(engine, {"journal_mode": "DELETE"})
+    else:
+        engine = create_engine(settings["url"], **engine_options(settings))
+        install_sqlite_pragmas(engine, sqlite_pragmas(settings))
+    return engine
+
+
+def run_profile(profile, args):
+    path = os.path.join(tempfile.mkdtemp(prefix=f"bench_db_{profile}_"), "bench.db")
+    engine = make_engine(path, profile)
+    with engine.begin() as conn:
+        for ddl in SCHEMA:
+            conn.execute(text(ddl))
+        for _ in range(args.seed // 1000):
+            conn.execute(INSERT.bindparams(), [{}] * 1000)
+
+    stop = threading.Event()
+    lock = threading.Lock()
+    read_lat, counts = [], {"reads": 0, "writes": 0, "errors": 0}
+
+    def reader():
+        local = []
+        while not stop.is_set():
+            t0 = time.perf_counter()
+            try:
+                with engine.connect() as conn:
+                    conn.execute(READ).fetchall()
+            except Exception:
+                with lock:
+                    counts["errors"] += 1
+                continue
+            local.append(time.perf_counter() - t0)
+        with lock:
+            read_lat.extend(local)
+            counts["reads"] += len(local)
+
+    def writer():
+        n = 0
+        while not stop.is_set():
+            try:
+                with engine.begin() as conn:
+                    conn.execute(INSERT)
+                n += 1
+            except Exception:
+                with lock:
+                    counts["errors"] += 1
+        with lock:
+            counts["writes"] += n
+
+    threads = [threading.Thread(target=reader) for _ in range(args.readers)]
+    threads += [threading.Thread(target=writer) for _ in range(args.writers)]
+    for t in threads:
+        t.start()
+    time.sleep(args.seconds)
+    stop.set()
+    for t in threads:
+        t.join()
+    engine.dispose()
+
+    lat_ms = np.array(read_lat) * 1000.0 if read_lat else np.zeros(1)
+    return {
+        "profile": profile,
+        "reads_per_s": round(counts["reads"] / args.seconds, 1),
+        "writes_per_s": round(counts["writes"] / args.seconds, 1),
+        "read_p50_ms": round(float(np.percentile(lat_ms, 50)), 2),
+        "read_p99_ms": round(float(np.percentile(lat_ms, 99)), 2),
+        "errors": counts["errors"],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="SQLite lock contention: default vs. tuned WAL profile")
+    parser.add_argument("--readers", type=int, default=16)
+    parser.add_argument("--writers", type=int, default=4)
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--seed", type=int, default=20_000, help="rows inserted before the run")
+    parser.add_argument("--json", help="also write results to this file")
+    args = parser.parse_args()
+
+    results = [run_profile(p, args) for p in ("default", "tuned")]
+    print(f"\n{'profile':<10}{'reads/s':>10}{'writes/s':>10}{'p50 ms':>9}{'p99 ms':>9}{'errors':>8}")
+    for r in results:
+        print(f"{r['profile']:<10}{r['reads_per_s']:>10}{r['writes_per_s']:>10}"
+              f"{r['read_p50_ms']:>9}{r['read_p99_ms']:>9}{r['errors']:>8}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"readers": args.readers, "writers": args.writers, "results": results}, f, indent=2)
+        print(f"\n[INFO] Results written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+# benchmarks/bench_geo.py
+# Nearest-N uncollected alerts within R km: R-tree vs. bounding-box scan vs. naive scan.
+#
+# Seeds a throwaway SQLite database with --alerts FoodAlert rows scattered
+# around the gazetteer's cities, then times the same queries three ways:
+#   naive   load every uncollected alert, haversine all of them, sort
+#   bbox    geo.nearest_alert_ids on the indexed latitude/longitude columns
+#   rtree   geo.nearest_alert_ids on the food_alert_geo R-tree (what the app uses)
+#
+#   python benchmarks/bench_geo.py --alerts 100000 --limit 20 --radius 10
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+def percentiles(samples):
+    samples = sorted(samples)
+    return {"p50_ms": round(statistics.median(samples), 3),
+            "p95_ms": round(samples[int(len(samples) * 0.95) - 1], 3)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Nearest-alert query latency with and without the R-tree")
+    parser.add_argument("--alerts", type=int, default=100_000)
+    parser.add_argument("--uncollected", type=float, default=0.8, help="fraction still available")
+    parser.add_argument("--spread-km", type=float, default=15.0, help="std-dev of alerts around a city")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--radius", type=float, default=10.0)
+    parser.add_argument("--json", help="also write results to this file")
+    args = parser.parse_args()
+
+    json_path = os.path.abspath(args.json) if args.json else None
+    workdir = tempfile.mkdtemp(prefix="bench_geo_")
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+    os.chdir(workdir)  # keep the app's upload/cache files out of the repo
+
+    import app as webapp
+    from geo import haversine_km, nearest_alert_ids
+    from migrations import run_migrations
+
+    app, db, FoodAlert, User = webapp.app, webapp.db, webapp.FoodAlert, webapp.User
+    cities = list(webapp.app.extensions["food_waste"].gazetteer.places.values())
+    rng = random.Random(0)
+    deg = args.spread_km / 111.0
+
+    with app.app_context():
+        db.create_all()
+        run_migrations(db.engine)  # installs the R-tree and its triggers
+        print(f"[INFO] Seeding {args.alerts} alerts into {workdir}")
+        db.session.execute(User.__table__.insert(), [{"username": "mess", "password": "x", "role": "mess"}])
+        start = datetime(2024, 1, 1)
+        rows = []
+        for i in range(args.alerts):
+            lat, lon = rng.choice(cities)
+            rows.append({
+                "description": f"Leftover meal {i}", "quantity": "10", "location": "seeded",
+                "latitude": lat + rng.gauss(0, deg), "longitude": lon + rng.gauss(0, deg),
+                "date_posted": start + timedelta(minutes=i), "collected": rng.random() >= args.uncollected,
+                "prediction": "cooked_food", "posted_by": 1,
+            })
+        for i in range(0, len(rows), 10_000):
+            db.session.execute(FoodAlert.__table__.insert(), rows[i:i + 10_000])
+        db.session.commit()
+
+        points = []
+        for _ in range(args.queries):
+            lat, lon = rng.choice(cities)
+            points.append((lat + rng.gauss(0, deg), lon + rng.gauss(0, deg)))
+
+        def naive(lat, lon):
+            alerts = FoodAlert.query.filter_by(collected=False).all()
+            ranked = sorted(((haversine_km(lat, lon, a.latitude, a.longitude), a.id) for a in alerts
+                             if a.latitude is not None))
+            return [(i, d) for d, i in ranked if d <= args.radius][:args.limit]
+
+        conn = db.session.connection()
+        methods = {
+            "naive": naive,
+            "bbox": lambda lat, lon: nearest_alert_ids(conn, lat, lon, args.radius, args.limit, use_index=False),
+            "rtree": lambda lat, lon: nearest_alert_ids(conn, lat, lon, args.radius, args.limit, use_index=True),
+        }
+
+        results, answers = {}, {}
+        for name, fn in methods.items():
+            samples, found = [], []
+            for lat, lon in points[:20] if name == "naive" else points:
+                t0 = time.perf_counter()
+                found.append([i for i, _ in fn(lat, lon)])
+                samples.append((time.perf_counter() - t0) * 1000.0)
+                db.session.expire_all()
+            results[name] = {**percentiles(samples), "queries": len(samples)}
+            answers[name] = found
+
+    # All three must return the same alerts (naive only ran the first 20 queries)
+    agree = all(answers[n][:20] == answers["naive"] for n in ("bbox", "rtree"))
+    print(f"\n{'method':<8}{'queries':>9}{'p50 ms':>10}{'p95 ms':>10}")
+    for name, r in results.items():
+        print(f"{name:<8}{r['queries']:>9}{r['p50_ms']:>10}{r['p95_ms']:>10}")
+    print(f"\nSame results as the naive scan: {'yes' if agree else 'NO'}")
+
+    if json_path:
+        with open(json_path, "w") as f:
+            json.dump({"args": vars(args), "results": results, "agree": agree}, f, indent=2)
+        print(f"[INFO] Results written to {json_path}")
+
+
+if __name__ == "__main__":
+    main()
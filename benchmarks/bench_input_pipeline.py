@@ -0,0 +1,91 @@
+# benchmarks/bench_input_pipeline.py
+# Training input throughput (images/sec): JPEG directory pipeline vs. TFRecord shards.
+#
+# Iterates the training split for --epochs epochs through each pipeline from
+# train_model.py, without a model, so only input cost is measured. The first
+# epoch of the directory pipeline includes decoding (later ones hit .cache()).
+#
+#   python benchmarks/bench_input_pipeline.py --dataset dataset --shards shards
+#   python benchmarks/bench_input_pipeline.py --synthetic 2000   # generated JPEGs
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+from PIL import Image
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+def make_synthetic_dataset(root, count, classes=("cooked_food", "fruits", "others", "vegetables")):
+    rng = np.random.default_rng(0)
+    for split, n in (("train", count), ("val", max(1, count // 5))):
+        for i in range(n):
+            category = classes[i % len(classes)]
+            os.makedirs(os.path.join(root, split, category), exist_ok=True)
+            pixels = rng.integers(0, 256, (384, 512, 3), dtype=np.uint8)
+            Image.fromarray(pixels).save(os.path.join(root, split, category, f"{i:06d}.jpg"), quality=85)
+
+
+def measure(ds, epochs):
+    rows = []
+    for epoch in range(epochs):
+        images = 0
+        t0 = time.perf_counter()
+        for batch, _ in ds:
+            images += int(batch.shape[0])
+        elapsed = time.perf_counter() - t0
+        rows.append({"epoch": epoch + 1, "images": images, "seconds": round(elapsed, 3),
+                     "images_per_s": round(images / elapsed, 1)})
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Input pipeline throughput: directory vs. shards")
+    parser.add_argument("--dataset", default="dataset")
+    parser.add_argument("--shards", default="shards")
+    parser.add_argument("--synthetic", type=int, default=0,
+                        help="generate this many random training JPEGs in a temp dir instead")
+    parser.add_argument("--epochs", type=int, default=2)
+    parser.add_argument("--json", help="also write results to this file")
+    args = parser.parse_args()
+
+    if args.synthetic:
+        workdir = tempfile.mkdtemp(prefix="bench_input_")
+        args.dataset = os.path.join(workdir, "dataset")
+        args.shards = os.path.join(workdir, "shards")
+        print(f"[INFO] Generating {args.synthetic} synthetic images in {args.dataset}")
+        make_synthetic_dataset(args.dataset, args.synthetic)
+
+    if not os.path.exists(os.path.join(args.shards, "manifest.json")):
+        print(f"[INFO] Writing shards to {args.shards}")
+        subprocess.run([sys.executable, os.path.join(ROOT, "preprocess_dataset.py"),
+                        "--dataset", args.dataset, "--output", args.shards], check=True)
+
+    import train_model
+
+    results = {}
+    train_ds, _, _ = train_model.load_directory_datasets(os.path.join(args.dataset, "train"),
+                                                         os.path.join(args.dataset, "val"))
+    results["directory"] = measure(train_ds, args.epochs)
+    train_ds, _, _ = train_model.load_shard_datasets(args.shards)
+    results["shards"] = measure(train_ds, args.epochs)
+
+    print(f"\n{'pipeline':<12}{'epoch':>7}{'images':>9}{'seconds':>10}{'img/s':>10}")
+    for name, rows in results.items():
+        for r in rows:
+            print(f"{name:<12}{r['epoch']:>7}{r['images']:>9}{r['seconds']:>10}{r['images_per_s']:>10}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\n[INFO] Results written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+# benchmarks/bench_preprocessing.py
+# Microbenchmark: per-image cost of turning an uploaded JPEG into model input.
+#
+#   legacy      full decode, nearest-neighbour resize, float32 copy, / 255,
+#               expand_dims (the old serving path)
+#   full        full decode, bilinear resize into a preallocated batch row
+#   draft       draft-mode decode, bilinear resize into a preallocated
+#               batch row (preprocessing.BatchBuffer, what the app does now)
+#
+# For each photo size it reports the median time per image and, through
+# tracemalloc, the peak Python/NumPy memory allocated while preprocessing one
+# image and one whole batch. PIL's own decode buffers are not traced, so the
+# draft savings in decoder memory come on top of these numbers.
+#
+#   python benchmarks/bench_preprocessing.py
+#   python benchmarks/bench_preprocessing.py --sizes 4032x3024 --images 32 --repeat 5
+import argparse
+import io
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+from PIL import Image
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from loadtest import synthetic_images  # noqa: E402
+from preprocessing import IMG_SIZE, BatchBuffer  # noqa: E402
+
+
+def legacy(data, buffer):
+    with Image.open(io.BytesIO(data)) as img:
+        img = img.convert("RGB").resize((IMG_SIZE[1], IMG_SIZE[0]), Image.NEAREST)
+        return np.expand_dims(np.asarray(img, dtype=np.float32) / 255.0, axis=0)
+
+
+def full(data, buffer):
+    buffer.add(io.BytesIO(data), draft=False)
+
+
+def draft(data, buffer):
+    buffer.add(io.BytesIO(data))
+
+
+PIPELINES = {"legacy": legacy, "full": full, "draft": draft}
+
+
+def run(pipeline, images, batch_size):
+    """Preprocess every image in batches; returns seconds."""
+    buffer = BatchBuffer(batch_size)
+    start = time.perf_counter()
+    for i in range(0, len(images), batch_size):
+        buffer.clear()
+        batch = [pipeline(data, buffer) for data in images[i:i + batch_size]]
+        if pipeline is legacy:
+            np.concatenate(batch)
+        else:
+            buffer.model_input()
+    return time.perf_counter() - start
+
+
+def allocations(pipeline, images, batch_size):
+    """(peak bytes while preprocessing one image, peak bytes for one batch).
+
+    The preallocated BatchBuffer is created before tracing starts, so only
+    what each pipeline allocates per call is counted.
+    """
+    buffer = BatchBuffer(batch_size)
+    batch_images = images[:batch_size]
+    tracemalloc.start()
+    try:
+        per_image = []
+        for data in batch_images:
+            base = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+            pipeline(data, buffer)
+            per_image.append(tracemalloc.get_traced_memory()[1] - base)
+
+        buffer.clear()
+        base = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        batch = [pipeline(data, buffer) for data in batch_images]
+        if pipeline is legacy:
+            np.concatenate(batch)
+        else:
+            buffer.model_input()
+        batch_peak = tracemalloc.get_traced_memory()[1] - base
+    finally:
+        tracemalloc.stop()
+    return statistics.median(per_image), batch_peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-image preprocessing latency and allocations")
+    parser.add_argument("--sizes", nargs="+", default=["640x480", "1920x1080", "4032x3024"])
+    parser.add_argument("--images", type=int, default=16, help="distinct JPEGs per size")
+    parser.add_argument("--batch-size", type=int, default=16)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'size':<11} {'pipeline':<8} {'ms/image':>9} {'image peak':>11} {'batch peak':>11}")
+    for spec in args.sizes:
+        width, height = map(int, spec.split("x"))
+        images = synthetic_images(args.images, size=(width, height))
+        for name, pipeline in PIPELINES.items():
+            run(pipeline, images[:2], args.batch_size)  # warm up
+            seconds = statistics.median(run(pipeline, images, args.batch_size) for _ in range(args.repeat))
+            image_peak, batch_peak = allocations(pipeline, images, args.batch_size)
+            print(f"{spec:<11} {name:<8} {seconds / len(images) * 1000:>9.2f} "
+                  f"{image_peak / 1024:>8.0f} KB {batch_peak / 1024:>8.0f} KB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+# benchmarks/bench_routing.py
+# Pickup-route planner: planning time vs. route quality.
+#
+# For each stop count, random stops are scattered around a depot and planned
+# with routing.plan_route. Reported per size (median over --trials):
+#   nn_ms / total_ms   nearest-neighbour only / nearest-neighbour + 2-opt
+#   nn_gap / gap       excess length over the reference tour
+# The reference is the exact optimum (brute force) for sizes up to 9 stops,
+# and otherwise the best of --restarts random-start 2-opt runs plus ours.
+# Exits 1 if planning --gate-stops stops takes longer than --gate-ms.
+#
+#   python benchmarks/bench_routing.py --sizes 8 50 100 500 1000
+import argparse
+import itertools
+import json
+import os
+import statistics
+import sys
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from routing import Stop, distance_matrix, plan_route, tour_length, two_opt  # noqa: E402
+
+DEPOT = (19.0760, 72.8777)
+
+
+def reference_length(dist, rng, restarts):
+    n = len(dist)
+    if n <= 10:
+        return min(tour_length(np.array((0,) + perm + (0,)), dist)
+                   for perm in itertools.permutations(range(1, n)))
+    best = np.inf
+    for _ in range(restarts):
+        tour = np.concatenate(([0], rng.permutation(np.arange(1, n)), [0]))
+        best = min(best, tour_length(two_opt(tour, dist, max_passes=200), dist))
+    return best
+
+
+def run_size(n, trials, restarts, rng):
+    rows = []
+    for _ in range(trials):
+        points = rng.normal(DEPOT, 0.15, (n, 2))
+        stops = [Stop(i, lat, lon, 1.0) for i, (lat, lon) in enumerate(points)]
+
+        t0 = time.perf_counter()
+        nn = plan_route(DEPOT, stops, improve=False)
+        t1 = time.perf_counter()
+        full = plan_route(DEPOT, stops)
+        t2 = time.perf_counter()
+
+        dist = distance_matrix([DEPOT[0]] + list(points[:, 0]), [DEPOT[1]] + list(points[:, 1]))
+        ref = min(reference_length(dist, rng, restarts), full.total_km)
+        rows.append({"nn_ms": (t1 - t0) * 1000, "total_ms": (t2 - t1) * 1000,
+                     "nn_gap": nn.total_km / ref - 1, "gap": full.total_km / ref - 1})
+    return {k: round(statistics.median(r[k] for r in rows), 4) for k in rows[0]}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Route planning time vs. quality")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[8, 50, 100, 250, 500, 1000])
+    parser.add_argument("--trials", type=int, default=5)
+    parser.add_argument("--restarts", type=int, default=3, help="random-start 2-opt runs for the reference")
+    parser.add_argument("--gate-stops", type=int, default=500)
+    parser.add_argument("--gate-ms", type=float, default=1000.0)
+    parser.add_argument("--json", help="also write results to this file")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    results = {}
+    print(f"{'stops':>6}{'nn ms':>10}{'nn+2opt ms':>12}{'nn gap':>9}{'2opt gap':>10}")
+    for n in args.sizes:
+        r = results[n] = run_size(n, args.trials, args.restarts, rng)
+        print(f"{n:>6}{r['nn_ms']:>10.1f}{r['total_ms']:>12.1f}{r['nn_gap'] * 100:>8.1f}%{r['gap'] * 100:>9.1f}%")
+
+    gate = results.get(args.gate_stops) or run_size(args.gate_stops, args.trials, 1, rng)
+    ok = gate["total_ms"] <= args.gate_ms
+    print(f"\n{args.gate_stops} stops planned in {gate['total_ms']:.1f} ms "
+          f"(limit {args.gate_ms:.0f} ms): {'PASS' if ok else 'FAIL'}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"results": results, "gate_pass": ok}, f, indent=2)
+        print(f"[INFO] Results written to {args.json}")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
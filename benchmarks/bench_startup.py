@@ -0,0 +1,199 @@
+# benchmarks/bench_startup.py
+# Startup cost of each MODEL_LOADING mode (see food_waste/model_registry.py).
+#
+# For every mode a fresh server process is started against the same seeded
+# database and model, and the clock runs from spawning it:
+#
+#   first request   first 200 from /healthz: the app is accepting traffic
+#   first classify  first POST /ai_classifier answered with a prediction,
+#                   sent as soon as the server is up (includes any wait for
+#                   the model that the mode leaves to the first user)
+#   ready           /healthz reports the model as loaded
+#
+# The login before the classification is not counted.
+#   memory          PSS of the server and its workers once ready (Linux)
+#
+# By default the server is the werkzeug one (one process, like `python
+# app.py`). With --server gunicorn and --workers N the numbers show the other
+# side of prefork: the master loads the weights once and the workers share
+# those pages, so PSS grows by less than a model per worker.
+#
+# The stub model (see loadtest.py) loads in milliseconds; pass --model-dir
+# and --backend to measure the real export.
+#
+#   python benchmarks/bench_startup.py
+#   python benchmarks/bench_startup.py --server gunicorn --workers 4 --model-dir . --backend keras
+import argparse
+import http.client
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from loadtest import PASSWORD, ROOT, Session, free_port, synthetic_images, write_stub_model
+
+MODES = ["lazy", "background", "eager", "prefork"]
+
+
+def serve(args):
+    """--serve: what `python app.py` does, without the reloader."""
+    from werkzeug.serving import run_simple
+
+    import app as webapp
+    from food_waste import start_services
+
+    start_services(webapp.app)
+    run_simple("127.0.0.1", args.port, webapp.app, threaded=True)
+
+
+def server_command(args, port):
+    if args.server == "gunicorn":
+        return [sys.executable, "-m", "gunicorn", "-c", os.path.join(ROOT, "gunicorn.conf.py"),
+                "--pythonpath", ROOT, "--bind", f"127.0.0.1:{port}", "--workers", str(args.workers)]
+    return [sys.executable, os.path.abspath(__file__), "--serve", "--port", str(port)]
+
+
+def get_json(port, path):
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=1)
+    try:
+        conn.request("GET", path)
+        response = conn.getresponse()
+        return response.status, json.loads(response.read() or b"null")
+    finally:
+        conn.close()
+
+
+def process_tree(pid):
+    """pid and all its descendants."""
+    children = {}
+    for entry in os.listdir("/proc"):
+        if entry.isdigit():
+            try:
+                with open(f"/proc/{entry}/stat") as f:
+                    ppid = int(f.read().rsplit(")", 1)[1].split()[1])
+            except (OSError, IndexError, ValueError):
+                continue
+            children.setdefault(ppid, []).append(int(entry))
+    pids, stack = [], [pid]
+    while stack:
+        current = stack.pop()
+        pids.append(current)
+        stack.extend(children.get(current, []))
+    return pids
+
+
+def pss_mb(pid):
+    """Proportional set size of a process tree in MB, or None where /proc has no smaps_rollup."""
+    total = 0
+    for p in process_tree(pid):
+        try:
+            with open(f"/proc/{p}/smaps_rollup") as f:
+                total += next(int(line.split()[1]) for line in f if line.startswith("Pss:"))
+        except (OSError, StopIteration):
+            return None
+    return round(total / 1024, 1)
+
+
+def measure(mode, run, args, workdir, image):
+    port = free_port()
+    env = dict(os.environ,
+               DATABASE_URL=f"sqlite:///{os.path.join(workdir, 'startup.db')}",
+               MODEL_DIR=args.model_dir or os.path.join(workdir, "model"),
+               INFERENCE_BACKEND=args.backend,
+               MODEL_LOADING=mode,
+               # A fresh cache per run, or the repeat would be answered without the model
+               PREDICTION_CACHE_PATH=os.path.join(workdir, f"prediction_cache_{mode}_{run}.db"))
+    log = open(os.path.join(workdir, f"server_{mode}.log"), "w")
+    start = time.monotonic()
+    proc = subprocess.Popen(server_command(args, port), cwd=workdir, env=env, stdout=log, stderr=subprocess.STDOUT)
+    result = {"mode": mode}
+    try:
+        deadline = start + args.timeout
+        while "first_request" not in result:
+            if proc.poll() is not None or time.monotonic() > deadline:
+                raise RuntimeError(f"{mode}: server did not come up, see {log.name}")
+            try:
+                if get_json(port, "/healthz")[0] == 200:
+                    result["first_request"] = time.monotonic() - start
+            except OSError:
+                time.sleep(0.01)
+
+        client = Session(f"http://127.0.0.1:{port}", args.timeout)
+        logged_in = time.monotonic()
+        client.form("/login", {"username": "mess0", "password": PASSWORD})
+        sent = time.monotonic()
+        status, _ = client.multipart("/ai_classifier", {}, {"image": image})
+        if status != 200:
+            raise RuntimeError(f"{mode}: classification returned {status}, see {log.name}")
+        result["classify_latency"] = time.monotonic() - sent
+        client.close()  # an idle keep-alive connection would hold up gunicorn's graceful shutdown
+        # Password hashing is the same in every mode; keep it out of the comparison
+        result["first_classify"] = time.monotonic() - start - (sent - logged_in)
+
+        while not get_json(port, "/healthz")[1]["ready"]:  # one worker's view; all load alike
+            if time.monotonic() > deadline:
+                raise RuntimeError(f"{mode}: model never became ready, see {log.name}")
+            time.sleep(0.01)
+        result["ready"] = time.monotonic() - start - (sent - logged_in)
+        result["pss_mb"] = pss_mb(proc.pid)
+    finally:
+        proc.terminate()
+        proc.wait(timeout=30)
+        log.close()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time-to-first-request for each model loading mode")
+    parser.add_argument("--modes", default=",".join(MODES))
+    parser.add_argument("--repeat", type=int, default=3, help="runs per mode; the median is reported")
+    parser.add_argument("--server", choices=["werkzeug", "gunicorn"], default="werkzeug")
+    parser.add_argument("--workers", type=int, default=2, help="gunicorn workers")
+    parser.add_argument("--model-dir", help="real exported model instead of the stub")
+    parser.add_argument("--backend", default="numpy")
+    parser.add_argument("--timeout", type=float, default=120.0)
+    parser.add_argument("--keep", action="store_true", help="keep the temp directory (database, server logs)")
+    parser.add_argument("--serve", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--port", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        return serve(args)
+    modes = args.modes.split(",")
+    unknown = set(modes) - set(MODES)
+    if unknown:
+        parser.error(f"unknown mode(s): {', '.join(sorted(unknown))}")
+
+    workdir = tempfile.mkdtemp(prefix="bench_startup_")
+    try:
+        if not args.model_dir:
+            write_stub_model(os.path.join(workdir, "model"))
+        subprocess.run([sys.executable, os.path.join(ROOT, "benchmarks", "loadtest.py"), "--seed-db",
+                        "--mess-users", "1", "--ngo-users", "0", "--alerts", "0"],
+                       cwd=workdir, check=True, stdout=subprocess.DEVNULL,
+                       env=dict(os.environ, DATABASE_URL=f"sqlite:///{os.path.join(workdir, 'startup.db')}"))
+        image = ("food.jpg", synthetic_images(1)[0])
+
+        print(f"[INFO] {args.server} server, {args.backend} backend, median of {args.repeat} run(s)")
+        print(f"{'mode':<11} {'first request':>14} {'first classify':>15} {'classify':>9} {'ready':>8} {'PSS':>9}")
+        for mode in modes:
+            runs = [measure(mode, run, args, workdir, image) for run in range(args.repeat)]
+            row = {key: statistics.median(r[key] for r in runs)
+                   for key in ("first_request", "first_classify", "classify_latency", "ready")}
+            pss = [r["pss_mb"] for r in runs if r["pss_mb"] is not None]
+            print(f"{mode:<11} {row['first_request'] * 1000:>11.0f} ms {row['first_classify'] * 1000:>12.0f} ms "
+                  f"{row['classify_latency'] * 1000:>6.0f} ms {row['ready'] * 1000:>5.0f} ms "
+                  f"{f'{statistics.median(pss):.0f} MB' if pss else 'n/a':>9}")
+    finally:
+        if args.keep:
+            print(f"[INFO] Kept {workdir}")
+        else:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,514 @@
+# benchmarks/loadtest.py
+# Reproducible end-to-end load test of the Flask app over real HTTP.
+#
+# By default everything is self-contained: a fresh SQLite database in a temp
+# directory is seeded with --mess-users / --ngo-users accounts and --alerts
+# food posts, a stub model (random-weight NumPy export, see below) stands in
+# for the trained .h5, and the app is started in a child process on a free
+# port. --concurrency client threads then run a weighted mix of workloads for
+# --duration seconds (or --requests in total):
+#
+#   signup          POST /signup          new account (password hashing)
+#   login           POST /login           seeded account
+#   upload          POST /mess_dashboard  food post with a synthetic JPEG
+#   mess_dashboard  GET  /mess_dashboard
+#   ngo_dashboard   GET  /ngo_dashboard
+#   collect         POST /collect/<id>    claim a random seeded alert
+#   classify        POST /ai_classifier   synchronous image classification
+#
+# Each thread draws its workload sequence from its own seeded RNG, so a given
+# --seed always issues the same requests. Throughput and latency percentiles
+# per workload, plus the server's own upload stage timings from /metrics, are
+# written to --json; --compare prints the change against an earlier run.
+#
+#   python benchmarks/loadtest.py --concurrency 8 --duration 30 --json run.json
+#   python benchmarks/loadtest.py --mix upload=1,classify=1 --compare run.json
+#
+# Against a server you started yourself (e.g. under gunicorn), seed its
+# database first with the same accounts:
+#   DATABASE_URL=sqlite:///instance/food.db python benchmarks/loadtest.py --seed-db
+#   python benchmarks/loadtest.py --url http://127.0.0.1:8000 --json gunicorn.json
+import argparse
+import http.client
+import io
+import json
+import os
+import platform
+import random
+import re
+import shutil
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.parse
+import uuid
+from datetime import datetime, timedelta
+
+import numpy as np
+from PIL import Image, ImageDraw
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+DEFAULT_MIX = "signup=1,login=2,upload=4,mess_dashboard=6,ngo_dashboard=8,collect=3,classify=2"
+PASSWORD = "loadtest"
+CITIES = ["Pune", "Mumbai", "Delhi", "Bengaluru", "Chennai", "Hyderabad", "Kolkata", "Jaipur"]
+
+
+# ---------- Fixtures ----------
+def write_stub_model(model_dir, num_classes=4, seed=0):
+    """Random-weight model in the NumpyBackend (.npz) format: pool -> dense -> softmax.
+
+    It runs the same code paths as a real export (batching, derivatives,
+    caching) at a fraction of the CPU cost.
+    """
+    rng = np.random.default_rng(seed)
+    layers = [
+        {"class_name": "Rescaling", "scale": 1.0 / 255, "offset": 0.0},
+        {"class_name": "Conv2D", "strides": [2, 2], "padding": "valid", "activation": "relu", "num_weights": 2},
+        {"class_name": "MaxPooling2D", "pool_size": [4, 4], "strides": [4, 4]},
+        {"class_name": "Flatten"},
+        {"class_name": "Dense", "activation": "softmax", "num_weights": 2},
+    ]
+    arrays = {
+        "layer1_0": rng.normal(0, 0.1, (3, 3, 3, 8)).astype(np.float32),
+        "layer1_1": np.zeros(8, np.float32),
+        "layer4_0": rng.normal(0, 0.1, (15 * 15 * 8, num_classes)).astype(np.float32),
+        "layer4_1": np.zeros(num_classes, np.float32),
+    }
+    os.makedirs(model_dir, exist_ok=True)
+    np.savez(os.path.join(model_dir, "food_waste_model.npz"), layers=json.dumps(layers), **arrays)
+
+
+def synthetic_images(count, size=(640, 480), seed=0):
+    """Distinct JPEGs (random background plus shapes), as bytes."""
+    rng = random.Random(seed)
+    images = []
+    for _ in range(count):
+        img = Image.new("RGB", size, tuple(rng.randrange(256) for _ in range(3)))
+        draw = ImageDraw.Draw(img)
+        for _ in range(rng.randint(3, 12)):
+            x0, y0 = rng.randrange(size[0]), rng.randrange(size[1])
+            box = (x0, y0, x0 + rng.randint(20, 240), y0 + rng.randint(20, 240))
+            color = tuple(rng.randrange(256) for _ in range(3))
+            (draw.ellipse if rng.random() < 0.5 else draw.rectangle)(box, fill=color)
+        buf = io.BytesIO()
+        img.save(buf, "JPEG", quality=85)
+        images.append(buf.getvalue())
+    return images
+
+
+def seed_database(app, db, User, FoodAlert, args):
+    """Bulk-insert users and alerts; every seeded account uses PASSWORD."""
+    from werkzeug.security import generate_password_hash
+
+    rng = random.Random(args.seed)
+    hashed = generate_password_hash(PASSWORD, method="pbkdf2:sha256")  # hashed once, shared
+    with app.app_context():
+        db.session.execute(User.__table__.insert(), [
+            {"username": f"mess{i}", "password": hashed, "role": "mess"} for i in range(args.mess_users)
+        ] + [
+            {"username": f"ngo{i}", "password": hashed, "role": "ngo"} for i in range(args.ngo_users)
+        ])
+        start = datetime(2024, 1, 1)
+        rows = []
+        for i in range(args.alerts):
+            rows.append({
+                "description": f"Leftover meal {i}", "quantity": f"{rng.randint(1, 40)} plates",
+                "location": rng.choice(CITIES), "date_posted": start + timedelta(minutes=i),
+                "collected": False, "prediction": rng.choice(["cooked_food", "fruits", "others", "vegetables"]),
+                "posted_by": rng.randint(1, args.mess_users),
+            })
+        for i in range(0, len(rows), 10_000):
+            db.session.execute(FoodAlert.__table__.insert(), rows[i:i + 10_000])
+        db.session.commit()
+
+
+# ---------- Server (child process) ----------
+def prepare_database(args):
+    """Create the schema in the app's DATABASE_URL and seed it."""
+    import app as webapp
+    from migrations import run_migrations
+
+    with webapp.app.app_context():
+        webapp.db.create_all()
+        run_migrations(webapp.db.engine)
+    seed_database(webapp.app, webapp.db, webapp.User, webapp.FoodAlert, args)
+    return webapp
+
+
+def serve(args):
+    """--serve: prepare a fresh database, then run the app on --port."""
+    from werkzeug.serving import WSGIRequestHandler, run_simple
+
+    webapp = prepare_database(args)
+    WSGIRequestHandler.protocol_version = "HTTP/1.1"  # keep-alive, like a real deployment
+    run_simple("127.0.0.1", args.port, webapp.app, threaded=True)
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(args, workdir):
+    port = free_port()
+    env = dict(os.environ,
+               DATABASE_URL=f"sqlite:///{os.path.join(workdir, 'loadtest.db')}",
+               MODEL_DIR=args.model_dir or os.path.join(workdir, "model"),
+               INFERENCE_BACKEND=args.backend,
+               PREDICTION_CACHE_PATH=os.path.join(workdir, "prediction_cache.db"))
+    cmd = [sys.executable, os.path.abspath(__file__), "--serve", "--port", str(port),
+           "--mess-users", str(args.mess_users), "--ngo-users", str(args.ngo_users),
+           "--alerts", str(args.alerts), "--seed", str(args.seed)]
+    log = open(os.path.join(workdir, "server.log"), "w")
+    proc = subprocess.Popen(cmd, cwd=workdir, env=env, stdout=log, stderr=subprocess.STDOUT)
+    url = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + args.startup_timeout
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f"Server exited during startup, see {log.name}")
+        try:
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=1)
+            conn.request("GET", "/login")
+            conn.getresponse().read()
+            return proc, url, time.monotonic() - (deadline - args.startup_timeout)
+        except OSError:
+            time.sleep(0.2)
+    proc.kill()
+    raise RuntimeError(f"Server did not start within {args.startup_timeout}s, see {log.name}")
+
+
+# ---------- Client ----------
+class Session:
+    """One keep-alive connection with its own session cookie; redirects are not followed."""
+
+    def __init__(self, url, timeout):
+        parsed = urllib.parse.urlsplit(url)
+        self.host, self.port = parsed.hostname, parsed.port or 80
+        self.timeout = timeout
+        self.cookie = None
+        self._conn = None
+
+    def request(self, method, path, body=None, content_type=None):
+        headers = {}
+        if self.cookie:
+            headers["Cookie"] = self.cookie
+        if content_type:
+            headers["Content-Type"] = content_type
+        for attempt in range(2):
+            if self._conn is None:
+                self._conn = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+            try:
+                self._conn.request(method, path, body=body, headers=headers)
+                response = self._conn.getresponse()
+                response.read()
+                break
+            except (http.client.HTTPException, OSError):
+                self._conn.close()
+                self._conn = None
+                if attempt:
+                    raise
+        cookie = response.getheader("Set-Cookie")
+        if cookie:
+            self.cookie = cookie.split(";", 1)[0]
+        return response.status, response.getheader("Location") or ""
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def form(self, path, fields):
+        return self.request("POST", path, urllib.parse.urlencode(fields), "application/x-www-form-urlencoded")
+
+    def multipart(self, path, fields, files):
+        boundary = uuid.uuid4().hex
+        parts = []
+        for name, value in fields.items():
+            parts.append(f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'.encode())
+        for name, (filename, data) in files.items():
+            parts.append(f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"; filename="{filename}"\r\n'
+                         f"Content-Type: image/jpeg\r\n\r\n".encode() + data + b"\r\n")
+        parts.append(f"--{boundary}--\r\n".encode())
+        return self.request("POST", path, b"".join(parts), f"multipart/form-data; boundary={boundary}")
+
+
+def parse_mix(spec):
+    mix = {}
+    for item in spec.split(","):
+        name, _, weight = item.partition("=")
+        if name.strip() not in WORKLOADS:
+            raise SystemExit(f"Unknown workload {name!r}; choose from {', '.join(WORKLOADS)}")
+        mix[name.strip()] = float(weight or 1)
+    return {name: weight for name, weight in mix.items() if weight > 0}
+
+
+class Worker:
+    def __init__(self, index, url, args, images):
+        self.rng = random.Random(args.seed * 1000 + index)
+        self.args = args
+        self.index = index
+        self.images = images
+        self.signups = 0
+        self.mess = Session(url, args.timeout)
+        self.ngo = Session(url, args.timeout)
+        self.anon = Session(url, args.timeout)
+
+    def login_all(self):
+        self.mess.form("/login", {"username": f"mess{self.index % self.args.mess_users}", "password": PASSWORD})
+        self.ngo.form("/login", {"username": f"ngo{self.index % self.args.ngo_users}", "password": PASSWORD})
+
+    def image(self):
+        return f"food{self.rng.randrange(1000)}.jpg", self.rng.choice(self.images)
+
+    # Each workload returns (status, location) and whether that counts as success
+    def signup(self):
+        self.signups += 1
+        username = f"lt{self.args.seed}_{self.index}_{self.signups}_{uuid.uuid4().hex[:6]}"
+        status, location = self.anon.form("/signup", {"username": username, "password": PASSWORD,
+                                                      "role": self.rng.choice(["mess", "ngo"])})
+        return status == 302 and location.endswith("/login")
+
+    def login(self):
+        user = (f"mess{self.rng.randrange(self.args.mess_users)}" if self.rng.random() < 0.5
+                else f"ngo{self.rng.randrange(self.args.ngo_users)}")
+        status, location = self.anon.form("/login", {"username": user, "password": PASSWORD})
+        return status == 302 and location.endswith("_dashboard")
+
+    def upload(self):
+        status, location = self.mess.multipart("/mess_dashboard", {
+            "description": "Load test meal", "quantity": f"{self.rng.randint(1, 40)} plates",
+            "location": self.rng.choice(CITIES),
+        }, {"image": self.image()})
+        return status == 302 and location.endswith("/mess_dashboard")
+
+    def mess_dashboard(self):
+        return self.mess.request("GET", "/mess_dashboard")[0] == 200
+
+    def ngo_dashboard(self):
+        return self.ngo.request("GET", "/ngo_dashboard")[0] == 200
+
+    def collect(self):
+        alert_id = self.rng.randint(1, max(1, self.args.alerts))
+        status, location = self.ngo.request("POST", f"/collect/{alert_id}")
+        return status == 302 and location.endswith("/ngo_dashboard")  # lost races are still a success
+
+    def classify(self):
+        return self.mess.multipart("/ai_classifier", {}, {"image": self.image()})[0] == 200
+
+
+WORKLOADS = ["signup", "login", "upload", "mess_dashboard", "ngo_dashboard", "collect", "classify"]
+
+
+def run_load(url, args, mix, images):
+    names, weights = list(mix), list(mix.values())
+    samples = {name: [] for name in names}  # (latency ms, ok)
+    lock = threading.Lock()
+    issued = [0]
+    workers = [Worker(i, url, args, images) for i in range(args.concurrency)]
+    for worker in workers:
+        worker.login_all()
+    barrier = threading.Barrier(args.concurrency + 1)
+    stop_at = [None]
+
+    def next_slot():
+        with lock:
+            if args.requests and issued[0] >= args.requests:
+                return False
+            issued[0] += 1
+        return not stop_at[0] or time.perf_counter() < stop_at[0]
+
+    def loop(worker):
+        barrier.wait()
+        local = {name: [] for name in names}
+        while next_slot():
+            name = worker.rng.choices(names, weights)[0]
+            t0 = time.perf_counter()
+            try:
+                ok = getattr(worker, name)()
+            except Exception:
+                ok = False
+            local[name].append(((time.perf_counter() - t0) * 1000.0, ok))
+        with lock:
+            for name, rows in local.items():
+                samples[name].extend(rows)
+
+    threads = [threading.Thread(target=loop, args=(w,)) for w in workers]
+    for t in threads:
+        t.start()
+    start = time.perf_counter()
+    stop_at[0] = None if args.requests else start + args.duration
+    barrier.wait()
+    for t in threads:
+        t.join()
+    return samples, time.perf_counter() - start
+
+
+# ---------- Report ----------
+def percentile(sorted_values, q):
+    if not sorted_values:
+        return None
+    return round(sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))], 2)
+
+
+def summarize(rows, elapsed):
+    latencies = sorted(ms for ms, _ in rows)
+    errors = sum(1 for _, ok in rows if not ok)
+    return {
+        "requests": len(rows),
+        "errors": errors,
+        "throughput_rps": round(len(rows) / elapsed, 2) if elapsed else 0.0,
+        "mean_ms": round(statistics.fmean(latencies), 2) if latencies else None,
+        "p50_ms": percentile(latencies, 0.50),
+        "p90_ms": percentile(latencies, 0.90),
+        "p95_ms": percentile(latencies, 0.95),
+        "p99_ms": percentile(latencies, 0.99),
+        "max_ms": round(latencies[-1], 2) if latencies else None,
+    }
+
+
+def server_stages(url, timeout):
+    """Mean upload stage times (ms) from the server's /metrics, if it has them."""
+    parsed = urllib.parse.urlsplit(url)
+    try:
+        conn = http.client.HTTPConnection(parsed.hostname, parsed.port or 80, timeout=timeout)
+        conn.request("GET", "/metrics")
+        response = conn.getresponse()
+        if response.status != 200:
+            return {}
+        text = response.read().decode()
+    except OSError:
+        return {}
+    sums = dict(re.findall(r'upload_stage_duration_seconds_sum\{stage="(\w+)"\} (\S+)', text))
+    counts = dict(re.findall(r'upload_stage_duration_seconds_count\{stage="(\w+)"\} (\S+)', text))
+    return {stage: round(float(sums[stage]) / float(counts[stage]) * 1000.0, 2)
+            for stage in sums if float(counts.get(stage, 0))}
+
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                              text=True, timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def print_report(report, baseline=None):
+    print(f"\n{'workload':<16}{'reqs':>7}{'err':>5}{'rps':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}"
+          + ("   Δp50     Δp95     Δrps" if baseline else ""))
+    for name, r in list(report["workloads"].items()) + [("TOTAL", report["total"])]:
+        line = (f"{name:<16}{r['requests']:>7}{r['errors']:>5}{r['throughput_rps']:>9}"
+                f"{r['p50_ms'] or '-':>9}{r['p95_ms'] or '-':>9}{r['p99_ms'] or '-':>9}")
+        old = None
+        if baseline:
+            old = baseline["total"] if name == "TOTAL" else baseline["workloads"].get(name)
+        if old:
+            line += "".join(f"{change(r[k], old[k]):>9}" for k in ("p50_ms", "p95_ms", "throughput_rps"))
+        print(line)
+    if report["server_stages_ms"]:
+        print("\nServer upload stages (mean ms): "
+              + ", ".join(f"{k} {v}" for k, v in report["server_stages_ms"].items()))
+
+
+def change(new, old):
+    if not new or not old:
+        return "-"
+    return f"{(new - old) / old * 100:+.0f}%"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="End-to-end HTTP load test of the Flask app")
+    parser.add_argument("--url", help="test an already running server instead of starting one")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds of load")
+    parser.add_argument("--requests", type=int, default=0, help="stop after this many requests instead")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="workload=weight,... (" + ", ".join(WORKLOADS) + ")")
+    parser.add_argument("--mess-users", type=int, default=20)
+    parser.add_argument("--ngo-users", type=int, default=20)
+    parser.add_argument("--alerts", type=int, default=5000)
+    parser.add_argument("--images", type=int, default=100, help="distinct synthetic images to upload")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--model-dir", help="real exported model instead of the stub")
+    parser.add_argument("--backend", default="numpy")
+    parser.add_argument("--timeout", type=float, default=60.0)
+    parser.add_argument("--startup-timeout", type=float, default=120.0)
+    parser.add_argument("--json", help="write the report to this file")
+    parser.add_argument("--compare", help="earlier --json report to diff against")
+    parser.add_argument("--keep", action="store_true", help="keep the temp directory (database, server.log)")
+    parser.add_argument("--serve", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--port", type=int, help=argparse.SUPPRESS)
+    parser.add_argument("--seed-db", action="store_true", help="only seed the app's DATABASE_URL, for --url runs")
+    args = parser.parse_args()
+
+    if args.serve:
+        return serve(args)
+    if args.seed_db:
+        prepare_database(args)
+        print(f"[INFO] Seeded {args.mess_users} mess and {args.ngo_users} NGO accounts (password "
+              f"{PASSWORD!r}) and {args.alerts} alerts")
+        return
+
+    mix = parse_mix(args.mix)
+    json_path = os.path.abspath(args.json) if args.json else None
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+
+    workdir = tempfile.mkdtemp(prefix="loadtest_")
+    images = synthetic_images(args.images, seed=args.seed)
+    proc, startup = None, None
+    if args.url:
+        url = args.url.rstrip("/")
+    else:
+        if not args.model_dir:
+            write_stub_model(os.path.join(workdir, "model"), seed=args.seed)
+        print(f"[INFO] Seeding {args.mess_users}+{args.ngo_users} users and {args.alerts} alerts in {workdir}")
+        proc, url, startup = start_server(args, workdir)
+        print(f"[INFO] Server up at {url} after {startup:.1f}s")
+
+    try:
+        print(f"[INFO] {args.concurrency} client(s), "
+              + (f"{args.requests} requests" if args.requests else f"{args.duration:.0f}s")
+              + f", mix {', '.join(f'{k}={v:g}' for k, v in mix.items())}")
+        samples, elapsed = run_load(url, args, mix, images)
+        stages = server_stages(url, args.timeout)
+    finally:
+        if proc is not None:
+            proc.terminate()
+            proc.wait(timeout=30)
+
+    report = {
+        "meta": {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "git": git_revision(),
+            "python": platform.python_version(),
+            "cpus": os.cpu_count(),
+            "startup_s": round(startup, 2) if startup is not None else None,
+            "elapsed_s": round(elapsed, 2),
+        },
+        "args": {k: v for k, v in vars(args).items() if k not in ("serve", "port", "seed_db", "json", "compare")},
+        "workloads": {name: summarize(rows, elapsed) for name, rows in samples.items()},
+        "total": summarize([row for rows in samples.values() for row in rows], elapsed),
+        "server_stages_ms": stages,
+    }
+    print_report(report, baseline)
+
+    if json_path:
+        with open(json_path, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\n[INFO] Report written to {json_path}")
+    if not args.keep and not args.url:
+        shutil.rmtree(workdir, ignore_errors=True)
+    elif args.keep:
+        print(f"[INFO] Work files kept in {workdir}")
+
+
+if __name__ == "__main__":
+    main()
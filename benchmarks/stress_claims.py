@@ -0,0 +1,116 @@
+# benchmarks/stress_claims.py
+# Concurrency stress test for FoodAlert collection claims.
+#
+# Many NGO threads race to claim the same alerts, singly and in batches, through
+# app.claim_alerts. Afterwards every alert must have exactly one winner, and the
+# recorded collected_by must be that winner. With --legacy the old
+# read-then-write collect_alert logic is raced instead, to show double wins.
+#
+#   python benchmarks/stress_claims.py --threads 32 --alerts 200
+import argparse
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Race many NGOs on the same alerts")
+    parser.add_argument("--threads", type=int, default=32)
+    parser.add_argument("--alerts", type=int, default=200)
+    parser.add_argument("--batch-size", type=int, default=5, help="alerts per claim call (1 = single clicks)")
+    parser.add_argument("--legacy", action="store_true", help="race the old get-then-set logic instead")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="stress_claims_")
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(workdir, 'stress.db')}"
+    os.chdir(workdir)
+
+    import app as webapp
+    from food_waste.services import claim_alerts
+    app, db, FoodAlert, User = webapp.app, webapp.db, webapp.FoodAlert, webapp.User
+
+    with app.app_context():
+        db.create_all()
+        db.session.execute(User.__table__.insert(), [{"username": "mess", "password": "x", "role": "mess"}] + [
+            {"username": f"ngo{i}", "password": "x", "role": "ngo"} for i in range(args.threads)
+        ])
+        db.session.execute(FoodAlert.__table__.insert(), [
+            {"description": f"meal {i}", "quantity": "10", "location": "Block A", "collected": False, "posted_by": 1}
+            for i in range(args.alerts)
+        ])
+        db.session.commit()
+        alert_ids = [a.id for a in FoodAlert.query.all()]
+
+    wins = Counter()          # alert_id -> times a thread was told it won
+    winner_of = {}            # alert_id -> ngo user id that was told it won
+    errors = []
+    lock = threading.Lock()
+    barrier = threading.Barrier(args.threads)
+
+    def legacy_claim(ids, ngo_id):
+        won = []
+        for alert_id in ids:
+            alert = db.session.get(FoodAlert, alert_id)
+            if alert and not alert.collected:
+                time.sleep(0)  # yield between the read and the write, as a real request would
+                alert.collected = True
+                alert.collected_by = ngo_id
+                db.session.commit()
+                won.append(alert_id)
+        return won
+
+    def ngo(thread_idx):
+        ngo_id = thread_idx + 2
+        order = alert_ids[:]
+        random.Random(thread_idx).shuffle(order)
+        barrier.wait()
+        with app.app_context():
+            for i in range(0, len(order), args.batch_size):
+                batch = order[i:i + args.batch_size]
+                try:
+                    won = legacy_claim(batch, ngo_id) if args.legacy else claim_alerts(batch, ngo_id)
+                except Exception as e:
+                    db.session.rollback()
+                    with lock:
+                        errors.append(repr(e))
+                    continue
+                with lock:
+                    for alert_id in won:
+                        wins[alert_id] += 1
+                        winner_of[alert_id] = ngo_id
+
+    t0 = time.perf_counter()
+    threads = [threading.Thread(target=ngo, args=(i,)) for i in range(args.threads)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - t0
+
+    with app.app_context():
+        rows = {a.id: a for a in FoodAlert.query.all()}
+    double_wins = [a for a, n in wins.items() if n > 1]
+    unclaimed = [a for a in alert_ids if wins[a] == 0]
+    wrong_owner = [a for a, ngo_id in winner_of.items() if wins[a] == 1 and rows[a].collected_by != ngo_id]
+
+    print(f"mode={'legacy' if args.legacy else 'atomic'} threads={args.threads} alerts={args.alerts} "
+          f"batch={args.batch_size}  {elapsed:.2f}s, {args.threads * args.alerts / elapsed:.0f} claim attempts/s")
+    print(f"  alerts won more than once : {len(double_wins)}")
+    print(f"  alerts never won          : {len(unclaimed)}")
+    print(f"  collected_by != winner    : {len(wrong_owner)}")
+    print(f"  errors                    : {len(errors)} {Counter(errors).most_common(1) if errors else ''}")
+
+    ok = not double_wins and not wrong_owner and not errors and not unclaimed
+    print("PASS" if ok else "FAIL")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
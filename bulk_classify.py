@@ -0,0 +1,246 @@
+# bulk_classify.py
+# Classify many images in one process: back-fills and re-classification after
+# a model update.
+#
+# Inputs are image files, directories (searched recursively), glob patterns,
+# or FoodAlert ids (--alert-ids 12 40-55, or "all"). Images are decoded in a
+# process pool; the decoded pixels are stacked into batches for one backend
+# call each (see inference.py). For stored uploads the pre-sized input
+# derivative is read instead of decoding the original when it exists.
+#
+# Results go to a CSV or JSONL file (--output), to FoodAlert.prediction
+# (--write-db), or both. The output file doubles as a journal: with --resume,
+# anything already in it is skipped and new rows are appended, so an
+# interrupted run picks up where it stopped.
+#
+#   python bulk_classify.py static/uploads --output predictions.csv
+#   python bulk_classify.py "dataset/val/*/*.jpg" --output val.jsonl --resume
+#   python bulk_classify.py --alert-ids all --write-db --output reclassify.jsonl --resume
+import argparse
+import csv
+import glob
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from derivatives import variant_path
+from food_waste.model_registry import CLASS_LABELS
+from inference import load_backend
+from preprocessing import BatchBuffer, decode
+
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".gif")
+
+
+# ---------- Inputs ----------
+def expand_paths(patterns):
+    """Files, directories (recursive) and glob patterns -> sorted unique image paths."""
+    paths = set()
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            for root, _, files in os.walk(pattern):
+                paths.update(os.path.join(root, f) for f in files
+                             if f.lower().endswith(IMAGE_EXTENSIONS) and f.count(".") == 1)
+        elif os.path.isfile(pattern):
+            paths.add(pattern)
+        else:
+            paths.update(p for p in glob.glob(pattern, recursive=True) if p.lower().endswith(IMAGE_EXTENSIONS))
+    return sorted(paths)
+
+
+def parse_alert_ids(values):
+    """["all"] -> None; otherwise ids and inclusive ranges like 40-55."""
+    if values == ["all"]:
+        return None
+    ids = set()
+    for value in values:
+        if "-" in value:
+            start, end = value.split("-", 1)
+            ids.update(range(int(start), int(end) + 1))
+        else:
+            ids.add(int(value))
+    return sorted(ids)
+
+
+def alert_items(alert_ids):
+    """(key, image path) for the requested alerts that have an image."""
+    from app import app, FoodAlert
+
+    with app.app_context():
+        query = FoodAlert.query.filter(FoodAlert.image_filename.isnot(None))
+        if alert_ids is not None:
+            query = query.filter(FoodAlert.id.in_(alert_ids))
+        rows = query.with_entities(FoodAlert.id, FoodAlert.image_filename).order_by(FoodAlert.id).all()
+    upload_store = app.extensions["food_waste"].upload_store
+    return [(str(alert_id), upload_store.path(name)) for alert_id, name in rows]
+
+
+# ---------- Decoding (runs in worker processes) ----------
+def decode_item(item):
+    key, path = item
+    try:
+        input_path = variant_path(path, "input")
+        pixels = np.load(input_path) if os.path.exists(input_path) else decode(path)
+        return key, path, pixels, None
+    except Exception as e:
+        return key, path, None, str(e)
+
+
+def decoded_batches(items, batch_size, workers):
+    """Yield lists of decoded items in input order; uint8 pixels keep IPC small."""
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        batch = []
+        for result in pool.map(decode_item, items, chunksize=max(1, batch_size // 4)):
+            batch.append(result)
+            if len(batch) == batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+
+# ---------- Output ----------
+class ResultWriter:
+    """Append-only CSV or JSONL writer that can report the keys already written."""
+
+    def __init__(self, path, class_labels, resume):
+        self.path = path
+        self.format = "jsonl" if path.endswith((".jsonl", ".json")) else "csv"
+        self.fields = ["key", "path", "label", "confidence", "error"] + [f"p_{c}" for c in class_labels]
+        self.done = self._read_done() if resume else set()
+        new_file = not (resume and os.path.exists(path))
+        self._file = open(path, "w" if new_file else "a", newline="")
+        self._csv = csv.DictWriter(self._file, fieldnames=self.fields) if self.format == "csv" else None
+        if self._csv and new_file:
+            self._csv.writeheader()
+
+    def _read_done(self):
+        if not os.path.exists(self.path):
+            return set()
+        with open(self.path, newline="") as f:
+            if self.format == "csv":
+                return {row["key"] for row in csv.DictReader(f) if not row["error"]}
+            return {row["key"] for row in map(json.loads, f) if not row.get("error")}
+
+    def write(self, row):
+        if self._csv:
+            self._csv.writerow(row)
+        else:
+            self._file.write(json.dumps(row) + "\n")
+
+    def flush(self):
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+
+def write_predictions_to_db(results):
+    """results: [(alert_id, label)]; one transaction per batch."""
+    from app import app, db, FoodAlert
+
+    with app.app_context():
+        for alert_id, label in results:
+            FoodAlert.query.filter_by(id=int(alert_id)).update({"prediction": label}, synchronize_session=False)
+        db.session.commit()
+
+
+class Progress:
+    def __init__(self, total, interval=2.0):
+        self.total = total
+        self.interval = interval
+        self.done = self.failed = 0
+        self.start = self._last = time.perf_counter()
+
+    def update(self, done, failed):
+        self.done += done
+        self.failed += failed
+        processed = self.done + self.failed
+        now = time.perf_counter()
+        if now - self._last >= self.interval or processed == self.total:
+            self._last = now
+            rate = processed / max(now - self.start, 1e-9)
+            eta = (self.total - processed) / rate if rate else 0
+            print(f"\r[{processed}/{self.total}] {rate:.1f} img/s, {self.failed} failed, "
+                  f"ETA {eta:.0f}s   ", end="", file=sys.stderr, flush=True)
+
+
+# ---------- Main ----------
+def main():
+    parser = argparse.ArgumentParser(description="Classify many images with one model load")
+    parser.add_argument("inputs", nargs="*", help="image files, directories or glob patterns")
+    parser.add_argument("--alert-ids", nargs="+", help="FoodAlert ids or ranges (40-55), or 'all'")
+    parser.add_argument("--output", help="results file, .csv or .jsonl")
+    parser.add_argument("--write-db", action="store_true", help="store labels in FoodAlert.prediction")
+    parser.add_argument("--resume", action="store_true", help="skip items already in --output and append")
+    parser.add_argument("--backend", default=os.environ.get("INFERENCE_BACKEND", "auto"))
+    parser.add_argument("--model-dir", default=os.environ.get("MODEL_DIR", "."))
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="decoding processes")
+    args = parser.parse_args()
+
+    if bool(args.inputs) == bool(args.alert_ids):
+        parser.error("give either image paths/globs or --alert-ids")
+    if args.write_db and not args.alert_ids:
+        parser.error("--write-db needs --alert-ids")
+    if not args.output and not args.write_db:
+        parser.error("nothing to do: give --output and/or --write-db")
+    if args.resume and not args.output:
+        parser.error("--resume reads the --output file")
+
+    if args.alert_ids:
+        items = alert_items(parse_alert_ids(args.alert_ids))
+    else:
+        items = [(path, path) for path in expand_paths(args.inputs)]
+
+    writer = ResultWriter(args.output, CLASS_LABELS, args.resume) if args.output else None
+    if writer and writer.done:
+        before = len(items)
+        items = [item for item in items if item[0] not in writer.done]
+        print(f"[INFO] Resuming: {before - len(items)} already classified, {len(items)} left")
+    if not items:
+        print("[INFO] Nothing to classify")
+        return
+
+    backend = load_backend(args.backend, args.model_dir)
+    print(f"[INFO] Classifying {len(items)} image(s) with the {backend.name} backend, "
+          f"batch size {args.batch_size}, {args.workers} decoder(s)")
+
+    progress = Progress(len(items))
+    buffer = BatchBuffer(args.batch_size)
+    for batch in decoded_batches(items, args.batch_size, args.workers):
+        ok = [entry for entry in batch if entry[3] is None]
+        rows = [{"key": key, "path": path, "label": "", "confidence": "", "error": error}
+                for key, path, _, error in batch if error is not None]
+        if ok:
+            buffer.clear()
+            for _, _, pixels, _ in ok:
+                buffer.add_pixels(pixels)
+            probs = backend.predict(buffer.model_input())
+            for (key, path, _, _), p in zip(ok, probs):
+                best = int(np.argmax(p))
+                row = {"key": key, "path": path, "label": CLASS_LABELS[best],
+                       "confidence": round(float(p[best]), 4), "error": ""}
+                row.update({f"p_{c}": round(float(v), 4) for c, v in zip(CLASS_LABELS, p)})
+                rows.append(row)
+
+        if args.write_db:
+            write_predictions_to_db([(row["key"], row["label"]) for row in rows if not row["error"]])
+        if writer:
+            for row in rows:
+                writer.write(row)
+            writer.flush()
+        progress.update(len(ok), len(batch) - len(ok))
+
+    elapsed = time.perf_counter() - progress.start
+    print(f"\n[INFO] Done: {progress.done} classified, {progress.failed} failed in {elapsed:.1f}s "
+          f"({progress.done / elapsed:.1f} img/s)")
+    if writer:
+        writer.close()
+
+
+if __name__ == "__main__":
+    main()
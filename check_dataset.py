@@ -1,18 +1,267 @@
+# check_dataset.py
+# Audit dataset/train and dataset/val before training.
+#
+#   * every image is decoded (truncated / corrupt files are reported)
+#   * dimensions and file sizes are recorded (tiny or huge images are flagged)
+#   * exact duplicates (SHA-256 of the bytes) and near-duplicates (64-bit
+#     difference hash) are found, with train/val leakage and copies filed
+#     under two different classes called out separately
+#
+# Class folders are scanned with os.scandir and images are checked in a thread
+# pool. Results are cached per file in dataset_audit.db, keyed on path, size
+# and mtime, so a re-audit only opens new or changed files.
+#
+#   python check_dataset.py
+#   python check_dataset.py --near-threshold 6 --json audit.json --strict
+import argparse
+import hashlib
+import io
+import json
 import os
+import sqlite3
+import sys
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
 
-def check_dataset(folder):
-    print(f"Checking folder: {folder}")
-    for category in os.listdir(folder):
-        category_path = os.path.join(folder, category)
-        if os.path.isdir(category_path):
-            num_images = len([
-                f for f in os.listdir(category_path)
-                if f.lower().endswith(('.jpg', '.jpeg', '.png'))
-            ])
-            print(f"  📂 {category}: {num_images} images")
-
-print("\n--- Checking Training Data ---")
-check_dataset("dataset/train")
-
-print("\n--- Checking Validation Data ---")
-check_dataset("dataset/val")
+from PIL import Image
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png')
+SPLITS = ("train", "val")
+MIN_SIDE = 32              # smaller images are flagged as tiny
+MAX_PIXELS = 4096 * 4096   # larger images are flagged as huge
+
+
+# ---------- Scanning ----------
+def scan_class(split, category, category_path):
+    files = []
+    with os.scandir(category_path) as entries:
+        for entry in entries:
+            if entry.is_file() and entry.name.lower().endswith(IMAGE_EXTENSIONS):
+                st = entry.stat()
+                files.append({"path": entry.path, "split": split, "category": category,
+                              "size": st.st_size, "mtime_ns": st.st_mtime_ns})
+    return files
+
+
+def scan_dataset(root, pool):
+    jobs = []
+    for split in SPLITS:
+        split_path = os.path.join(root, split)
+        if not os.path.isdir(split_path):
+            continue
+        with os.scandir(split_path) as categories:
+            for category in categories:
+                if category.is_dir():
+                    jobs.append(pool.submit(scan_class, split, category.name, category.path))
+    return [f for job in jobs for f in job.result()]
+
+
+# ---------- Per-file audit ----------
+def difference_hash(img):
+    """64-bit dHash: brightness gradient signs of a 9x8 grayscale thumbnail."""
+    pixels = img.convert("L").resize((9, 8), Image.BILINEAR).tobytes()
+    bits = 0
+    for row in range(8):
+        for col in range(8):
+            bits = (bits << 1) | (pixels[row * 9 + col] > pixels[row * 9 + col + 1])
+    return bits
+
+
+def audit_file(path):
+    with open(path, "rb") as f:
+        data = f.read()
+    result = {"sha256": hashlib.sha256(data).hexdigest(), "width": None, "height": None,
+              "format": None, "dhash": None, "error": None}
+    try:
+        with Image.open(io.BytesIO(data)) as img:
+            result["width"], result["height"] = img.size
+            result["format"] = img.format
+            # JPEG draft mode decodes at 1/2..1/8 scale: the whole stream is
+            # still read, so truncation is caught, at a fraction of the cost.
+            img.draft("RGB", (64, 64))
+            img.load()
+            result["dhash"] = f"{difference_hash(img):016x}"
+    except Exception as e:
+        result["error"] = f"{type(e).__name__}: {e}"
+    return result
+
+
+# ---------- Cache ----------
+class AuditCache:
+    COLUMNS = ("size", "mtime_ns", "sha256", "width", "height", "format", "dhash", "error")
+
+    def __init__(self, path):
+        self._conn = sqlite3.connect(path)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS files (path TEXT PRIMARY KEY, size INTEGER, mtime_ns INTEGER,"
+            " sha256 TEXT, width INTEGER, height INTEGER, format TEXT, dhash TEXT, error TEXT)"
+        )
+        self._rows = {row[0]: dict(zip(self.COLUMNS, row[1:]))
+                      for row in self._conn.execute(f"SELECT path, {', '.join(self.COLUMNS)} FROM files")}
+
+    def lookup(self, f):
+        row = self._rows.get(f["path"])
+        if row and row["size"] == f["size"] and row["mtime_ns"] == f["mtime_ns"]:
+            return row
+        return None
+
+    def store(self, records):
+        self._conn.executemany(
+            f"INSERT OR REPLACE INTO files (path, {', '.join(self.COLUMNS)}) VALUES (?{', ?' * len(self.COLUMNS)})",
+            [(r["path"], *(r[c] for c in self.COLUMNS)) for r in records],
+        )
+
+    def prune(self, live_paths):
+        stale = [(p,) for p in self._rows if p not in live_paths]
+        self._conn.executemany("DELETE FROM files WHERE path = ?", stale)
+        return len(stale)
+
+    def close(self):
+        self._conn.commit()
+        self._conn.close()
+
+
+# ---------- Duplicates ----------
+def exact_duplicates(records):
+    groups = defaultdict(list)
+    for r in records:
+        if r["sha256"]:
+            groups[r["sha256"]].append(r)
+    return [g for g in groups.values() if len(g) > 1]
+
+
+def near_duplicates(records, threshold):
+    """Pairs of images whose dHashes differ in at most `threshold` bits.
+
+    LSH banding: the 64 bits are cut into threshold + 1 bands. Two hashes
+    within the threshold agree exactly on at least one band (pigeonhole), so
+    only images sharing a band value are ever compared.
+    """
+    hashed = [r for r in records if r["dhash"]]
+    values = [int(r["dhash"], 16) for r in hashed]
+    bands = threshold + 1
+    bounds = [round(64 * i / bands) for i in range(bands + 1)]
+
+    candidates = set()
+    for lo, hi in zip(bounds, bounds[1:]):
+        mask = (1 << (hi - lo)) - 1
+        buckets = defaultdict(list)
+        for i, v in enumerate(values):
+            buckets[(v >> lo) & mask].append(i)
+        for members in buckets.values():
+            for a in range(len(members)):
+                for b in range(a + 1, len(members)):
+                    candidates.add((members[a], members[b]))
+
+    pairs = []
+    for a, b in candidates:
+        distance = (values[a] ^ values[b]).bit_count()
+        if distance <= threshold and hashed[a]["sha256"] != hashed[b]["sha256"]:
+            pairs.append((distance, hashed[a], hashed[b]))
+    return sorted(pairs, key=lambda p: (p[0], p[1]["path"]))
+
+
+def describe(r):
+    return f"{r['split']}/{r['category']}/{os.path.basename(r['path'])}"
+
+
+# ---------- Report ----------
+def print_report(records, corrupt, exact, near, root):
+    counts = Counter((r["split"], r["category"]) for r in records)
+    for split in SPLITS:
+        print(f"\n--- Checking {'Training' if split == 'train' else 'Validation'} Data ({root}/{split}) ---")
+        for (s, category), n in sorted(counts.items()):
+            if s == split:
+                print(f"  📂 {category}: {n} images")
+
+    sized = [r for r in records if r["width"]]
+    if sized:
+        widths = [r["width"] for r in sized]
+        heights = [r["height"] for r in sized]
+        print(f"\nDimensions: width {min(widths)}-{max(widths)}, height {min(heights)}-{max(heights)}; "
+              f"formats {dict(Counter(r['format'] for r in sized))}")
+    tiny = [r for r in sized if min(r["width"], r["height"]) < MIN_SIDE]
+    huge = [r for r in sized if r["width"] * r["height"] > MAX_PIXELS]
+    for label, rows in ((f"Tiny (< {MIN_SIDE}px)", tiny), ("Huge (> 16 MP)", huge)):
+        if rows:
+            print(f"⚠️ {label}: {len(rows)}")
+            for r in rows[:10]:
+                print(f"    {describe(r)} {r['width']}x{r['height']}")
+
+    print(f"\n❌ Corrupt / undecodable: {len(corrupt)}")
+    for r in corrupt:
+        print(f"    {describe(r)}: {r['error']}")
+
+    leaks = [g for g in exact if len({r["split"] for r in g}) > 1]
+    conflicts = [g for g in exact if len({r["category"] for r in g}) > 1]
+    print(f"\nExact duplicates: {len(exact)} group(s), {len(leaks)} across train/val, "
+          f"{len(conflicts)} with conflicting labels")
+    for g in sorted(exact, key=lambda g: -len(g))[:20]:
+        tags = [t for t, bad in (("LEAK", g in leaks), ("LABEL CONFLICT", g in conflicts)) if bad]
+        print(f"    {' '.join(tags) or 'dup'}: " + ", ".join(describe(r) for r in g))
+
+    near_leaks = [p for p in near if p[1]["split"] != p[2]["split"]]
+    print(f"\nNear duplicates: {len(near)} pair(s), {len(near_leaks)} across train/val")
+    for distance, a, b in (near_leaks + [p for p in near if p[1]["split"] == p[2]["split"]])[:20]:
+        tag = "LEAK" if a["split"] != b["split"] else "near"
+        print(f"    {tag} (distance {distance}): {describe(a)} ~ {describe(b)}")
+    return leaks, near_leaks
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Audit the image dataset")
+    parser.add_argument("--dataset", default="dataset")
+    parser.add_argument("--cache", default="dataset_audit.db", help="per-file audit cache (empty to disable)")
+    parser.add_argument("--workers", type=int, default=min(32, (os.cpu_count() or 1) * 4))
+    parser.add_argument("--near-threshold", type=int, default=4, help="max differing dHash bits")
+    parser.add_argument("--json", help="write the full audit to this file")
+    parser.add_argument("--strict", action="store_true", help="exit 1 on corrupt files or train/val leakage")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    cache = AuditCache(args.cache if args.cache else ":memory:")
+    with ThreadPoolExecutor(max_workers=args.workers) as pool:
+        files = scan_dataset(args.dataset, pool)
+        scanned = time.perf_counter()
+
+        todo = []
+        records = []
+        for f in files:
+            cached = cache.lookup(f)
+            if cached:
+                records.append({**cached, **f})
+            else:
+                todo.append(f)
+        fresh = [{**f, **result} for f, result in zip(todo, pool.map(audit_file, (f["path"] for f in todo)))]
+    records.extend(fresh)
+    cache.store(fresh)
+    pruned = cache.prune({f["path"] for f in files})
+    cache.close()
+    audited = time.perf_counter()
+
+    corrupt = [r for r in records if r["error"]]
+    exact = exact_duplicates(records)
+    near = near_duplicates(records, args.near_threshold)
+    leaks, near_leaks = print_report(records, corrupt, exact, near, args.dataset)
+
+    print(f"\n[INFO] {len(records)} files: scanned in {scanned - start:.2f}s, {len(fresh)} (re)audited, "
+          f"{len(records) - len(fresh)} from cache, {pruned} stale cache entries; "
+          f"total {time.perf_counter() - start:.2f}s (audit {audited - scanned:.2f}s)")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({
+                "files": records,
+                "corrupt": [r["path"] for r in corrupt],
+                "exact_duplicates": [[r["path"] for r in g] for g in exact],
+                "near_duplicates": [{"distance": d, "a": a["path"], "b": b["path"]} for d, a, b in near],
+            }, f, indent=2)
+        print(f"[INFO] Audit written to {args.json}")
+
+    if args.strict and (corrupt or leaks or near_leaks):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
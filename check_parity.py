@@ -0,0 +1,79 @@
+# check_parity.py
+# Check that the exported backends predict the same as the original .h5 model.
+#
+# Uses a fixed image set: the first --per-class images of every class folder in
+# dataset/val (sorted by name), or a seeded random batch if there is no dataset.
+#
+#   python check_parity.py
+#   python check_parity.py --backends numpy tflite-int8 --per-class 25
+import argparse
+import os
+import sys
+
+import numpy as np
+
+from inference import MODEL_FILES, load_backend
+from preprocessing import decode, model_input
+
+# Allowed deviation from the Keras probabilities, per backend
+TOLERANCES = {
+    "numpy": {"max_abs_diff": 1e-4, "min_agreement": 1.0},
+    "tflite-fp16": {"max_abs_diff": 1e-2, "min_agreement": 0.99},
+    "tflite-int8": {"max_abs_diff": 0.1, "min_agreement": 0.95},
+}
+
+
+def fixed_image_set(folder, per_class):
+    paths = []
+    if os.path.isdir(folder):
+        for category in sorted(os.listdir(folder)):
+            category_path = os.path.join(folder, category)
+            if os.path.isdir(category_path):
+                files = sorted(f for f in os.listdir(category_path)
+                               if f.lower().endswith(('.jpg', '.jpeg', '.png')))
+                paths.extend(os.path.join(category_path, f) for f in files[:per_class])
+    if paths:
+        print(f"Checking {len(paths)} images from {folder}")
+        return model_input(np.stack([decode(p) for p in paths]))
+
+    print(f"No images in {folder}, checking 64 seeded random images")
+    return np.random.default_rng(0).random((64, 128, 128, 3), dtype=np.float32) * 255
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare exported backends against the .h5 model")
+    parser.add_argument("--model-dir", default=".")
+    parser.add_argument("--images", default="dataset/val")
+    parser.add_argument("--per-class", type=int, default=10)
+    parser.add_argument("--backends", nargs="+", default=list(TOLERANCES), choices=list(TOLERANCES))
+    args = parser.parse_args()
+
+    images = fixed_image_set(args.images, args.per_class)
+    reference = load_backend("keras", args.model_dir).predict(images)
+    ref_classes = reference.argmax(axis=1)
+
+    failed = False
+    for name in args.backends:
+        if not os.path.exists(os.path.join(args.model_dir, MODEL_FILES[name])):
+            print(f"  {name:<12} skipped (not exported)")
+            continue
+        try:
+            backend = load_backend(name, args.model_dir)
+        except FileNotFoundError as e:  # load_backend reports a missing runtime this way too
+            print(f"  {name:<12} skipped ({e})")
+            continue
+
+        probs = np.concatenate([backend.predict(images[i:i + 16]) for i in range(0, len(images), 16)])
+        max_diff = float(np.abs(probs - reference).max())
+        agreement = float((probs.argmax(axis=1) == ref_classes).mean())
+        limits = TOLERANCES[name]
+        ok = max_diff <= limits["max_abs_diff"] and agreement >= limits["min_agreement"]
+        failed |= not ok
+        print(f"  {name:<12} top-1 agreement {agreement * 100:6.2f}%   "
+              f"max |Δp| {max_diff:.2e}   {'OK' if ok else 'FAIL'}")
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+# check_preprocessing.py
+# Check that the serving preprocessing (preprocessing.py) feeds the model what
+# training fed it.
+#
+# The training reference is what image_dataset_from_directory produces (and
+# preprocess_dataset.py stores): tf.io.decode_image, tf.image.resize bilinear,
+# float32 0..255. For every image the check compares the serving pixels with
+# it, then runs the model on both and compares the predictions. The previous
+# serving path (nearest-neighbour resize, then / 255 in front of the model's
+# own Rescaling layer) is reported alongside.
+#
+# Uses the first --per-class images of every class folder in dataset/val, or
+# seeded synthetic JPEGs at several resolutions if there is no dataset.
+#
+#   python check_preprocessing.py
+#   python check_preprocessing.py --backend numpy --model-dir exports --per-class 50
+import argparse
+import io
+import os
+import random
+import sys
+
+import numpy as np
+import tensorflow as tf
+from PIL import Image, ImageDraw
+
+from inference import load_backend
+from preprocessing import IMG_SIZE, decode
+
+SYNTHETIC_SIZES = [(640, 480), (1280, 960), (1920, 1080), (4032, 3024)]
+
+
+def image_set(folder, per_class):
+    """[(name, file bytes)] from the dataset, or seeded synthetic JPEGs."""
+    images = []
+    if os.path.isdir(folder):
+        for category in sorted(os.listdir(folder)):
+            category_path = os.path.join(folder, category)
+            if os.path.isdir(category_path):
+                files = sorted(f for f in os.listdir(category_path)
+                               if f.lower().endswith(('.jpg', '.jpeg', '.png')))
+                for f in files[:per_class]:
+                    with open(os.path.join(category_path, f), "rb") as fh:
+                        images.append((f"{category}/{f}", fh.read()))
+    if images:
+        print(f"Checking {len(images)} images from {folder}")
+        return images
+
+    rng = random.Random(0)
+    for size in SYNTHETIC_SIZES:
+        for i in range(8):
+            img = Image.new("RGB", size, tuple(rng.randrange(256) for _ in range(3)))
+            draw = ImageDraw.Draw(img)
+            for _ in range(rng.randint(3, 12)):
+                x0, y0 = rng.randrange(size[0]), rng.randrange(size[1])
+                box = (x0, y0, x0 + rng.randint(size[0] // 20, size[0] // 3),
+                       y0 + rng.randint(size[1] // 20, size[1] // 3))
+                (draw.ellipse if rng.random() < 0.5 else draw.rectangle)(
+                    box, fill=tuple(rng.randrange(256) for _ in range(3)))
+            buf = io.BytesIO()
+            img.save(buf, "JPEG", quality=85)
+            images.append((f"synthetic_{size[0]}x{size[1]}_{i}.jpg", buf.getvalue()))
+    print(f"No images in {folder}, checking {len(images)} seeded synthetic JPEGs")
+    return images
+
+
+def training_pixels(data):
+    img = tf.io.decode_image(data, channels=3, expand_animations=False)
+    return tf.image.resize(img, IMG_SIZE, method="bilinear").numpy()
+
+
+def legacy_input(data):
+    """The old serving input: nearest-neighbour resize, scaled to [0, 1]."""
+    with Image.open(io.BytesIO(data)) as img:
+        img = img.convert("RGB").resize((IMG_SIZE[1], IMG_SIZE[0]), Image.NEAREST)
+        return np.asarray(img, dtype=np.float32) / 255.0
+
+
+def predict(backend, batch):
+    return np.concatenate([backend.predict(batch[i:i + 32]) for i in range(0, len(batch), 32)])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare serving and training preprocessing")
+    parser.add_argument("--images", default="dataset/val")
+    parser.add_argument("--per-class", type=int, default=25)
+    parser.add_argument("--backend", default=os.environ.get("INFERENCE_BACKEND", "auto"))
+    parser.add_argument("--model-dir", default=os.environ.get("MODEL_DIR", "."))
+    parser.add_argument("--max-mean-diff", type=float, default=2.0,
+                        help="allowed mean |pixel difference| (0..255) against training")
+    parser.add_argument("--min-agreement", type=float, default=0.98,
+                        help="allowed top-1 agreement with predictions on the training pixels")
+    args = parser.parse_args()
+
+    images = image_set(args.images, args.per_class)
+    reference = np.stack([training_pixels(data) for _, data in images])
+    variants = {
+        "serving": np.stack([decode(io.BytesIO(data)) for _, data in images]).astype(np.float32),
+        "full decode": np.stack([decode(io.BytesIO(data), draft=False) for _, data in images]).astype(np.float32),
+    }
+
+    failed = False
+    print("Pixels against training (0..255):")
+    for name, pixels in variants.items():
+        diff = np.abs(pixels - reference)
+        verdict = ""
+        if name == "serving":  # the other rows are for comparison only
+            ok = diff.mean() <= args.max_mean_diff
+            failed |= not ok
+            verdict = "OK" if ok else "FAIL"
+        print(f"  {name:<12} mean |Δ| {diff.mean():6.3f}   p99 |Δ| {np.percentile(diff, 99):6.2f}   "
+              f"max |Δ| {diff.max():6.1f}   {verdict}")
+
+    try:
+        backend = load_backend(args.backend, args.model_dir)
+    except FileNotFoundError as e:
+        print(f"Predictions skipped: {e}")
+        sys.exit(1 if failed else 0)
+
+    expected = predict(backend, reference)
+    variants["legacy (/255)"] = np.stack([legacy_input(data) for _, data in images])
+    print(f"Predictions against training ({backend.name} backend):")
+    for name, pixels in variants.items():
+        probs = predict(backend, pixels)
+        agreement = float((probs.argmax(axis=1) == expected.argmax(axis=1)).mean())
+        verdict = ""
+        if name == "serving":
+            ok = agreement >= args.min_agreement
+            failed |= not ok
+            verdict = "OK" if ok else "FAIL"
+        print(f"  {name:<13} top-1 agreement {agreement * 100:6.2f}%   "
+              f"max |Δp| {np.abs(probs - expected).max():.3f}   {verdict}")
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+# check_profiler.py
+# Check that the X-Profile sampling profiler (metrics.SamplingProfiler) sees
+# the profiled request's stack, with plain threads and under gevent.
+#
+# Each server model runs in its own interpreter, since gevent's monkey-patching
+# cannot be undone. In each one a "request" is profiled twice:
+#
+#   busy    the request itself burns CPU: its stack must show busy_loop
+#   parked  the request sleeps while something else burns CPU: its stack must
+#           show parked_wait, never the other worker's busy_loop
+#
+#   pip install gevent
+#   python check_profiler.py
+import argparse
+import importlib.util
+import os
+import subprocess
+import sys
+
+MODELS = ("threads", "gevent")
+
+
+def busy_loop(seconds, clock):
+    end = clock() + seconds
+    while clock() < end:
+        pass
+
+
+def parked_wait(seconds, sleep):
+    sleep(seconds)
+
+
+def run_checks(model):
+    """Both scenarios in this interpreter; returns {scenario: (samples, ok)}."""
+    if model == "gevent":
+        from gevent import monkey
+        monkey.patch_all()
+    import threading
+    import time
+
+    from metrics import SamplingProfiler
+
+    def profiled(body):
+        profiler = SamplingProfiler(0.002).start()
+        body()
+        return profiler.stop()
+
+    def in_worker(target):
+        worker = threading.Thread(target=target)  # a greenlet once patched
+        worker.start()
+        return worker
+
+    results = {}
+    profiler = None
+
+    def busy_request():
+        nonlocal profiler
+        profiler = profiled(lambda: busy_loop(0.3, time.perf_counter))
+    in_worker(busy_request).join()
+    stacks = profiler.folded()
+    results["busy"] = (profiler.samples, profiler.samples > 0 and "busy_loop" in stacks)
+
+    def parked_request():
+        nonlocal profiler
+        profiler = profiled(lambda: parked_wait(0.3, time.sleep))
+    request = in_worker(parked_request)
+    time.sleep(0.02)  # the request is parked in parked_wait by now
+    other = in_worker(lambda: busy_loop(0.2, time.perf_counter))
+    request.join()
+    other.join()
+    stacks = profiler.folded()
+    results["parked"] = (profiler.samples,
+                         profiler.samples > 0 and "parked_wait" in stacks and "busy_loop" not in stacks)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sampling profiler under threads and gevent")
+    parser.add_argument("--model", choices=MODELS, help=argparse.SUPPRESS)  # one interpreter per model
+    args = parser.parse_args()
+
+    if args.model:
+        for scenario, (samples, ok) in run_checks(args.model).items():
+            print(f"{scenario} {samples} {int(ok)}")
+        return
+
+    if importlib.util.find_spec("gevent") is None:
+        sys.exit("check_profiler.py needs gevent: pip install gevent")
+
+    failed = False
+    for model in MODELS:
+        result = subprocess.run([sys.executable, os.path.abspath(__file__), "--model", model],
+                                capture_output=True, text=True)
+        if result.returncode != 0:
+            print(f"  {model:<8} FAIL\n{result.stderr}")
+            failed = True
+            continue
+        for line in result.stdout.split("\n"):
+            if line:
+                scenario, samples, ok = line.split()
+                failed |= ok != "1"
+                print(f"  {model:<8} {scenario:<7} {int(samples):>4} samples   {'OK' if ok == '1' else 'FAIL'}")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+# database.py
+# Database engine configuration for the app factory (food_waste/__init__.py).
+#
+# DATABASE_URL selects the database (default: SQLite food_waste.db). For
+# SQLite every new connection is switched to WAL with tuned pragmas so one
+# uploader committing a FoodAlert no longer blocks dashboard readers; for
+# anything else (e.g. postgresql://...) only the connection pool is tuned.
+# Switching databases needs no code change, just a different URL.
+#
+#   SQLITE_JOURNAL_MODE     WAL        readers never wait for the writer
+#   SQLITE_SYNCHRONOUS      NORMAL     safe with WAL, no fsync per commit
+#   SQLITE_BUSY_TIMEOUT_MS  5000       wait for the write lock instead of failing
+#   SQLITE_CACHE_SIZE_KB    65536      page cache per connection
+#   SQLITE_MMAP_SIZE        268435456  memory-mapped reads (bytes)
+#   DB_POOL_SIZE            10         pooled connections per worker process
+#   DB_MAX_OVERFLOW         20         extra connections under bursts
+#   DB_POOL_RECYCLE         1800       seconds before a connection is replaced
+import logging
+import os
+
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+
+DEFAULT_DATABASE_URL = "sqlite:///food_waste.db"
+
+
+def database_settings(environ=os.environ):
+    return {
+        "url": environ.get("DATABASE_URL", DEFAULT_DATABASE_URL),
+        "journal_mode": environ.get("SQLITE_JOURNAL_MODE", "WAL"),
+        "synchronous": environ.get("SQLITE_SYNCHRONOUS", "NORMAL"),
+        "busy_timeout_ms": int(environ.get("SQLITE_BUSY_TIMEOUT_MS", 5000)),
+        "cache_size_kb": int(environ.get("SQLITE_CACHE_SIZE_KB", 64 * 1024)),
+        "mmap_size": int(environ.get("SQLITE_MMAP_SIZE", 256 * 1024 * 1024)),
+        "pool_size": int(environ.get("DB_POOL_SIZE", 10)),
+        "max_overflow": int(environ.get("DB_MAX_OVERFLOW", 20)),
+        "pool_recycle": int(environ.get("DB_POOL_RECYCLE", 1800)),
+    }
+
+
+def engine_options(settings):
+    """create_engine() keyword arguments for the configured database."""
+    url = make_url(settings["url"])
+    if url.get_backend_name() == "sqlite":
+        options = {
+            # Pooled connections move between request threads
+            "connect_args": {"check_same_thread": False, "timeout": settings["busy_timeout_ms"] / 1000},
+        }
+        if url.database and url.database != ":memory:":
+            options.update(pool_size=settings["pool_size"], max_overflow=settings["max_overflow"])
+        return options
+
+    return {
+        "pool_size": settings["pool_size"],
+        "max_overflow": settings["max_overflow"],
+        "pool_recycle": settings["pool_recycle"],
+        "pool_pre_ping": True,
+    }
+
+
+def sqlite_pragmas(settings):
+    return {
+        "journal_mode": settings["journal_mode"],
+        "synchronous": settings["synchronous"],
+        "busy_timeout": settings["busy_timeout_ms"],
+        "cache_size": -settings["cache_size_kb"],  # negative = KiB, not pages
+        "mmap_size": settings["mmap_size"],
+        "temp_store": "MEMORY",
+    }
+
+
+def install_sqlite_pragmas(engine, pragmas):
+    """Run the PRAGMAs on every new DBAPI connection of a SQLite engine."""
+    if engine.dialect.name != "sqlite":
+        return
+
+    @event.listens_for(engine, "connect")
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+        cursor.close()
+
+
+def configure_database(app, environ=os.environ):
+    """Put the database URL and engine options into the Flask config.
+
+    Call before SQLAlchemy(app); then call init_engine(app, db).
+    """
+    settings = database_settings(environ)
+    app.config["SQLALCHEMY_DATABASE_URI"] = settings["url"]
+    app.config["SQLALCHEMY_ENGINE_OPTIONS"] = engine_options(settings)
+    app.config["DATABASE_SETTINGS"] = settings
+
+
+def init_engine(app, db):
+    settings = app.config["DATABASE_SETTINGS"]
+    with app.app_context():
+        install_sqlite_pragmas(db.engine, sqlite_pragmas(settings))
+        logging.info(f"Database: {db.engine.url.render_as_string(hide_password=True)}")
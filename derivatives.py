@@ -0,0 +1,163 @@
+# derivatives.py
+# Pre-sized variants of every upload, generated once in a worker pool.
+#
+# For an upload ab/cd/<digest>.jpg the pipeline writes, next to the original:
+#
+#     <digest>.input.v2.npy  128x128x3 uint8 model input (preprocessing.decode)
+#     <digest>.thumb.jpg     small dashboard thumbnail
+#     <digest>.preview.webp  compressed preview for the classifier page
+#
+# The model input comes from its own draft-mode decode (see preprocessing.py),
+# so it is exactly what classifying the original directly gives; the full-size
+# image is decoded once for the other two. Dashboards and re-classification
+# then only ever touch the small files.
+import logging
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import numpy as np
+from PIL import Image
+
+from preprocessing import VERSION as PREPROCESSING_VERSION
+from preprocessing import decode
+
+THUMB_SIZE = (160, 160)
+PREVIEW_SIZE = (800, 800)
+
+# variant -> file suffix appended to the original's stem
+VARIANTS = {
+    "input": f"input.v{PREPROCESSING_VERSION}.npy",  # older versions are never read again
+    "thumb": "thumb.jpg",
+    "preview": "preview.webp",
+}
+
+
+def variant_path(original_path, variant):
+    stem = original_path.rsplit(".", 1)[0]
+    return f"{stem}.{VARIANTS[variant]}"
+
+
+def remove_orphaned_variants(directory, cutoff):
+    """Delete the variants in `directory` whose original is gone, if older than
+    `cutoff` (a timestamp). Returns the number of bytes freed."""
+    suffixes = tuple(f".{suffix}" for suffix in VARIANTS.values())
+    with os.scandir(directory) as entries:
+        files = [e for e in entries if e.is_file()]
+    originals = {e.name.rsplit(".", 1)[0] for e in files if not e.name.endswith(suffixes)}
+    freed = 0
+    for entry in files:
+        suffix = next((s for s in suffixes if entry.name.endswith(s)), None)
+        if suffix is None or entry.name[:-len(suffix)] in originals:
+            continue
+        try:
+            st = entry.stat()
+            if st.st_mtime < cutoff:
+                os.remove(entry.path)
+                freed += st.st_size
+        except FileNotFoundError:
+            continue
+    return freed
+
+
+def _write_atomic(path, write):
+    tmp_path = f"{path}.{threading.get_ident()}.tmp"
+    try:
+        write(tmp_path)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def build_derivatives(original_path):
+    """Write every missing variant of an original."""
+    missing = [v for v in VARIANTS if not os.path.exists(variant_path(original_path, v))]
+    if "input" in missing:
+        pixels = decode(original_path)
+
+        def save_npy(path):
+            with open(path, "wb") as f:
+                np.save(f, pixels)
+        _write_atomic(variant_path(original_path, "input"), save_npy)
+        missing.remove("input")
+    if not missing:
+        return
+
+    with Image.open(original_path) as img:
+        img = img.convert("RGB") if img.mode != "RGB" else img
+        img.load()
+
+    if "thumb" in missing:
+        thumb = img.copy()
+        thumb.thumbnail(THUMB_SIZE, Image.BILINEAR)
+        _write_atomic(variant_path(original_path, "thumb"),
+                      lambda p: thumb.save(p, "JPEG", quality=80, optimize=True))
+    if "preview" in missing:
+        preview = img.copy()
+        preview.thumbnail(PREVIEW_SIZE, Image.BILINEAR)
+        _write_atomic(variant_path(original_path, "preview"),
+                      lambda p: preview.save(p, "WEBP", quality=75, method=4))
+
+
+class DerivativePipeline:
+    def __init__(self, store, workers=2):
+        self.store = store
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="derivatives")
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._shut_down = False
+
+    def submit(self, name):
+        """Schedule variant generation for an upload; returns its Future.
+
+        After shutdown() there is no pool: the variants are built right here,
+        in the caller's thread, and the returned Future is already done.
+        """
+        with self._lock:
+            future = self._pending.get(name)
+            if future is None and not self._shut_down:
+                future = self._executor.submit(self._build, name)
+                self._pending[name] = future
+        if future is None:
+            future = Future()
+            try:
+                future.set_result(self._build(name))
+            except Exception as e:
+                future.set_exception(e)
+        return future
+
+    def _build(self, name):
+        try:
+            build_derivatives(self.store.path(name))
+        except Exception as e:
+            logging.error(f"Derivatives for {name} failed: {e}", exc_info=True)
+            raise
+        finally:
+            with self._lock:
+                self._pending.pop(name, None)
+
+    def path(self, name, variant, wait=True, timeout=30):
+        """Path of a variant, generating it first if needed (and wait is set)."""
+        path = variant_path(self.store.path(name), variant)
+        if not os.path.exists(path) and wait:
+            self.submit(name).result(timeout=timeout)
+        return path
+
+    def input_pixels(self, name):
+        """uint8 (128, 128, 3) model input.
+
+        Read from the input variant when it exists. Otherwise the original is
+        decoded right here rather than waiting behind the thumbnail and preview
+        encodes; the pipeline writes the same pixels to the variant later.
+        """
+        path = self.path(name, "input", wait=False)
+        if os.path.exists(path):
+            return np.load(path)
+        return decode(self.store.path(name))
+
+    def shutdown(self):
+        """Stop the pool. Queued builds still finish; later ones run in the caller's thread."""
+        with self._lock:
+            self._shut_down = True
+        self._executor.shutdown(wait=False)
@@ -1,19 +1,207 @@
-from tensorflow.keras.models import load_model
-from tensorflow.keras.preprocessing.image import ImageDataGenerator
-
-# Load the trained model
-model = load_model('food_waste_model.h5')
-
-# Prepare validation data
-val_datagen = ImageDataGenerator(rescale=1./255)
-val_generator = val_datagen.flow_from_directory(
-    'dataset/val',
-    target_size=(128, 128),
-    batch_size=32,
-    class_mode='categorical'
-)
-
-# Evaluate the model
-loss, accuracy = model.evaluate(val_generator)
-print(f"Validation Accuracy: {accuracy*100:.2f}%")
-print(f"Validation Loss: {loss:.4f}")
+# evaluate_model.py
+# Batch evaluation report for the food classifier.
+#
+# Streams dataset/val once through tf.data (sparse integer labels, same
+# decoding and resizing as train_model.py) and feeds every batch to each
+# requested inference backend. Probabilities go into one preallocated
+# (images, classes) array per backend; all metrics are then computed from
+# those arrays with NumPy:
+#
+#   accuracy, log loss, confusion matrix, per-class precision/recall/F1,
+#   calibration (expected calibration error, Brier score, reliability bins),
+#   throughput (images/sec) and per-batch latency percentiles
+#
+#   python evaluate_model.py
+#   python evaluate_model.py --backends keras numpy tflite-int8 --json evaluation_report.json
+import argparse
+import json
+import os
+import time
+
+import numpy as np
+import tensorflow as tf
+
+from inference import MODEL_FILES, load_backend
+from preprocessing import IMG_SIZE
+
+
+# ---------- Data ----------
+def validation_dataset(val_dir, batch_size):
+    ds = tf.keras.utils.image_dataset_from_directory(
+        val_dir,
+        image_size=IMG_SIZE,
+        batch_size=batch_size,
+        label_mode="int",
+        shuffle=False
+    )
+    return ds, ds.class_names, len(ds.file_paths)
+
+
+# ---------- Metrics ----------
+def confusion_matrix(labels, predicted, num_classes):
+    return np.bincount(labels * num_classes + predicted,
+                       minlength=num_classes * num_classes).reshape(num_classes, num_classes)
+
+
+def per_class_scores(confusion):
+    true_positives = np.diag(confusion).astype(np.float64)
+    predicted = confusion.sum(axis=0)
+    support = confusion.sum(axis=1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        precision = np.where(predicted > 0, true_positives / predicted, 0.0)
+        recall = np.where(support > 0, true_positives / support, 0.0)
+        f1 = np.where(precision + recall > 0, 2 * precision * recall / (precision + recall), 0.0)
+    return precision, recall, f1, support
+
+
+def calibration(labels, probs, bins):
+    """Expected calibration error over equal-width confidence bins, plus the bins."""
+    confidence = probs.max(axis=1)
+    correct = probs.argmax(axis=1) == labels
+    bin_ids = np.minimum((confidence * bins).astype(np.int64), bins - 1)
+    counts = np.bincount(bin_ids, minlength=bins)
+    conf_sums = np.bincount(bin_ids, weights=confidence, minlength=bins)
+    correct_sums = np.bincount(bin_ids, weights=correct, minlength=bins)
+
+    nonempty = counts > 0
+    mean_conf = np.divide(conf_sums, counts, out=np.zeros(bins), where=nonempty)
+    accuracy = np.divide(correct_sums, counts, out=np.zeros(bins), where=nonempty)
+    ece = float(np.sum(counts * np.abs(accuracy - mean_conf)) / max(len(labels), 1))
+
+    one_hot = np.eye(probs.shape[1])[labels]
+    brier = float(np.mean(np.sum((probs - one_hot) ** 2, axis=1)))
+    reliability = [
+        {"bin": i, "lower": i / bins, "upper": (i + 1) / bins, "count": int(counts[i]),
+         "confidence": round(float(mean_conf[i]), 4), "accuracy": round(float(accuracy[i]), 4)}
+        for i in range(bins) if counts[i]
+    ]
+    return ece, brier, reliability
+
+
+def evaluation_report(labels, probs, class_names, bins=15):
+    num_classes = len(class_names)
+    predicted = probs.argmax(axis=1)
+    confusion = confusion_matrix(labels, predicted, num_classes)
+    precision, recall, f1, support = per_class_scores(confusion)
+    ece, brier, reliability = calibration(labels, probs, bins)
+    true_probs = probs[np.arange(len(labels)), labels]
+
+    weights = support / max(support.sum(), 1)
+    return {
+        "images": int(len(labels)),
+        "accuracy": float((predicted == labels).mean()),
+        "log_loss": float(-np.mean(np.log(np.clip(true_probs, 1e-7, 1.0)))),
+        "macro_f1": float(f1.mean()),
+        "weighted_f1": float((f1 * weights).sum()),
+        "ece": ece,
+        "brier": brier,
+        "per_class": {
+            name: {"precision": float(precision[i]), "recall": float(recall[i]),
+                   "f1": float(f1[i]), "support": int(support[i])}
+            for i, name in enumerate(class_names)
+        },
+        "confusion_matrix": confusion.tolist(),
+        "reliability": reliability,
+    }
+
+
+# ---------- Evaluation ----------
+def run_backends(ds, num_images, num_classes, backends, warmup):
+    """One pass over ds; every batch goes through every backend."""
+    labels = np.empty(num_images, dtype=np.int64)
+    probs = {name: np.empty((num_images, num_classes), dtype=np.float32) for name in backends}
+    latencies = {name: [] for name in backends}
+
+    offset = 0
+    for batch_index, (images, batch_labels) in enumerate(ds.as_numpy_iterator()):
+        n = len(batch_labels)
+        labels[offset:offset + n] = batch_labels
+        for name, backend in backends.items():
+            if batch_index == 0:
+                for _ in range(warmup):
+                    backend.predict(images)
+            t0 = time.perf_counter()
+            probs[name][offset:offset + n] = backend.predict(images)
+            latencies[name].append(time.perf_counter() - t0)
+        offset += n
+    return labels[:offset], {name: p[:offset] for name, p in probs.items()}, latencies
+
+
+def timing_report(latencies, num_images):
+    ms = np.asarray(latencies) * 1000
+    total = float(ms.sum()) / 1000
+    return {
+        "images_per_s": round(num_images / total, 1) if total else None,
+        "batches": len(ms),
+        "batch_latency_ms": {
+            "mean": round(float(ms.mean()), 2),
+            "p50": round(float(np.percentile(ms, 50)), 2),
+            "p95": round(float(np.percentile(ms, 95)), 2),
+            "max": round(float(ms.max()), 2),
+        },
+    }
+
+
+def print_report(name, report, class_names):
+    timing = report["timing"]
+    print(f"\n=== {name} ===")
+    print(f"Validation Accuracy: {report['accuracy'] * 100:.2f}%")
+    print(f"Validation Loss: {report['log_loss']:.4f}")
+    print(f"Macro F1: {report['macro_f1']:.4f}   ECE: {report['ece']:.4f}   Brier: {report['brier']:.4f}")
+    print(f"Throughput: {timing['images_per_s']} images/s   batch latency "
+          f"p50 {timing['batch_latency_ms']['p50']} ms, p95 {timing['batch_latency_ms']['p95']} ms")
+
+    print(f"\n{'class':<14}{'precision':>10}{'recall':>10}{'f1':>10}{'support':>9}")
+    for cls, scores in report["per_class"].items():
+        print(f"{cls:<14}{scores['precision']:>10.3f}{scores['recall']:>10.3f}"
+              f"{scores['f1']:>10.3f}{scores['support']:>9}")
+
+    width = max(len(c) for c in class_names) + 2
+    print("\nConfusion matrix (rows = true, columns = predicted)")
+    print(" " * width + "".join(f"{c:>{width}}" for c in class_names))
+    for cls, row in zip(class_names, report["confusion_matrix"]):
+        print(f"{cls:<{width}}" + "".join(f"{v:>{width}}" for v in row))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Evaluate the food classifier on dataset/val")
+    parser.add_argument("--data", default="dataset/val")
+    parser.add_argument("--model-dir", default=".")
+    parser.add_argument("--backends", nargs="+", choices=list(MODEL_FILES),
+                        help="default: keras plus every exported model found in --model-dir")
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--warmup", type=int, default=1, help="untimed passes over the first batch")
+    parser.add_argument("--bins", type=int, default=15, help="calibration bins")
+    parser.add_argument("--json", default="evaluation_report.json", help="report path (empty to skip)")
+    args = parser.parse_args()
+
+    names = args.backends or [name for name, filename in MODEL_FILES.items()
+                              if os.path.exists(os.path.join(args.model_dir, filename))]
+    backends = {}
+    for name in names:
+        try:
+            backends[name] = load_backend(name, args.model_dir)
+        except (FileNotFoundError, ImportError) as e:
+            print(f"[WARN] Skipping {name}: {e}")
+    if not backends:
+        raise SystemExit("No backend could be loaded")
+
+    ds, class_names, num_images = validation_dataset(args.data, args.batch_size)
+    labels, probs, latencies = run_backends(ds.prefetch(tf.data.AUTOTUNE), num_images,
+                                            len(class_names), backends, args.warmup)
+
+    results = {}
+    for name in backends:
+        report = evaluation_report(labels, probs[name], class_names, args.bins)
+        report["timing"] = timing_report(latencies[name], len(labels))
+        results[name] = report
+        print_report(name, report, class_names)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"data": args.data, "class_names": class_names, "backends": results}, f, indent=2)
+        print(f"\n[INFO] Report written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+# events.py
+# In-process pub/sub broker for FoodAlert changes, streamed as server-sent events.
+#
+# Routes publish small deltas (alert_created / alert_collected / alert_deleted)
+# after committing; every open NGO dashboard receives them over one long-lived
+# /events/alerts response instead of re-querying the table on refresh.
+#
+# The broker keeps the last `history` events in a ring buffer so a client that
+# reconnects with Last-Event-ID gets exactly what it missed. Event ids start at
+# the broker's creation time in milliseconds, so ids handed out by a previous
+# process are always older than the buffer and those clients get a "reset"
+# event (reload the page) instead of a silent gap.
+#
+# EventBroker only reaches streams in its own process. With several worker
+# processes use TableEventBroker: events go through a database table that
+# every process polls, and the row ids are the event ids everywhere.
+import json
+import logging
+import threading
+import time
+from collections import deque
+
+
+class EventBroker:
+    def __init__(self, history=1000):
+        self._events = deque(maxlen=history)  # (id, event_type, json_data)
+        self._next_id = int(time.time() * 1000)
+        self._cond = threading.Condition()
+
+    def publish(self, event_type, data):
+        with self._cond:
+            event_id = self._next_id
+            self._next_id += 1
+            self._events.append((event_id, event_type, json.dumps(data, default=str)))
+            self._cond.notify_all()
+        return event_id
+
+    def publish_many(self, events):
+        """Publish [(event_type, data)] in order; returns their ids."""
+        return [self.publish(event_type, data) for event_type, data in events]
+
+    @property
+    def last_id(self):
+        with self._cond:
+            return self._next_id - 1
+
+    def _since(self, last_id):
+        """Events after last_id, or None if the client fell out of the buffer."""
+        oldest = self._events[0][0] if self._events else self._next_id
+        if last_id < oldest - 1 or last_id >= self._next_id:
+            return None
+        return [e for e in self._events if e[0] > last_id]
+
+    def wait(self, last_id, timeout):
+        """Block until there are events after last_id (or timeout)."""
+        with self._cond:
+            events = self._since(last_id)
+            if events == []:
+                self._cond.wait(timeout)
+                events = self._since(last_id)
+            return events
+
+    def stream(self, last_id=None, heartbeat=15.0):
+        """Generator of SSE frames for one client connection."""
+        if last_id is None:
+            last_id = self.last_id
+        yield "retry: 3000\n\n"
+        while True:
+            events = self.wait(last_id, heartbeat)
+            if events is None:
+                last_id = self.last_id
+                yield f"id: {last_id}\nevent: reset\ndata: {{}}\n\n"
+            elif events:
+                for event_id, event_type, data in events:
+                    yield f"id: {event_id}\nevent: {event_type}\ndata: {data}\n\n"
+                last_id = events[-1][0]
+            else:
+                yield ": keep-alive\n\n"
+
+
+class TableEventBroker(EventBroker):
+    """EventBroker whose events pass through a table shared by every process.
+
+    publish() inserts a row into `model` (id, event_type, data) and each
+    process's poller copies rows it has not seen into its ring buffer, so an
+    event reaches every open stream whichever worker published it. Event ids
+    are the row ids, the same in every process: a dashboard rendered by one
+    worker resumes its stream on any other, and across restarts. The table
+    keeps the last `history` events.
+
+    publish() and poll() use the current app context's session, so a request
+    that publishes needs no second pool connection. Rows are read in id order,
+    after the highest id seen. On PostgreSQL two
+    concurrent publishers can commit out of id order; the later-committed,
+    lower id is then skipped by processes that already read the higher one
+    (the next page load shows the change).
+    """
+
+    def __init__(self, app, db, model, history=1000, poll_interval=0.5):
+        super().__init__(history)
+        self.app = app
+        self.db = db
+        self.model = model
+        self.history = history
+        self.poll_interval = poll_interval
+        self._next_id = 1  # row ids start at 1
+        self._poll_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="event-poller", daemon=True)
+
+    def start(self):
+        with self.app.app_context():
+            self.poll()  # the table's recent events, so reconnecting clients resume here too
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def publish(self, event_type, data):
+        """Commit the event (call after the change itself is committed) and return its id."""
+        return self.publish_many([(event_type, data)])[0]
+
+    def publish_many(self, events):
+        """Commit [(event_type, data)] in one transaction; returns their ids."""
+        if not events:
+            return []
+        table = self.model.__table__
+        session = self.db.session
+        ids = session.scalars(
+            table.insert().returning(table.c.id, sort_by_parameter_order=True),
+            [{"event_type": event_type, "data": json.dumps(data, default=str)} for event_type, data in events],
+        ).all()
+        session.execute(table.delete().where(table.c.id <= ids[-1] - self.history))
+        session.commit()
+        self.poll()  # this process's streams get them right away, in id order
+        return ids
+
+    def poll(self):
+        """Copy events published since the last poll, by any process, into the buffer."""
+        table = self.model.__table__
+        with self._poll_lock:
+            rows = self.db.session.execute(self.db.select(table.c.id, table.c.event_type, table.c.data)
+                                           .where(table.c.id >= self._next_id).order_by(table.c.id)).all()
+            if rows:
+                with self._cond:
+                    self._events.extend(tuple(row) for row in rows)
+                    self._next_id = rows[-1][0] + 1
+                    self._cond.notify_all()
+
+    def _run(self):
+        while not self._stop.wait(self.poll_interval):
+            try:
+                with self.app.app_context():
+                    self.poll()
+            except Exception as e:
+                logging.error(f"Alert event poll failed: {e}", exc_info=True)
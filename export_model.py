@@ -0,0 +1,102 @@
+# export_model.py
+# Convert the trained Keras model into the compact formats the web app serves.
+#
+#   food_waste_model.npz           weights + layer spec for the NumPy backend
+#   food_waste_model_fp16.tflite   TFLite, float16 weights
+#   food_waste_model_int8.tflite   TFLite, int8 weights/activations (float I/O)
+#
+# Usage:
+#   python export_model.py
+#   python export_model.py --formats numpy tflite-int8 --calibration-dir dataset/train
+import argparse
+import json
+import os
+
+import numpy as np
+import tensorflow as tf
+
+from inference import MODEL_FILES
+from preprocessing import decode, model_input
+
+# Config keys the NumPy backend needs, per layer type
+LAYER_CONFIG_KEYS = {
+    "Rescaling": ("scale", "offset"),
+    "Conv2D": ("strides", "padding", "activation"),
+    "MaxPooling2D": ("pool_size", "strides", "padding"),
+    "Dense": ("activation",),
+}
+
+
+def export_numpy(model, path, dtype="float32"):
+    arrays = {}
+    specs = []
+    for i, layer in enumerate(model.layers):
+        config = layer.get_config()
+        spec = {"class_name": layer.__class__.__name__}
+        for key in LAYER_CONFIG_KEYS.get(spec["class_name"], ()):
+            spec[key] = config.get(key)
+        weights = layer.get_weights()
+        spec["num_weights"] = len(weights)
+        for j, w in enumerate(weights):
+            arrays[f"layer{i}_{j}"] = w.astype(dtype)
+        specs.append(spec)
+    np.savez(path, layers=np.array(json.dumps(specs)), **arrays)
+
+
+def representative_images(calibration_dir, limit=200):
+    """Yield calibration samples preprocessed exactly like the web app does."""
+    paths = []
+    if calibration_dir and os.path.isdir(calibration_dir):
+        for root, _, files in os.walk(calibration_dir):
+            paths.extend(os.path.join(root, f) for f in sorted(files)
+                         if f.lower().endswith((".jpg", ".jpeg", ".png")))
+    paths = sorted(paths)[:limit]
+
+    if paths:
+        for p in paths:
+            yield [model_input(decode(p))[np.newaxis]]
+    else:
+        print(f"[WARN] No calibration images in {calibration_dir}, using random data")
+        rng = np.random.default_rng(0)
+        for _ in range(limit):
+            yield [rng.random((1, 128, 128, 3), dtype=np.float32) * 255]
+
+
+def export_tflite(model, path, quantization, calibration_dir=None):
+    converter = tf.lite.TFLiteConverter.from_keras_model(model)
+    converter.optimizations = [tf.lite.Optimize.DEFAULT]
+    if quantization == "fp16":
+        converter.target_spec.supported_types = [tf.float16]
+    else:
+        converter.representative_dataset = lambda: representative_images(calibration_dir)
+        converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS_INT8]
+    with open(path, "wb") as f:
+        f.write(converter.convert())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export food_waste_model.h5 for lightweight serving")
+    parser.add_argument("--model", default=MODEL_FILES["keras"])
+    parser.add_argument("--output-dir", default=".")
+    parser.add_argument("--formats", nargs="+", default=["numpy", "tflite-fp16", "tflite-int8"],
+                        choices=["numpy", "tflite-fp16", "tflite-int8"])
+    parser.add_argument("--npz-dtype", default="float32", choices=["float32", "float16"],
+                        help="storage dtype for NumPy weights (computed in float32 either way)")
+    parser.add_argument("--calibration-dir", default="dataset/train",
+                        help="images used to calibrate int8 quantization")
+    args = parser.parse_args()
+
+    model = tf.keras.models.load_model(args.model)
+    print(f"[INFO] Loaded {args.model}")
+
+    for fmt in args.formats:
+        path = os.path.join(args.output_dir, MODEL_FILES[fmt])
+        if fmt == "numpy":
+            export_numpy(model, path, args.npz_dtype)
+        else:
+            export_tflite(model, path, fmt.split("-")[1], args.calibration_dir)
+        print(f"[INFO] {fmt:<12} -> {path} ({os.path.getsize(path) / 1024:.0f} KB)")
+
+
+if __name__ == "__main__":
+    main()
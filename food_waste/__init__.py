@@ -0,0 +1,84 @@
+# food_waste/__init__.py
+# Application factory for the food donation web app.
+#
+#   food_waste/config.py          settings from the environment
+#   food_waste/models.py          users, alerts, classification jobs, events
+#   food_waste/services.py        upload store, caches, job queue, helpers
+#   food_waste/model_registry.py  when and how the classifier is loaded
+#   food_waste/views/             one blueprint per area of the site
+#
+# create_app() has no side effects beyond building the app: no threads, no
+# open files, and no model unless MODEL_LOADING=prefork. Each process calls
+# start_services() once, or the first request does it, to start its
+# background workers, and stop_services() on the way out. Scripts that only
+# need the models and a database session can therefore import the app
+# cheaply, and gunicorn --preload can fork workers from a master that already
+# holds the model weights.
+import logging
+import os
+
+from flask import Flask
+
+import metrics
+from database import init_engine
+
+from .config import load_config
+from .models import ClassificationJob, FoodAlert, User, db
+from .services import Services
+from .views import register_blueprints
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def create_app(environ=os.environ):
+    logging.basicConfig(level=logging.INFO)
+    app = Flask(__name__, root_path=ROOT)  # templates/ and static/ live at the repository root
+    load_config(app, environ)
+    os.makedirs(app.config["UPLOAD_FOLDER"], exist_ok=True)
+
+    db.init_app(app)
+    init_engine(app, db)
+    metrics.init_app(app)
+    svc = app.extensions["food_waste"] = Services(app)
+    register_blueprints(app)
+    register_gauges(svc)
+
+    if app.config["MODEL_LOADING"] == "prefork":
+        if app.config["INFERENCE_BACKEND"] == "keras":
+            logging.warning("MODEL_LOADING=prefork with the keras backend: TensorFlow is not fork-safe")
+        svc.models.load()  # in the gunicorn master: workers inherit the weights
+
+    @app.before_request
+    def ensure_started():
+        svc.start()
+
+    return app
+
+
+def start_services(app):
+    """Start this process's background workers and model loading (idempotent)."""
+    app.extensions["food_waste"].start()
+
+
+def stop_services(app):
+    """Stop the background workers start_services() started in this process."""
+    app.extensions["food_waste"].stop()
+
+
+def register_gauges(svc):
+    # Scrape-time gauges next to the request/stage histograms (see metrics.py)
+    metrics.registry.gauge(
+        "prediction_cache_lookups_total", "Prediction cache lookups by result.",
+        lambda: {k: v for k, v in svc.prediction_cache.stats().items()
+                 if k in ("memory_hits", "disk_hits", "misses")} if svc.prediction_cache else {},
+        label_name="result", kind="counter")
+    metrics.registry.gauge(
+        "classification_jobs", "Classification jobs by status.",
+        lambda: dict(db.session.query(ClassificationJob.status, db.func.count()).group_by(ClassificationJob.status)),
+        label_name="status")
+    metrics.registry.gauge(
+        "model_loaded", "1 once this process has loaded the classifier.",
+        lambda: int(svc.models.state == "ready"))
+
+
+__all__ = ["create_app", "start_services", "stop_services", "db", "User", "FoodAlert", "ClassificationJob", "ROOT"]
@@ -0,0 +1,82 @@
+# food_waste/config.py
+# Application settings, read from the environment by create_app().
+import os
+
+from database import configure_database
+from geo import DEFAULT_GAZETTEER
+
+ALLOWED_EXTENSIONS = {"png", "jpg", "jpeg", "gif"}
+
+# lazy | background | eager | prefork (see model_registry.py)
+MODEL_LOADING_MODES = ("lazy", "background", "eager", "prefork")
+
+
+def load_config(app, environ=os.environ):
+    app.secret_key = "food_waste_secret"
+    configure_database(app, environ)  # DATABASE_URL, pool and SQLite pragmas (see database.py)
+    app.config["UPLOAD_FOLDER"] = "static/uploads"
+    app.config['MAX_CONTENT_LENGTH'] = 4 * 1024 * 1024  # 4 MB max upload
+    # POST /bulk_alerts: rows per batch, rows per INSERT/commit, total request size (see ingest.py)
+    app.config["BULK_MAX_ROWS"] = int(environ.get("BULK_MAX_ROWS", 1000))
+    app.config["BULK_CHUNK_SIZE"] = int(environ.get("BULK_CHUNK_SIZE", 500))
+    app.config["BULK_MAX_CONTENT_LENGTH"] = int(environ.get("BULK_MAX_CONTENT_LENGTH", 200 * 1024 * 1024))
+    # Micro-batching: concurrent uploads share one model call (see inference.py)
+    app.config["INFERENCE_MAX_BATCH_SIZE"] = int(environ.get("INFERENCE_MAX_BATCH_SIZE", 16))
+    app.config["INFERENCE_MAX_WAIT_MS"] = float(environ.get("INFERENCE_MAX_WAIT_MS", 5))
+    # auto | tflite-int8 | tflite-fp16 | numpy | keras (keras imports full TensorFlow)
+    app.config["INFERENCE_BACKEND"] = environ.get("INFERENCE_BACKEND", "auto")
+    app.config["MODEL_DIR"] = environ.get("MODEL_DIR", ".")
+    # When the classifier is loaded: on first use, in a background thread at
+    # startup, synchronously at startup, or in the gunicorn master before fork
+    app.config["MODEL_LOADING"] = environ.get("MODEL_LOADING", "background")
+    app.config["MODEL_LOAD_TIMEOUT"] = float(environ.get("MODEL_LOAD_TIMEOUT", 60))
+    # Predictions for byte-identical uploads are served from cache (see prediction_cache.py)
+    app.config["PREDICTION_CACHE_PATH"] = environ.get("PREDICTION_CACHE_PATH", "prediction_cache.db")
+    app.config["PREDICTION_CACHE_SIZE"] = int(environ.get("PREDICTION_CACHE_SIZE", 1024))
+    app.config["PREDICTION_CACHE_TTL"] = int(environ.get("PREDICTION_CACHE_TTL", 7 * 24 * 3600))
+    # Orphaned upload blobs are removed in the background (see upload_store.py)
+    app.config["UPLOAD_GC_INTERVAL"] = int(environ.get("UPLOAD_GC_INTERVAL", 600))
+    app.config["UPLOAD_GC_GRACE"] = int(environ.get("UPLOAD_GC_GRACE", 3600))
+    # Thumbnails / previews / model input are built once per upload (see derivatives.py)
+    app.config["DERIVATIVE_WORKERS"] = int(environ.get("DERIVATIVE_WORKERS", 2))
+    app.config["MEDIA_MAX_AGE"] = 365 * 24 * 3600
+    # Dashboards are keyset-paginated on (date_posted, id), newest first
+    app.config["DASHBOARD_PAGE_SIZE"] = int(environ.get("DASHBOARD_PAGE_SIZE", 50))
+    # Live alert deltas for NGO dashboards (see events.py)
+    app.config["EVENT_HISTORY"] = int(environ.get("EVENT_HISTORY", 1000))
+    app.config["EVENT_HEARTBEAT"] = float(environ.get("EVENT_HEARTBEAT", 15))
+    # How often each process reads events published by the others
+    app.config["EVENT_POLL_INTERVAL"] = float(environ.get("EVENT_POLL_INTERVAL", 0.5))
+    # Background classification of new posts (see jobs.py)
+    app.config["CLASSIFY_WORKERS"] = int(environ.get("CLASSIFY_WORKERS", 4))
+    app.config["CLASSIFY_MAX_ATTEMPTS"] = int(environ.get("CLASSIFY_MAX_ATTEMPTS", 3))
+    app.config["CLASSIFY_RETRY_BACKOFF"] = float(environ.get("CLASSIFY_RETRY_BACKOFF", 10))
+    # Unset: requeue every "running" job at startup. Several processes (gunicorn
+    # sets 300): only requeue jobs stuck running for this many seconds.
+    stale_after = environ.get("CLASSIFY_STALE_AFTER")
+    app.config["CLASSIFY_STALE_AFTER"] = float(stale_after) if stale_after else None
+    # Offline geocoding of alert locations and the NGO "nearby" search (see geo.py)
+    app.config["GAZETTEER_PATH"] = environ.get("GAZETTEER_PATH", DEFAULT_GAZETTEER)
+    app.config["NEARBY_RADIUS_KM"] = float(environ.get("NEARBY_RADIUS_KM", 10))
+    app.config["NEARBY_LIMIT"] = int(environ.get("NEARBY_LIMIT", 20))
+    # Pickup routes consider the closest ROUTE_MAX_CANDIDATES alerts within ROUTE_RADIUS_KM (see routing.py)
+    app.config["ROUTE_RADIUS_KM"] = float(environ.get("ROUTE_RADIUS_KM", 25))
+    app.config["ROUTE_MAX_CANDIDATES"] = int(environ.get("ROUTE_MAX_CANDIDATES", 500))
+    # /metrics is open unless METRICS_TOKEN is set (then it needs "Authorization: Bearer <token>").
+    # Per-request profiling is off unless PROFILE_TOKEN is set (see metrics.py).
+    app.config["METRICS_TOKEN"] = environ.get("METRICS_TOKEN", "")
+    app.config["PROFILE_TOKEN"] = environ.get("PROFILE_TOKEN", "")
+    app.config["PROFILE_DIR"] = environ.get("PROFILE_DIR", "profiles")
+    app.config["PROFILE_INTERVAL_MS"] = float(environ.get("PROFILE_INTERVAL_MS", 5))
+    # Alerts collected more than ARCHIVE_AFTER_DAYS ago move to a Parquet archive
+    # every ARCHIVE_INTERVAL seconds, ARCHIVE_BATCH_SIZE rows per transaction (see
+    # archive.py). 0 days turns the background job off; `python archive.py run` still works.
+    app.config["ARCHIVE_AFTER_DAYS"] = int(environ.get("ARCHIVE_AFTER_DAYS", 90))
+    app.config["ARCHIVE_DIR"] = environ.get("ARCHIVE_DIR", "archive")
+    app.config["ARCHIVE_BATCH_SIZE"] = int(environ.get("ARCHIVE_BATCH_SIZE", 500))
+    app.config["ARCHIVE_INTERVAL"] = int(environ.get("ARCHIVE_INTERVAL", 3600))
+    app.config["ARCHIVE_IMAGE_SIZE"] = int(environ.get("ARCHIVE_IMAGE_SIZE", 512))
+    app.config["ARCHIVE_IMAGE_QUALITY"] = int(environ.get("ARCHIVE_IMAGE_QUALITY", 60))
+
+    if app.config["MODEL_LOADING"] not in MODEL_LOADING_MODES:
+        raise ValueError(f"MODEL_LOADING must be one of {', '.join(MODEL_LOADING_MODES)}")
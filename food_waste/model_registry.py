@@ -0,0 +1,123 @@
+# food_waste/model_registry.py
+# Loads the classifier once per process and hands out its batch scheduler.
+#
+# MODEL_LOADING picks when the weights are read:
+#
+#   lazy        nothing at startup; the first classification loads the model
+#   background  a thread starts loading when the process starts serving;
+#               requests that need the model meanwhile wait for it
+#   eager       loaded synchronously when the process starts serving
+#   prefork     loaded in create_app(). With gunicorn --preload (see
+#               gunicorn.conf.py) that is the master, so every worker forks
+#               with the weights already in memory and shares those pages
+#               copy-on-write instead of loading its own copy
+#
+# The BatchScheduler owns a thread, so it is always created in the serving
+# process, on first use.
+import logging
+import os
+import threading
+import time
+
+from inference import AUTO_ORDER, MODEL_FILES, BatchScheduler, load_backend
+from metrics import timed_predict
+
+# IMPORTANT: Ensure these labels match the class order used when training your model.
+# From your training script earlier the order was: ['cooked_food','fruits','others','vegetables']
+# Update below if your model uses a different order.
+CLASS_LABELS = ["cooked_food", "fruits", "others", "vegetables"]
+
+NOT_LOADED, LOADING, READY, FAILED = "not_loaded", "loading", "ready", "failed"
+
+
+class ModelRegistry:
+    def __init__(self, backend, model_dir, class_labels=CLASS_LABELS, max_batch_size=16, max_wait_ms=5.0,
+                 mode="background", load_timeout=60.0):
+        self.backend = backend
+        self.model_dir = model_dir
+        self.class_labels = list(class_labels)
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+        self.mode = mode
+        self.load_timeout = load_timeout
+
+        self.state = NOT_LOADED
+        self.error = None
+        self.load_seconds = None
+        self._model = None
+        self._scheduler = None
+        self._lock = threading.Lock()
+        self._done = threading.Event()
+
+    @property
+    def model(self):
+        return self._model
+
+    def artifact_paths(self):
+        """Every file the configured backend may serve from, plus the .h5 it was exported from."""
+        kinds = AUTO_ORDER if self.backend == "auto" else [self.backend]
+        return [os.path.join(self.model_dir, MODEL_FILES[k]) for k in dict.fromkeys(["keras", *kinds])]
+
+    def load(self, timeout=None):
+        """Load the backend once (thread-safe). Returns it, or None if loading failed or is still
+        running in another thread after `timeout` seconds."""
+        if self._done.is_set():
+            return self._model
+        if not self._lock.acquire(timeout=-1 if timeout is None else timeout):
+            return None
+        try:
+            if not self._done.is_set():
+                self.state = LOADING
+                start = time.perf_counter()
+                try:
+                    self._model = load_backend(self.backend, self.model_dir)
+                    self.state = READY
+                    logging.info(f"✅ Loaded AI model ({self._model.name} backend) in "
+                                 f"{time.perf_counter() - start:.2f}s [{self.mode}, pid {os.getpid()}]")
+                except Exception as e:
+                    self.state = FAILED
+                    self.error = str(e)
+                    logging.error(f"Failed to load model: {e}")
+                self.load_seconds = round(time.perf_counter() - start, 3)
+                self._done.set()
+        finally:
+            self._lock.release()
+        return self._model
+
+    def start(self):
+        """Called once in each serving process."""
+        if self.mode == "background" and not self._done.is_set():
+            threading.Thread(target=self.load, name="model-loader", daemon=True).start()
+        elif self.mode == "eager":
+            self.load()
+
+    def scheduler(self):
+        """This process's BatchScheduler, loading the model first if needed.
+
+        Returns None when no model is available (yet): callers treat that like
+        a server without a model.
+        """
+        if self._scheduler is None:
+            model = self.load(timeout=self.load_timeout)
+            if model is None:
+                return None
+            with self._lock:
+                if self._scheduler is None:
+                    # All request threads go through one scheduler so their images are batched
+                    # into a single forward pass instead of serializing on model.predict.
+                    self._scheduler = BatchScheduler(
+                        timed_predict(model.predict, model.name),
+                        self.class_labels,
+                        max_batch_size=self.max_batch_size,
+                        max_wait_ms=self.max_wait_ms,
+                    )
+        return self._scheduler
+
+    def status(self):
+        return {
+            "state": self.state,
+            "mode": self.mode,
+            "backend": self._model.name if self._model else None,
+            "load_seconds": self.load_seconds,
+            "error": self.error,
+        }
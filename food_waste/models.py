@@ -0,0 +1,65 @@
+# food_waste/models.py
+# Database models, shared by the web app, the job queue and the CLI scripts.
+from datetime import datetime
+
+from flask_sqlalchemy import SQLAlchemy
+
+db = SQLAlchemy()
+
+
+class User(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    username = db.Column(db.String(50), unique=True, nullable=False)
+    password = db.Column(db.String(200), nullable=False)
+    role = db.Column(db.String(20), nullable=False)
+    alerts = db.relationship('FoodAlert', backref='owner', lazy=True, foreign_keys='FoodAlert.posted_by')
+
+
+class FoodAlert(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    description = db.Column(db.String(200), nullable=False)
+    quantity = db.Column(db.String(50), nullable=False)
+    location = db.Column(db.String(100), nullable=False)
+    date_posted = db.Column(db.DateTime, default=datetime.utcnow)
+    collected = db.Column(db.Boolean, default=False)
+    image_filename = db.Column(db.String(200))  # image file name (stored in static/uploads)
+    prediction = db.Column(db.String(100))      # AI model result
+    posted_by = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    collected_by = db.Column(db.Integer, db.ForeignKey('user.id'))  # NGO that claimed it
+    collected_at = db.Column(db.DateTime)
+    latitude = db.Column(db.Float)   # geocoded from location (see geo.py)
+    longitude = db.Column(db.Float)
+
+    # Composite indexes matching the dashboard feeds (see migrations.py for existing DBs)
+    __table_args__ = (
+        db.Index("ix_food_alert_collected_date", "collected", "date_posted", "id"),
+        db.Index("ix_food_alert_posted_by_date", "posted_by", "date_posted", "id"),
+        db.Index("ix_food_alert_lat_lon", "latitude", "longitude"),
+        db.Index("ix_food_alert_collected_at", "collected", "collected_at"),
+    )
+
+
+class ClassificationJob(db.Model):
+    """Queued AI classification of an alert's image (processed by jobs.JobQueue)."""
+    id = db.Column(db.Integer, primary_key=True)
+    alert_id = db.Column(db.Integer, db.ForeignKey('food_alert.id', ondelete='CASCADE'), nullable=False)
+    image_filename = db.Column(db.String(200), nullable=False)
+    digest = db.Column(db.String(64), nullable=False)   # SHA-256 of the upload (prediction cache key)
+    status = db.Column(db.String(20), nullable=False)   # pending | running | done | failed
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    run_after = db.Column(db.DateTime, nullable=False)
+    last_error = db.Column(db.String(500))
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        db.Index("ix_classification_job_status_run_after", "status", "run_after"),
+        db.Index("ix_classification_job_alert_id", "alert_id"),
+    )
+
+
+class AlertEvent(db.Model):
+    """A published alert delta, read back by every process (see events.TableEventBroker)."""
+    id = db.Column(db.Integer, primary_key=True)  # the SSE event id
+    event_type = db.Column(db.String(32), nullable=False)
+    data = db.Column(db.Text, nullable=False)  # JSON
@@ -0,0 +1,350 @@
+# food_waste/services.py
+# Runtime objects shared by the views and background workers, plus the alert
+# and classification helpers built on them.
+#
+# create_app() builds one Services per app (app.extensions["food_waste"]).
+# Building it opens no files or connections and starts no threads, so the app
+# can be created in a gunicorn master and forked. start() does the
+# per-process part: prediction cache connection, job workers, upload GC, the
+# alert event poller, the archiver and the model loading policy. It runs once
+# per process, from the first request or from gunicorn's post_worker_init
+# hook; stop() undoes it when the process exits.
+import logging
+import os
+import threading
+from datetime import datetime
+
+from flask import current_app
+from werkzeug.utils import secure_filename
+
+from archive import Archiver, ArchiveStore
+from derivatives import DerivativePipeline
+from events import TableEventBroker
+from geo import Gazetteer, has_geo_index, nearest_alert_ids
+from ingest import IMAGE_READ_ERRORS
+from jobs import JobQueue
+from metrics import stage
+from prediction_cache import PredictionCache
+from preprocessing import VERSION as PREPROCESSING_VERSION
+from preprocessing import model_input
+from upload_store import BlobGarbageCollector, UploadStore
+
+from .config import ALLOWED_EXTENSIONS
+from .model_registry import ModelRegistry
+from .models import AlertEvent, ClassificationJob, FoodAlert, db
+
+PENDING_PREDICTION = "pending"
+FAILED_PREDICTION = "unclassified"
+
+
+class Services:
+    def __init__(self, app):
+        config = app.config
+        self.app = app
+        self.gazetteer = Gazetteer(config["GAZETTEER_PATH"])
+        self.upload_store = UploadStore(config["UPLOAD_FOLDER"])
+        self.derivatives = DerivativePipeline(self.upload_store, workers=config["DERIVATIVE_WORKERS"])
+        # Through the alert_event table: a stream sees events from every worker
+        self.alert_events = TableEventBroker(
+            app, db, AlertEvent,
+            history=config["EVENT_HISTORY"],
+            poll_interval=config["EVENT_POLL_INTERVAL"],
+        )
+        self.models = ModelRegistry(
+            config["INFERENCE_BACKEND"],
+            config["MODEL_DIR"],
+            max_batch_size=config["INFERENCE_MAX_BATCH_SIZE"],
+            max_wait_ms=config["INFERENCE_MAX_WAIT_MS"],
+            mode=config["MODEL_LOADING"],
+            load_timeout=config["MODEL_LOAD_TIMEOUT"],
+        )
+        self.prediction_cache = None  # opened in start()
+        self.upload_gc = BlobGarbageCollector(
+            self.upload_store,
+            self.referenced_uploads,
+            interval_seconds=config["UPLOAD_GC_INTERVAL"],
+            grace_seconds=config["UPLOAD_GC_GRACE"],
+        )
+        self.archive = ArchiveStore(config["ARCHIVE_DIR"])
+        self.archiver = Archiver(
+            app, db, FoodAlert, ClassificationJob, self.archive, self.upload_store,
+            after_days=config["ARCHIVE_AFTER_DAYS"],
+            batch_size=config["ARCHIVE_BATCH_SIZE"],
+            interval_seconds=config["ARCHIVE_INTERVAL"],
+            image_size=config["ARCHIVE_IMAGE_SIZE"],
+            image_quality=config["ARCHIVE_IMAGE_QUALITY"],
+            release_uploads=self.release_uploads,
+        )
+        # Several workers feed the batch scheduler concurrently, so queued images
+        # still share forward passes.
+        self.classification_queue = JobQueue(
+            app, db, ClassificationJob, run_classification_job,
+            on_failure=classification_failed,
+            workers=config["CLASSIFY_WORKERS"],
+            max_attempts=config["CLASSIFY_MAX_ATTEMPTS"],
+            backoff_seconds=config["CLASSIFY_RETRY_BACKOFF"],
+            stale_after=config["CLASSIFY_STALE_AFTER"],
+        )
+        self.started_pid = None
+        self._start_lock = threading.Lock()
+
+    def start(self):
+        """Open per-process resources and start the background threads (idempotent)."""
+        if self.started_pid == os.getpid():
+            return
+        with self._start_lock:
+            if self.started_pid == os.getpid():
+                return
+            with self.app.app_context():
+                db.engine.dispose(close=False)  # never reuse connections inherited from a parent process
+            # Watch the .h5 and every artifact the backend may serve: any of them
+            # changing, or a new preprocessing version, invalidates every cached prediction.
+            self.prediction_cache = PredictionCache(
+                self.app.config["PREDICTION_CACHE_PATH"],
+                model_paths=self.models.artifact_paths(),
+                salt=f"preprocessing-v{PREPROCESSING_VERSION}",
+                max_entries=self.app.config["PREDICTION_CACHE_SIZE"],
+                ttl_seconds=self.app.config["PREDICTION_CACHE_TTL"],
+            )
+            self.upload_gc.start()
+            if self.app.config["ARCHIVE_AFTER_DAYS"] > 0:
+                self.archiver.start()
+            self.classification_queue.start()
+            self.alert_events.start()
+            self.models.start()
+            self.started_pid = os.getpid()
+            logging.info(f"Services started in pid {os.getpid()} (model loading: {self.models.mode})")
+
+    def stop(self):
+        """Stop the background threads start() began in this process."""
+        if self.started_pid != os.getpid():
+            return
+        self.classification_queue.stop()
+        self.upload_gc.stop()
+        self.archiver.stop()
+        self.alert_events.stop()
+        self.derivatives.shutdown()
+        logging.info(f"Services stopped in pid {os.getpid()}")
+
+    def referenced_uploads(self):
+        with self.app.app_context():
+            rows = db.session.query(FoodAlert.image_filename).filter(FoodAlert.image_filename.isnot(None)).distinct()
+            return {name for (name,) in rows}
+
+    def release_uploads(self, names):
+        """Drop uploads no alert references any more (needs an app context).
+
+        Images may be shared between alerts. Store blobs are left to the
+        background GC (safe against a concurrent re-upload of the same photo);
+        legacy flat files are removed right away.
+        """
+        for name in names:
+            if upload_refcount(name):
+                continue
+            if self.upload_store.is_blob(name):
+                self.upload_gc.wake()
+            else:
+                try:
+                    os.remove(os.path.join(self.app.config["UPLOAD_FOLDER"], name))
+                except OSError:
+                    pass
+
+
+def services():
+    """The current app's Services (needs an app context)."""
+    return current_app.extensions["food_waste"]
+
+
+# ---------- Helper functions ----------
+def allowed_file(filename: str) -> bool:
+    return "." in filename and filename.rsplit(".", 1)[1].lower() in ALLOWED_EXTENSIONS
+
+
+def upload_refcount(image_filename):
+    """Number of alerts that still point at an uploaded image."""
+    return FoodAlert.query.filter_by(image_filename=image_filename).count()
+
+
+def keyset_page(query, cursor, page_size):
+    """Return (alerts, next_cursor) for one page of a newest-first alert feed.
+
+    The cursor is "<date_posted ISO>_<id>" of the last row on the previous
+    page; the next page seeks past it through the composite index instead of
+    using OFFSET, so deep pages cost the same as the first one.
+    """
+    query = query.order_by(FoodAlert.date_posted.desc(), FoodAlert.id.desc())
+    if cursor:
+        try:
+            posted, alert_id = cursor.rsplit("_", 1)
+            query = query.filter(db.tuple_(FoodAlert.date_posted, FoodAlert.id)
+                                 < (datetime.fromisoformat(posted), int(alert_id)))
+        except ValueError:
+            pass  # malformed cursor: start from the newest page
+
+    alerts = query.limit(page_size + 1).all()
+    next_cursor = None
+    if len(alerts) > page_size:
+        alerts = alerts[:page_size]
+        last = alerts[-1]
+        next_cursor = f"{last.date_posted.isoformat()}_{last.id}"
+    return alerts, next_cursor
+
+
+def nearby_alerts(lat, lon, radius_km, limit):
+    """[(alert, distance_km)] of the closest uncollected alerts, nearest first."""
+    conn = db.session.connection()
+    ranked = nearest_alert_ids(conn, lat, lon, radius_km, limit, use_index=has_geo_index(conn))
+    alerts = {a.id: a for a in FoodAlert.query.filter(FoodAlert.id.in_([i for i, _ in ranked]))}
+    return [(alerts[i], distance) for i, distance in ranked if i in alerts]
+
+
+def claim_alerts(alert_ids, ngo_id=None):
+    """Mark alerts collected, atomically, and return the ids this caller won.
+
+    Each claim is a single conditional UPDATE ... WHERE id = ? AND collected = 0,
+    so when two NGOs race for the same alert exactly one update matches a row
+    and the other sees rowcount 0. All claims share one transaction.
+    """
+    now = datetime.utcnow()
+    won = []
+    for alert_id in dict.fromkeys(alert_ids):
+        result = db.session.execute(
+            db.update(FoodAlert)
+            .where(FoodAlert.id == alert_id,
+                   db.or_(FoodAlert.collected == False, FoodAlert.collected.is_(None)))  # noqa: E712
+            .values(collected=True, collected_by=ngo_id, collected_at=now)
+            .execution_options(synchronize_session=False)
+        )
+        if result.rowcount == 1:
+            won.append(alert_id)
+    db.session.commit()
+
+    if won:
+        publish_alerts("alert_collected", FoodAlert.query.filter(FoodAlert.id.in_(won)))
+    return won
+
+
+def publish_alert(event_type, alert):
+    """Push an alert delta to every open NGO dashboard (call after commit)."""
+    publish_alerts(event_type, [alert])
+
+
+def publish_alerts(event_type, alerts):
+    """publish_alert() for several alerts, as one batch of events."""
+    services().alert_events.publish_many([(event_type, alert_event_data(alert)) for alert in alerts])
+
+
+def alert_event_data(alert):
+    return {
+        "id": alert.id,
+        "description": alert.description,
+        "quantity": alert.quantity,
+        "location": alert.location,
+        "posted_by": alert.posted_by,
+        "prediction": alert.prediction,
+        "collected": bool(alert.collected),
+        "date_posted": alert.date_posted.strftime("%d-%m-%Y %H:%M") if alert.date_posted else None,
+        # Not a URL: publishers may run outside a request (background jobs)
+        "image_filename": alert.image_filename,
+    }
+
+
+def create_alerts(rows, batch, poster_id):
+    """Create one alert per ingest.Row with a single bulk INSERT, then commit.
+
+    Returns ({row number: (alert id, prediction)}, {row number: error}); the
+    errors are rows whose image could not be stored. Each distinct image is
+    stored once. Alerts whose photo already has a cached prediction get it
+    straight away; the rest are created pending, with their classification
+    jobs inserted in bulk too.
+    """
+    svc = services()
+    blobs, locations, errors = {}, {}, {}
+    with stage("save"):
+        for row in rows:
+            if row.image not in blobs:
+                try:
+                    with batch.open_image(row.image) as image:
+                        blobs[row.image] = svc.upload_store.save(image, secure_filename(row.image))
+                except IMAGE_READ_ERRORS as e:
+                    errors[row.image] = f"image {row.image} could not be read: {e}"
+                    blobs[row.image] = None
+    created = [row for row in rows if blobs[row.image]]
+    predictions = {b.digest: svc.prediction_cache.get(b.digest) for b in blobs.values() if b}
+    values = []
+    for row in created:
+        blob = blobs[row.image]
+        if row.location not in locations:
+            locations[row.location] = svc.gazetteer.geocode(row.location) or (None, None)
+        values.append({
+            "description": row.description,
+            "quantity": row.quantity,
+            "location": row.location,
+            "latitude": locations[row.location][0],
+            "longitude": locations[row.location][1],
+            "image_filename": blob.name,
+            "prediction": predictions[blob.digest] or PENDING_PREDICTION,
+            "posted_by": poster_id,
+        })
+    ids = []
+    if values:
+        ids = db.session.scalars(db.insert(FoodAlert).returning(FoodAlert.id, sort_by_parameter_order=True),
+                                 values).all()
+        svc.classification_queue.enqueue_many([
+            {"alert_id": alert_id, "image_filename": blobs[row.image].name, "digest": blobs[row.image].digest}
+            for alert_id, row in zip(ids, created) if predictions[blobs[row.image].digest] is None])
+    with stage("commit"):
+        db.session.commit()
+    svc.classification_queue.notify()
+    for name in {b.name for b in blobs.values() if b}:
+        svc.derivatives.submit(name)
+    if ids:
+        publish_alerts("alert_created", FoodAlert.query.filter(FoodAlert.id.in_(ids)).order_by(FoodAlert.id))
+    results = {row.number: (alert_id, v["prediction"]) for row, alert_id, v in zip(created, ids, values)}
+    return results, {row.number: errors[row.image] for row in rows if row.image in errors}
+
+
+# ---------- Classification ----------
+def classify_upload(digest, image_filename):
+    """Return the predicted class for an upload, or None if no model is available.
+
+    Byte-identical uploads (same SHA-256) reuse the cached prediction and never
+    reach the model. Otherwise the model reads the pre-sized input derivative,
+    or a draft-mode decode of the original if that is not written yet, and
+    preprocessing.model_input turns those uint8 pixels into the float32 input
+    the model was trained on.
+    """
+    svc = services()
+    predicted_class = svc.prediction_cache.get(digest)
+    if predicted_class is None:
+        scheduler = svc.models.scheduler()
+        if scheduler is None:
+            return None
+        with stage("decode"):
+            pixels = svc.derivatives.input_pixels(image_filename)
+        with stage("preprocess"):
+            img_array = model_input(pixels)
+        with stage("predict"):
+            predicted_class = scheduler.predict(img_array).label
+        svc.prediction_cache.put(digest, predicted_class)
+    return predicted_class
+
+
+def set_alert_prediction(alert_id, prediction):
+    alert = db.session.get(FoodAlert, alert_id)
+    if alert is None:
+        return  # deleted while queued
+    alert.prediction = prediction
+    db.session.commit()
+    publish_alert("alert_classified", alert)
+
+
+def run_classification_job(job):
+    predicted_class = classify_upload(job.digest, job.image_filename)
+    if predicted_class is None:
+        raise RuntimeError("AI model not available")
+    set_alert_prediction(job.alert_id, predicted_class)
+
+
+def classification_failed(job):
+    set_alert_prediction(job.alert_id, FAILED_PREDICTION)
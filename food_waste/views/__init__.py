@@ -0,0 +1,15 @@
+# food_waste/views/__init__.py
+# Blueprints, one per area of the site; endpoints are "<blueprint>.<function>".
+from .auth import bp as auth_bp
+from .classifier import bp as classifier_bp
+from .health import bp as health_bp
+from .mess import bp as mess_bp
+from .ngo import bp as ngo_bp
+from .reports import bp as reports_bp
+
+BLUEPRINTS = [auth_bp, mess_bp, ngo_bp, classifier_bp, reports_bp, health_bp]
+
+
+def register_blueprints(app):
+    for blueprint in BLUEPRINTS:
+        app.register_blueprint(blueprint)
@@ -0,0 +1,57 @@
+# food_waste/views/auth.py
+# Landing page, signup, login and logout.
+from flask import Blueprint, flash, redirect, render_template, request, session, url_for
+from werkzeug.security import check_password_hash, generate_password_hash
+
+from ..models import User, db
+
+bp = Blueprint("auth", __name__)
+
+
+@bp.route("/")
+def index():
+    return render_template("index.html")
+
+# Signup
+@bp.route('/signup', methods=['GET', 'POST'])
+def signup():
+    if request.method == 'POST':
+        username = request.form['username'].strip()
+        password = request.form['password']
+        role = request.form['role']
+
+        if User.query.filter_by(username=username).first():
+            flash("⚠️ User already exists!", "danger")
+            return redirect(url_for("auth.signup"))
+
+        hashed_password = generate_password_hash(password, method="pbkdf2:sha256")
+        new_user = User(username=username, password=hashed_password, role=role)
+        db.session.add(new_user)
+        db.session.commit()
+        flash("✅ Account created successfully!", "success")
+        return redirect(url_for('auth.login'))
+
+    return render_template('signup.html')
+
+# Login
+@bp.route("/login", methods=["GET", "POST"])
+def login():
+    if request.method == "POST":
+        username = request.form["username"].strip()
+        password = request.form["password"]
+        user = User.query.filter_by(username=username).first()
+
+        if user and check_password_hash(user.password, password):
+            session["user_id"] = user.id
+            session["role"] = user.role
+            session["username"] = user.username
+            return redirect(url_for("mess.mess_dashboard" if user.role == "mess" else "ngo.ngo_dashboard"))
+        else:
+            flash("❌ Invalid username or password.", "danger")
+
+    return render_template("login.html")
+
+@bp.route("/logout")
+def logout():
+    session.clear()
+    return redirect(url_for("auth.index"))
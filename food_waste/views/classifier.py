@@ -0,0 +1,112 @@
+# food_waste/views/classifier.py
+# Synchronous AI classifier page and the upload variants it (and the
+# dashboards) display.
+import logging
+import os
+
+from flask import (Blueprint, abort, current_app, flash, jsonify, redirect, render_template, request, send_file,
+                   session, url_for)
+from werkzeug.security import safe_join
+from werkzeug.utils import secure_filename
+
+from derivatives import VARIANTS
+from metrics import stage
+
+from ..models import FoodAlert, db
+from ..services import allowed_file, classify_upload, publish_alert, services
+
+bp = Blueprint("classifier", __name__)
+
+
+# ---------- AI Image Classifier ----------
+@bp.route("/ai_classifier", methods=["GET", "POST"])
+def ai_classifier():
+    # allow both roles to use classifier; change to only 'ngo' if desired
+    if "role" not in session or session["role"] not in ("ngo", "mess"):
+        return redirect(url_for("auth.login"))
+
+    prediction = None
+    saved_filename = None
+
+    if request.method == "POST":
+        svc = services()
+        file = request.files.get("image")
+        if not file or file.filename == "":
+            flash("⚠️ Please upload an image!", "danger")
+            return redirect(url_for("classifier.ai_classifier"))
+
+        if not allowed_file(file.filename):
+            flash("⚠️ Invalid file type. Use png/jpg/jpeg/gif.", "danger")
+            return redirect(url_for("classifier.ai_classifier"))
+
+        try:
+            # Content-addressed name: unique per image, never overwritten.
+            # Unreferenced blobs (e.g. on errors below) are cleaned up by the GC.
+            with stage("save"):
+                blob = svc.upload_store.save(file.stream, secure_filename(file.filename))
+            saved_filename = blob.name
+            svc.derivatives.submit(blob.name)
+
+            # Preprocess and predict
+            predicted_class = classify_upload(blob.digest, blob.name)
+            if predicted_class is None:
+                flash("⚠️ AI model not available on server.", "danger")
+                return redirect(url_for("classifier.ai_classifier"))
+
+            prediction = predicted_class
+
+            # Save prediction info into FoodAlert (optional fields)
+            # You can decide quantity/location or ask user to fill later; using placeholders here
+            new_alert = FoodAlert(
+                description=f"AI: {predicted_class}",
+                quantity="Unknown",
+                location="Not specified",
+                image_filename=saved_filename,
+                prediction=predicted_class,
+                posted_by=session["user_id"]
+            )
+            db.session.add(new_alert)
+            with stage("commit"):
+                db.session.commit()
+            publish_alert("alert_created", new_alert)
+
+            flash(f"✅ Prediction: {predicted_class}", "success")
+        except Exception as e:
+            logging.error(f"AI prediction error: {e}", exc_info=True)
+            flash("⚠️ Error processing image. Try another file.", "danger")
+            return redirect(url_for("classifier.ai_classifier"))
+
+    # Template shows the WebP preview via url_for('classifier.media', ...)
+    return render_template("ai_classifier.html", prediction=prediction, image_path=saved_filename)
+
+# ---------- Upload variants ----------
+@bp.route("/media/<path:image_filename>/<variant>")
+def media(image_filename, variant):
+    """Serve a pre-sized variant (thumb / preview) of an uploaded image.
+
+    Store blobs are content-addressed, so their variants never change and can
+    be cached by browsers indefinitely.
+    """
+    if variant not in VARIANTS or variant == "input":
+        abort(404)
+    svc = services()
+    original = safe_join(current_app.config["UPLOAD_FOLDER"], image_filename)
+    if original is None or not os.path.isfile(original):
+        abort(404)
+
+    try:
+        path = svc.derivatives.path(image_filename, variant)
+    except Exception:
+        path = original  # fall back to the full-size image
+
+    immutable = svc.upload_store.is_blob(image_filename)
+    response = send_file(os.path.abspath(path), max_age=current_app.config["MEDIA_MAX_AGE"] if immutable else 3600)
+    response.cache_control.public = True
+    response.cache_control.immutable = immutable
+    return response
+
+@bp.route("/ai_classifier/cache_stats")
+def prediction_cache_stats():
+    if "role" not in session:
+        return redirect(url_for("auth.login"))
+    return jsonify(services().prediction_cache.stats())
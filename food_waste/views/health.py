@@ -0,0 +1,16 @@
+# food_waste/views/health.py
+# Liveness/readiness for load balancers and the startup benchmark.
+import os
+
+from flask import Blueprint, jsonify
+
+from ..services import services
+
+bp = Blueprint("health", __name__)
+
+
+@bp.route("/healthz")
+def healthz():
+    """200 once this process serves requests; "ready" tells whether the model is loaded."""
+    model = services().models.status()
+    return jsonify({"pid": os.getpid(), "ready": model["state"] == "ready", "model": model})
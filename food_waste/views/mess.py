@@ -0,0 +1,125 @@
+# food_waste/views/mess.py
+# Mess owner dashboard: post food (with a photo for the classifier), post in
+# bulk, mark collected, delete.
+from flask import Blueprint, current_app, flash, jsonify, redirect, render_template, request, session, url_for
+from werkzeug.utils import secure_filename
+
+from ingest import BatchError, open_batch, read_rows
+from metrics import stage
+
+from ..config import ALLOWED_EXTENSIONS
+from ..models import FoodAlert, db
+from ..services import PENDING_PREDICTION, claim_alerts, create_alerts, keyset_page, publish_alert, services
+
+bp = Blueprint("mess", __name__)
+
+
+# Mess Dashboard
+@bp.route("/mess_dashboard", methods=["GET", "POST"])
+def mess_dashboard():
+    if "role" not in session or session["role"] != "mess":
+        return redirect(url_for("auth.login"))
+
+    if request.method == "POST":
+        svc = services()
+        file = request.files.get("image")
+
+        if not file or file.filename == "":
+            flash("⚠️ Food image is required for AI prediction!", "danger")
+            return redirect(url_for("mess.mess_dashboard"))
+
+        # Save image (content-addressed, identical photos are stored once)
+        with stage("save"):
+            blob = svc.upload_store.save(file.stream, secure_filename(file.filename))
+        svc.derivatives.submit(blob.name)
+
+        # Re-uploaded photo: prediction is already known. Otherwise the alert is
+        # created as pending and classified by the background queue.
+        predicted_class = svc.prediction_cache.get(blob.digest)
+        coords = svc.gazetteer.geocode(request.form["location"]) or (None, None)
+
+        alert = FoodAlert(
+            description=request.form["description"],
+            quantity=request.form["quantity"],
+            location=request.form["location"],
+            latitude=coords[0],
+            longitude=coords[1],
+            image_filename=blob.name,
+            prediction=predicted_class or PENDING_PREDICTION,
+            posted_by=session["user_id"]
+        )
+        db.session.add(alert)
+        if predicted_class is None:
+            db.session.flush()  # assigns alert.id for the job row
+            svc.classification_queue.enqueue(alert_id=alert.id, image_filename=blob.name, digest=blob.digest)
+        with stage("commit"):
+            db.session.commit()
+        svc.classification_queue.notify()
+        publish_alert("alert_created", alert)
+
+        if predicted_class:
+            flash(f"✅ Food posted with AI category: {predicted_class}", "success")
+        else:
+            flash("✅ Food posted! AI category will appear shortly.", "success")
+        return redirect(url_for("mess.mess_dashboard"))
+
+    alerts, next_cursor = keyset_page(FoodAlert.query.filter_by(posted_by=session["user_id"]),
+                                      request.args.get("cursor"), current_app.config["DASHBOARD_PAGE_SIZE"])
+    return render_template("mess_dashboard.html", alerts=alerts, next_cursor=next_cursor)
+
+
+# Bulk posting for messes with many outlets: a CSV plus images, or a zip of both (see ingest.py)
+@bp.route("/bulk_alerts", methods=["POST"])
+def bulk_alerts():
+    if "role" not in session or session["role"] != "mess":
+        return redirect(url_for("auth.login"))
+
+    config = current_app.config
+    request.max_content_length = config["BULK_MAX_CONTENT_LENGTH"]
+    request.max_form_parts = config["BULK_MAX_ROWS"] + 10
+    try:
+        batch = open_batch(request.files)
+        rows = read_rows(batch, ALLOWED_EXTENSIONS, config["MAX_CONTENT_LENGTH"], config["BULK_MAX_ROWS"])
+    except BatchError as e:
+        return jsonify({"error": str(e)}), 400
+
+    valid = [row for row in rows if not row.errors]
+    created, failed = {}, {}
+    chunk_size = config["BULK_CHUNK_SIZE"]
+    for i in range(0, len(valid), chunk_size):
+        ids, errors = create_alerts(valid[i:i + chunk_size], batch, session["user_id"])
+        created.update(ids)
+        failed.update(errors)
+
+    results = []
+    for row in rows:
+        if row.number in created:
+            alert_id, prediction = created[row.number]
+            results.append({"row": row.number, "id": alert_id, "prediction": prediction})
+        else:
+            results.append({"row": row.number, "errors": row.errors or [failed[row.number]]})
+    return jsonify({"created": len(created), "failed": len(rows) - len(created), "rows": results})
+
+
+# Mark collected (mess owner) and delete
+@bp.route('/mark_collected/<int:alert_id>')
+def mark_collected(alert_id):
+    FoodAlert.query.get_or_404(alert_id)
+    if claim_alerts([alert_id]):
+        flash("✅ Food marked as collected!", "success")
+    else:
+        flash("⚠️ This food post was already collected.", "warning")
+    return redirect(url_for('mess.mess_dashboard'))
+
+@bp.route('/delete_alert/<int:alert_id>')
+def delete_alert(alert_id):
+    svc = services()
+    alert = FoodAlert.query.get_or_404(alert_id)
+    image_filename = alert.image_filename
+    db.session.delete(alert)
+    db.session.commit()
+    svc.alert_events.publish("alert_deleted", {"id": alert_id})
+    if image_filename:
+        svc.release_uploads([image_filename])
+    flash("🗑️ Food post deleted!", "danger")
+    return redirect(url_for('mess.mess_dashboard'))
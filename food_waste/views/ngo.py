@@ -0,0 +1,179 @@
+# food_waste/views/ngo.py
+# NGO dashboard: available food (newest first or nearest first), live updates,
+# collecting alerts and planning pickup routes.
+from flask import (Blueprint, Response, abort, current_app, flash, jsonify, redirect, render_template, request,
+                   session, url_for)
+
+from routing import Stop, parse_quantity, plan_route
+
+from ..models import FoodAlert
+from ..services import claim_alerts, keyset_page, nearby_alerts, services
+
+bp = Blueprint("ngo", __name__)
+
+
+# NGO Dashboard
+@bp.route("/ngo_dashboard")
+def ngo_dashboard():
+    if "role" not in session or session["role"] != "ngo":
+        return redirect(url_for("auth.login"))
+
+    svc = services()
+    config = current_app.config
+    # Read before querying so the page's event stream resumes without a gap;
+    # poll first so events other workers published are counted too
+    svc.alert_events.poll()
+    last_event_id = svc.alert_events.last_id
+
+    # "Nearby" view: closest uncollected alerts to a place or "lat, lon"
+    near = request.args.get("near", "").strip()
+    if near:
+        coords = svc.gazetteer.geocode(near)
+        if coords is None:
+            flash("⚠️ Location not recognised. Try a city name or 'lat, lon'.", "warning")
+        else:
+            try:
+                radius = float(request.args.get("radius") or config["NEARBY_RADIUS_KM"])
+            except ValueError:
+                radius = config["NEARBY_RADIUS_KM"]
+            ranked = nearby_alerts(coords[0], coords[1], radius, config["NEARBY_LIMIT"])
+            return render_template("ngo_dashboard.html", alerts=[a for a, _ in ranked],
+                                   distances={a.id: d for a, d in ranked}, near=near, radius=radius,
+                                   next_cursor=None, last_event_id=last_event_id)
+
+    alerts, next_cursor = keyset_page(FoodAlert.query.filter_by(collected=False),
+                                      request.args.get("cursor"), config["DASHBOARD_PAGE_SIZE"])
+    return render_template("ngo_dashboard.html", alerts=alerts, next_cursor=next_cursor,
+                           last_event_id=last_event_id)
+
+# Live updates for the NGO dashboard (server-sent events)
+@bp.route("/events/alerts")
+def alert_event_stream():
+    if "role" not in session or session["role"] != "ngo":
+        return redirect(url_for("auth.login"))
+
+    last_id = request.headers.get("Last-Event-ID") or request.args.get("last_event_id")
+    try:
+        last_id = int(last_id) if last_id else None
+    except ValueError:
+        last_id = None
+
+    # The page may have been rendered by another worker: catch up with the
+    # alert_event table so its last_id is not mistaken for one from the future.
+    # After that the generator does not touch the request or the database; an
+    # idle connection costs one blocked thread and no DB connection.
+    broker = services().alert_events
+    broker.poll()
+    return Response(
+        broker.stream(last_id, heartbeat=current_app.config["EVENT_HEARTBEAT"]),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+# Collect alert (NGO action) - the template posts to this route
+@bp.route("/collect/<int:alert_id>", methods=["POST"])
+def collect_alert(alert_id):
+    if "role" not in session or session["role"] != "ngo":
+        return redirect(url_for("auth.login"))
+
+    if claim_alerts([alert_id], session["user_id"]):
+        flash("✅ Food collected successfully!", "success")
+    else:
+        flash("⚠️ This food post was already collected by another NGO.", "warning")
+    return redirect(url_for("ngo.ngo_dashboard"))
+
+# Claim several alerts in one transaction (form checkboxes or JSON {"alert_ids": [...]})
+@bp.route("/collect_batch", methods=["POST"])
+def collect_batch():
+    if "role" not in session or session["role"] != "ngo":
+        return redirect(url_for("auth.login"))
+
+    if request.is_json:
+        raw_ids = (request.get_json(silent=True) or {}).get("alert_ids", [])
+    else:
+        raw_ids = request.form.getlist("alert_ids")
+    try:
+        alert_ids = [int(i) for i in raw_ids]
+    except (TypeError, ValueError):
+        abort(400)
+
+    won = claim_alerts(alert_ids, session["user_id"])
+    lost = [i for i in dict.fromkeys(alert_ids) if i not in set(won)]
+
+    if request.is_json:
+        return jsonify({"claimed": won, "already_collected": lost})
+    if won:
+        flash(f"✅ Collected {len(won)} food post(s)!", "success")
+    if lost:
+        flash(f"⚠️ {len(lost)} post(s) were already collected by another NGO.", "warning")
+    return redirect(url_for("ngo.ngo_dashboard"))
+
+# Pickup route: plan an ordered round trip from the NGO's depot and claim its stops
+@bp.route("/plan_route", methods=["POST"])
+def plan_pickup_route():
+    if "role" not in session or session["role"] != "ngo":
+        return redirect(url_for("auth.login"))
+
+    config = current_app.config
+    params = (request.get_json(silent=True) or {}) if request.is_json else request.form
+    depot = params.get("depot")
+    if isinstance(depot, (list, tuple)) and len(depot) == 2:
+        depot = f"{depot[0]}, {depot[1]}"
+    coords = services().gazetteer.geocode(str(depot or ""))
+    try:
+        capacity = float(params["capacity"]) if params.get("capacity") not in (None, "") else None
+        radius = float(params.get("radius") or config["ROUTE_RADIUS_KM"])
+        max_stops = int(params["max_stops"]) if params.get("max_stops") not in (None, "") else None
+    except (TypeError, ValueError):
+        abort(400)
+    dry_run = str(params.get("dry_run", "")).lower() in ("1", "true", "on", "yes")
+
+    if coords is None:
+        if request.is_json:
+            return jsonify({"error": "depot location not recognised"}), 400
+        flash("⚠️ Depot location not recognised. Try a city name or 'lat, lon'.", "warning")
+        return redirect(url_for("ngo.ngo_dashboard"))
+
+    candidates = nearby_alerts(coords[0], coords[1], radius, config["ROUTE_MAX_CANDIDATES"])
+    alerts = {a.id: a for a, _ in candidates}
+    stops = [Stop(a.id, a.latitude, a.longitude, parse_quantity(a.quantity)) for a, _ in candidates]
+    route = plan_route(coords, stops, capacity, max_stops)
+
+    lost = []
+    if not dry_run and route.stops:
+        won = set(claim_alerts([s.id for s in route.stops], session["user_id"]))
+        lost = [s.id for s in route.stops if s.id not in won]
+        if lost:
+            # Another NGO got some stops first: re-plan over the ones we hold
+            route = plan_route(coords, [s for s in route.stops if s.id in won], capacity)
+
+    stops_out = [{
+        "id": s.id,
+        "description": alerts[s.id].description,
+        "quantity": alerts[s.id].quantity,
+        "location": alerts[s.id].location,
+        "latitude": s.latitude,
+        "longitude": s.longitude,
+        "load": s.load,
+        "leg_km": leg,
+    } for s, leg in zip(route.stops, route.legs_km)]
+    result = {
+        "depot": list(coords),
+        "stops": stops_out,
+        "return_km": route.legs_km[-1] if route.legs_km else 0.0,
+        "total_km": route.total_km,
+        "total_load": route.total_load,
+        "claimed": [] if dry_run else [s["id"] for s in stops_out],
+        "already_collected": lost,
+        "dry_run": dry_run,
+    }
+    if request.is_json:
+        return jsonify(result)
+    if not route.stops:
+        flash(f"⚠️ No available food posts within {radius:g} km fit this vehicle.", "warning")
+        return redirect(url_for("ngo.ngo_dashboard"))
+    if lost:
+        flash(f"⚠️ {len(lost)} stop(s) were collected by another NGO and dropped from the route.", "warning")
+    flash(f"🚚 Route with {len(stops_out)} stop(s), {route.total_km:.1f} km"
+          f"{' (preview, nothing claimed)' if dry_run else ''}.", "success")
+    return render_template("route_plan.html", route=result, depot=depot)
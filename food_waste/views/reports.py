@@ -0,0 +1,57 @@
+# food_waste/views/reports.py
+# Analytics dashboard, served from the trigger-maintained rollup tables (see
+# analytics.py), never from a scan of food_alert unless the rollups are not
+# installed. Archived alerts (see archive.py) are added from the archive.
+from datetime import datetime
+
+from flask import Blueprint, jsonify, redirect, render_template, request, session, url_for
+
+import analytics
+
+from ..models import db
+from ..services import services
+
+bp = Blueprint("reports", __name__)
+
+
+def analytics_summary():
+    conn = db.session.connection()
+    days = request.args.get("days", 30, type=int)
+    return analytics.summary(conn, days=max(1, min(days, 366)), use_rollups=analytics.has_analytics(conn),
+                             archived=services().archive.counts())
+
+def _date_arg(name):
+    value = request.args.get(name)
+    return datetime.strptime(value, "%Y-%m-%d") if value else None
+
+@bp.route("/analytics")
+def analytics_dashboard():
+    if "role" not in session:
+        return redirect(url_for("auth.login"))
+    return render_template("analytics.html", stats=analytics_summary())
+
+@bp.route("/analytics.json")
+def analytics_data():
+    if "role" not in session:
+        return redirect(url_for("auth.login"))
+    return jsonify(analytics_summary())
+
+@bp.route("/analytics/archive.json")
+def archive_data():
+    """Archived alerts collected in [start, end), counted per collection day and per class."""
+    if "role" not in session:
+        return redirect(url_for("auth.login"))
+    try:
+        start, end = _date_arg("start"), _date_arg("end")
+    except ValueError:
+        return jsonify({"error": "start and end must be YYYY-MM-DD"}), 400
+    rows = services().archive.query(start, end, columns=["collected_at", "prediction"])
+    by_day = rows["collected_at"].dt.strftime("%Y-%m-%d").value_counts().sort_index() if len(rows) else {}
+    by_class = rows["prediction"].fillna(analytics.UNCLASSIFIED).value_counts() if len(rows) else {}
+    return jsonify({
+        "start": start and start.date().isoformat(),
+        "end": end and end.date().isoformat(),
+        "collected": len(rows),
+        "by_day": [{"day": day, "collected": int(n)} for day, n in dict(by_day).items()],
+        "by_class": [{"prediction": label, "collected": int(n)} for label, n in dict(by_class).items()],
+    })
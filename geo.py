@@ -0,0 +1,173 @@
+# geo.py
+# Offline geocoding and nearest-alert search for NGO pickups.
+#
+# FoodAlert.location stays free text; on posting it is geocoded against a
+# local gazetteer (data/gazetteer.csv, name/latitude/longitude rows, no network
+# calls) or parsed as a literal "lat, lon", and the result is stored in
+# FoodAlert.latitude / longitude.
+#
+# Uncollected alerts with coordinates are mirrored into an SQLite R-tree
+# (food_alert_geo) by triggers on food_alert, so every code path that posts,
+# claims or deletes an alert keeps the index current. Nearest-N queries read
+# candidate boxes from the R-tree, growing the search radius until N alerts
+# are found or the requested radius is reached, and rank them by great-circle
+# distance. Databases without the rtree module (or not SQLite) fall back to a
+# bounding-box query on the indexed latitude/longitude columns.
+import csv
+import logging
+import math
+import os
+import re
+
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+EARTH_RADIUS_KM = 6371.0088
+DEFAULT_GAZETTEER = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "gazetteer.csv")
+GEO_INDEX_TABLE = "food_alert_geo"
+
+_LAT_LON = re.compile(r"^\s*(-?\d{1,2}(?:\.\d+)?)\s*[,;\s]\s*(-?\d{1,3}(?:\.\d+)?)\s*$")
+_WORD = re.compile(r"[a-z0-9]+")
+
+
+# ---------- Geocoding ----------
+def _words(value):
+    return _WORD.findall((value or "").lower())
+
+
+def parse_lat_lon(value):
+    match = _LAT_LON.match(value or "")
+    if not match:
+        return None
+    lat, lon = float(match.group(1)), float(match.group(2))
+    if -90 <= lat <= 90 and -180 <= lon <= 180:
+        return lat, lon
+    return None
+
+
+class Gazetteer:
+    def __init__(self, path=DEFAULT_GAZETTEER):
+        self.places = {}  # normalized name -> (lat, lon)
+        self.max_words = 1
+        if not os.path.exists(path):
+            logging.warning(f"Gazetteer {path} not found, only 'lat, lon' locations will be geocoded")
+            return
+        with open(path, newline="", encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                words = _words(row["name"])
+                if words:
+                    self.places[" ".join(words)] = (float(row["latitude"]), float(row["longitude"]))
+                    self.max_words = max(self.max_words, len(words))
+
+    def geocode(self, location):
+        """(lat, lon) for a "lat, lon" literal or a text naming a known place, else None.
+
+        Every word n-gram of the text is looked up; the longest match wins and,
+        among equally long ones, the last (addresses usually end with the city).
+        """
+        coords = parse_lat_lon(location)
+        if coords:
+            return coords
+        words = _words(location)
+        for n in range(min(self.max_words, len(words)), 0, -1):
+            for i in range(len(words) - n, -1, -1):
+                coords = self.places.get(" ".join(words[i:i + n]))
+                if coords:
+                    return coords
+        return None
+
+
+# ---------- Distance ----------
+def haversine_km(lat1, lon1, lat2, lon2):
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = phi2 - phi1
+    dlmb = math.radians(lon2 - lon1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlmb / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def bounding_box(lat, lon, radius_km):
+    """(min_lat, max_lat, min_lon, max_lon) enclosing the circle (no antimeridian wrap)."""
+    dlat = math.degrees(radius_km / EARTH_RADIUS_KM)
+    cos_lat = math.cos(math.radians(lat))
+    dlon = 180.0 if cos_lat < 1e-9 else min(180.0, math.degrees(radius_km / (EARTH_RADIUS_KM * cos_lat)))
+    return max(-90.0, lat - dlat), min(90.0, lat + dlat), lon - dlon, lon + dlon
+
+
+# ---------- Spatial index ----------
+def install_geo_index(conn):
+    """Create the R-tree and its sync triggers, then fill it. Returns False if unsupported."""
+    if conn.dialect.name != "sqlite":
+        return False
+    try:
+        conn.execute(text(f"CREATE VIRTUAL TABLE IF NOT EXISTS {GEO_INDEX_TABLE} "
+                          "USING rtree(id, min_lat, max_lat, min_lon, max_lon)"))
+    except OperationalError as e:
+        logging.warning(f"SQLite rtree module unavailable, nearest-alert search uses a bounding-box scan: {e}")
+        return False
+
+    indexed = "NEW.latitude IS NOT NULL AND NEW.longitude IS NOT NULL AND COALESCE(NEW.collected, 0) = 0"
+    insert = (f"INSERT OR REPLACE INTO {GEO_INDEX_TABLE} "
+              f"SELECT NEW.id, NEW.latitude, NEW.latitude, NEW.longitude, NEW.longitude WHERE {indexed};")
+    conn.execute(text(f"CREATE TRIGGER IF NOT EXISTS food_alert_geo_insert AFTER INSERT ON food_alert "
+                      f"BEGIN {insert} END"))
+    conn.execute(text(f"CREATE TRIGGER IF NOT EXISTS food_alert_geo_update "
+                      f"AFTER UPDATE OF collected, latitude, longitude ON food_alert "
+                      f"BEGIN DELETE FROM {GEO_INDEX_TABLE} WHERE id = OLD.id; {insert} END"))
+    conn.execute(text(f"CREATE TRIGGER IF NOT EXISTS food_alert_geo_delete AFTER DELETE ON food_alert "
+                      f"BEGIN DELETE FROM {GEO_INDEX_TABLE} WHERE id = OLD.id; END"))
+    rebuild_geo_index(conn)
+    return True
+
+
+def rebuild_geo_index(conn):
+    conn.execute(text(f"DELETE FROM {GEO_INDEX_TABLE}"))
+    conn.execute(text(
+        f"INSERT INTO {GEO_INDEX_TABLE} (id, min_lat, max_lat, min_lon, max_lon) "
+        "SELECT id, latitude, latitude, longitude, longitude FROM food_alert "
+        "WHERE latitude IS NOT NULL AND longitude IS NOT NULL AND COALESCE(collected, 0) = 0"
+    ))
+
+
+def has_geo_index(conn):
+    if conn.dialect.name != "sqlite":
+        return False
+    return conn.execute(text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+                        {"name": GEO_INDEX_TABLE}).first() is not None
+
+
+# The R-tree only selects candidates; its coordinates are 32-bit floats, so
+# distances are computed from the exact columns (one primary-key lookup each).
+_RTREE_QUERY = text(
+    f"SELECT a.id, a.latitude, a.longitude FROM {GEO_INDEX_TABLE} g JOIN food_alert a ON a.id = g.id "
+    "WHERE g.max_lat >= :min_lat AND g.min_lat <= :max_lat AND g.max_lon >= :min_lon AND g.min_lon <= :max_lon"
+)
+_SCAN_QUERY = text(
+    "SELECT id, latitude, longitude FROM food_alert "
+    "WHERE latitude BETWEEN :min_lat AND :max_lat AND longitude BETWEEN :min_lon AND :max_lon "
+    "AND (collected IS NULL OR NOT collected)"
+)
+
+
+def nearest_alert_ids(conn, lat, lon, radius_km, limit, use_index=True, initial_radius_km=1.0):
+    """[(alert_id, distance_km)] of the `limit` closest uncollected alerts within radius_km.
+
+    The search box starts at initial_radius_km and grows 4x at a time: once
+    `limit` alerts lie within the current radius, nothing outside it can be
+    closer, so dense areas never read the full radius_km box.
+    """
+    query = _RTREE_QUERY if use_index else _SCAN_QUERY
+    search_km = min(initial_radius_km, radius_km)
+    while True:
+        min_lat, max_lat, min_lon, max_lon = bounding_box(lat, lon, search_km)
+        rows = conn.execute(query, {"min_lat": min_lat, "max_lat": max_lat,
+                                    "min_lon": min_lon, "max_lon": max_lon}).fetchall()
+        found = []
+        for alert_id, alert_lat, alert_lon in rows:
+            distance = haversine_km(lat, lon, alert_lat, alert_lon)
+            if distance <= search_km:
+                found.append((alert_id, distance))
+        if len(found) >= limit or search_km >= radius_km:
+            found.sort(key=lambda item: (item[1], item[0]))
+            return found[:limit]
+        search_km = min(search_km * 4, radius_km)
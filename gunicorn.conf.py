@@ -0,0 +1,33 @@
+# gunicorn.conf.py
+# Production server settings:  gunicorn -c gunicorn.conf.py app:app
+#
+# With MODEL_LOADING=prefork the app (and the model) is created once in the
+# master and workers are forked from it, so the weights are shared
+# copy-on-write instead of loaded once per worker. Every other mode imports
+# the app in each worker. Either way each worker starts its own background
+# threads (job queue, upload GC, event poller, model loader) in
+# post_worker_init and stops them in worker_exit.
+import os
+
+wsgi_app = "app:app"
+bind = os.environ.get("BIND", "127.0.0.1:8000")
+workers = int(os.environ.get("WEB_CONCURRENCY", 2))
+# Each open NGO dashboard holds a thread for its event stream. Events fan out
+# through the alert_event table, so a stream may land on any worker.
+threads = int(os.environ.get("GUNICORN_THREADS", 16))
+preload_app = os.environ.get("MODEL_LOADING") == "prefork"
+
+# Workers share the job table: a job only counts as abandoned once it has sat
+# in "running" this long, so one worker never requeues another's live job.
+os.environ.setdefault("CLASSIFY_STALE_AFTER", "300")
+
+
+def post_worker_init(worker):
+    worker.wsgi.extensions["food_waste"].start()
+
+
+def worker_exit(server, worker):
+    # No app if the worker died while loading it
+    svc = getattr(getattr(worker, "wsgi", None), "extensions", {}).get("food_waste")
+    if svc is not None:
+        svc.stop()
@@ -0,0 +1,314 @@
+# inference.py
+# Inference backends and micro-batching scheduler for the food classifier.
+#
+# The web process never imports full TensorFlow: it runs the model exported by
+# export_model.py through one of the lightweight backends below.
+#
+#   tflite-int8 / tflite-fp16  TFLite flatbuffer via tflite_runtime / ai_edge_litert
+#   numpy                      pure NumPy forward pass over food_waste_model.npz
+#   keras                      the original .h5 through tf.keras (opt-in only)
+#
+# Backends take float32 pixels in 0..255 (see preprocessing.py): normalization
+# is the model's own Rescaling layer.
+#
+# BatchScheduler sits in front of a backend. Requests hand over a single
+# preprocessed image and block until their result is ready. A background
+# thread collects whatever is pending (up to max_batch_size, waiting at most
+# max_wait_ms for stragglers) and runs one forward pass for the whole batch, so
+# a burst of uploads pays the model call overhead once instead of once per
+# request.
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import Future
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+Prediction = namedtuple("Prediction", ["label", "probabilities"])
+
+# Exported artifacts, relative to the model directory (see export_model.py)
+MODEL_FILES = {
+    "keras": "food_waste_model.h5",
+    "numpy": "food_waste_model.npz",
+    "tflite-int8": "food_waste_model_int8.tflite",
+    "tflite-fp16": "food_waste_model_fp16.tflite",
+}
+# Order tried by load_backend("auto"). Keras is deliberately not in the list.
+AUTO_ORDER = ["tflite-int8", "tflite-fp16", "numpy"]
+
+_STOP = object()
+
+
+# ---------- Backends ----------
+class NumpyBackend:
+    """Forward pass of the train_model.py CNN using only NumPy.
+
+    Supports the layer types that architecture uses: Rescaling, Conv2D,
+    MaxPooling2D, Flatten, Dense and Dropout (a no-op at inference).
+    """
+    name = "numpy"
+
+    def __init__(self, path):
+        with np.load(path) as data:
+            self.layers = []
+            for i, spec in enumerate(json.loads(str(data["layers"]))):
+                weights = [data[f"layer{i}_{j}"].astype(np.float32)
+                           for j in range(spec.get("num_weights", 0))]
+                self.layers.append((spec, weights))
+
+    def predict(self, batch):
+        x = np.asarray(batch, dtype=np.float32)
+        for spec, weights in self.layers:
+            kind = spec["class_name"]
+            if kind == "Rescaling":
+                x = x * spec["scale"] + spec["offset"]
+            elif kind == "Conv2D":
+                x = _activation(_conv2d(x, weights[0], weights[1] if len(weights) > 1 else None,
+                                        spec["strides"], spec["padding"]), spec["activation"])
+            elif kind == "MaxPooling2D":
+                x = _max_pool(x, spec["pool_size"], spec["strides"] or spec["pool_size"])
+            elif kind == "Flatten":
+                x = x.reshape(x.shape[0], -1)
+            elif kind == "Dense":
+                x = x @ weights[0]
+                if len(weights) > 1:
+                    x = x + weights[1]
+                x = _activation(x, spec["activation"])
+            elif kind in ("Dropout", "InputLayer"):
+                continue
+            else:
+                raise ValueError(f"NumpyBackend does not support layer type {kind}")
+        return x
+
+
+def _conv2d(x, kernel, bias, strides, padding):
+    kh, kw, cin, cout = kernel.shape
+    if padding == "same":
+        ph, pw = kh - 1, kw - 1
+        x = np.pad(x, ((0, 0), (ph // 2, ph - ph // 2), (pw // 2, pw - pw // 2), (0, 0)))
+    # (N, Ho, Wo, C, kh, kw) view -> im2col matrix -> one matmul
+    windows = sliding_window_view(x, (kh, kw), axis=(1, 2))[:, ::strides[0], ::strides[1]]
+    n, ho, wo = windows.shape[:3]
+    cols = windows.transpose(0, 1, 2, 4, 5, 3).reshape(n * ho * wo, kh * kw * cin)
+    out = cols @ kernel.reshape(kh * kw * cin, cout)
+    if bias is not None:
+        out += bias
+    return out.reshape(n, ho, wo, cout)
+
+
+def _max_pool(x, pool_size, strides):
+    ph, pw = pool_size
+    if tuple(strides) == (ph, pw):
+        n, h, w, c = x.shape
+        h, w = h // ph, w // pw
+        return x[:, :h * ph, :w * pw].reshape(n, h, ph, w, pw, c).max(axis=(2, 4))
+    windows = sliding_window_view(x, (ph, pw), axis=(1, 2))[:, ::strides[0], ::strides[1]]
+    return windows.max(axis=(4, 5))
+
+
+def _activation(x, name):
+    if name == "relu":
+        return np.maximum(x, 0, out=x)
+    if name == "softmax":
+        e = np.exp(x - x.max(axis=-1, keepdims=True))
+        return e / e.sum(axis=-1, keepdims=True)
+    if name in (None, "linear"):
+        return x
+    raise ValueError(f"NumpyBackend does not support activation {name}")
+
+
+class TFLiteBackend:
+    """TFLite flatbuffer (float16 or int8 quantized) via the standalone runtime."""
+
+    def __init__(self, path, name="tflite", num_threads=None):
+        Interpreter = _import_tflite_interpreter()
+        self.name = name
+        self._interpreter = Interpreter(model_path=path, num_threads=num_threads)
+        self._interpreter.allocate_tensors()
+        self._input = self._interpreter.get_input_details()[0]
+        self._output = self._interpreter.get_output_details()[0]
+        self._batch_size = int(self._input["shape"][0])
+        self._lock = threading.Lock()
+
+    def predict(self, batch):
+        batch = np.asarray(batch, dtype=np.float32)
+        with self._lock:
+            if batch.shape[0] != self._batch_size:
+                self._interpreter.resize_tensor_input(self._input["index"], batch.shape)
+                self._interpreter.allocate_tensors()
+                self._input = self._interpreter.get_input_details()[0]
+                self._output = self._interpreter.get_output_details()[0]
+                self._batch_size = batch.shape[0]
+            self._interpreter.set_tensor(self._input["index"], _quantize(batch, self._input))
+            self._interpreter.invoke()
+            return _dequantize(self._interpreter.get_tensor(self._output["index"]), self._output)
+
+
+def _import_tflite_interpreter():
+    try:
+        from ai_edge_litert.interpreter import Interpreter
+    except ImportError:
+        try:
+            from tflite_runtime.interpreter import Interpreter
+        except ImportError:
+            raise ImportError("TFLite backend needs ai-edge-litert or tflite-runtime installed")
+    return Interpreter
+
+
+def _quantize(x, details):
+    scale, zero_point = details["quantization"]
+    if details["dtype"] == np.float32 or not scale:
+        return x.astype(details["dtype"])
+    info = np.iinfo(details["dtype"])
+    return np.clip(np.round(x / scale + zero_point), info.min, info.max).astype(details["dtype"])
+
+
+def _dequantize(x, details):
+    scale, zero_point = details["quantization"]
+    if details["dtype"] == np.float32 or not scale:
+        return x.astype(np.float32)
+    return (x.astype(np.float32) - zero_point) * scale
+
+
+class KerasBackend:
+    """The original .h5 model through tf.keras. Imports full TensorFlow."""
+    name = "keras"
+
+    def __init__(self, path):
+        import tensorflow as tf
+        self._model = tf.keras.models.load_model(path)
+
+    def predict(self, batch):
+        return np.asarray(self._model.predict_on_batch(np.asarray(batch, dtype=np.float32)))
+
+
+def load_backend(kind="auto", model_dir="."):
+    """Return the requested inference backend.
+
+    "auto" tries AUTO_ORDER and picks the first exported model that can be
+    loaded; it never falls back to Keras so the web process stays free of
+    TensorFlow. Raises FileNotFoundError if nothing has been exported yet.
+    """
+    kinds = AUTO_ORDER if kind == "auto" else [kind]
+    errors = []
+    for name in kinds:
+        if name not in MODEL_FILES:
+            raise ValueError(f"Unknown inference backend: {name}")
+        path = os.path.join(model_dir, MODEL_FILES[name])
+        if not os.path.exists(path):
+            errors.append(f"{name}: {path} not found")
+            continue
+        try:
+            if name == "numpy":
+                return NumpyBackend(path)
+            if name == "keras":
+                return KerasBackend(path)
+            return TFLiteBackend(path, name=name)
+        except ImportError as e:
+            errors.append(f"{name}: {e}")
+    raise FileNotFoundError("No usable inference backend (run export_model.py?): " + "; ".join(errors))
+
+
+# ---------- Batch scheduler ----------
+class BatchScheduler:
+    def __init__(self, predict_fn, class_labels, max_batch_size=16, max_wait_ms=5.0):
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be at least 1")
+        self.predict_fn = predict_fn
+        self.class_labels = list(class_labels)
+        self.max_batch_size = int(max_batch_size)
+        self.max_wait = max(float(max_wait_ms), 0.0) / 1000.0
+
+        self._inputs = None  # float32 batch buffer, reused by every forward pass
+        self._queue = queue.Queue()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="inference-batcher", daemon=True)
+        self._thread.start()
+
+    # ---------- Public API ----------
+    def submit(self, img_array) -> Future:
+        """Queue one image of shape (H, W, C) and return a Future of its Prediction.
+
+        uint8 pixels straight from preprocessing.decode() are fine: they are
+        converted once, when copied into the batch.
+        """
+        if self._closed:
+            raise RuntimeError("BatchScheduler is closed")
+        img_array = np.asarray(img_array)
+        if img_array.ndim == 4 and img_array.shape[0] == 1:
+            img_array = img_array[0]
+        future = Future()
+        self._queue.put((img_array, future))
+        return future
+
+    def predict(self, img_array, timeout=None) -> Prediction:
+        """Blocking helper used by the request handlers."""
+        return self.submit(img_array).result(timeout=timeout)
+
+    def close(self, timeout=None):
+        """Stop accepting work, finish what is queued and join the worker."""
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(_STOP)
+        self._thread.join(timeout)
+
+    # ---------- Worker ----------
+    def _run(self):
+        stopping = False
+        while not stopping:
+            item = self._queue.get()
+            if item is _STOP:
+                break
+
+            batch = [item]
+            deadline = time.monotonic() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                try:
+                    if remaining > 0:
+                        item = self._queue.get(timeout=remaining)
+                    else:
+                        # Past the deadline: still take anything already queued.
+                        item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+
+            self._run_batch(batch)
+
+    def _run_batch(self, batch):
+        live = [(img, future) for img, future in batch if future.set_running_or_notify_cancel()]
+        if not live:
+            return
+        futures = [future for _, future in live]
+
+        try:
+            inputs = self._batch_inputs([img for img, _ in live])
+            probs = np.asarray(self.predict_fn(inputs))
+        except Exception as e:
+            logging.error(f"Batched prediction failed for {len(futures)} image(s): {e}", exc_info=True)
+            for future in futures:
+                future.set_exception(e)
+            return
+
+        for future, row in zip(futures, probs):
+            future.set_result(Prediction(self.class_labels[int(np.argmax(row))], row))
+
+    def _batch_inputs(self, images):
+        """Copy the images into the reused float32 buffer; returns a view of the filled rows."""
+        shape = images[0].shape
+        if self._inputs is None or self._inputs.shape[1:] != shape:
+            self._inputs = np.empty((self.max_batch_size, *shape), dtype=np.float32)
+        inputs = self._inputs[:len(images)]
+        for row, img in zip(inputs, images):
+            row[...] = img
+        return inputs
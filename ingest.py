@@ -0,0 +1,196 @@
+# ingest.py
+# Reading and validating bulk alert uploads (POST /bulk_alerts).
+#
+# A batch is one CSV with a header row
+#
+#   description,quantity,location,image
+#   Veg biryani,40 plates,Sector 17 canteen,biryani.jpg
+#
+# plus the images it names, sent either as
+#
+#   multipart   an "alerts" CSV file and any number of "images" files,
+#               matched on file name (any folder in either name is ignored)
+#   zip         an "alerts" .zip holding the CSV and the images; image paths
+#               are relative to the CSV's folder inside the archive
+#
+# The CSV is read row by row from the spooled upload (or straight out of the
+# zip), never loaded whole. Each image is opened once while validating, to
+# check that Pillow can parse it, and again when it is stored. Each row is
+# validated on its own: a bad row is reported with its errors and does not
+# stop the rest. Only a batch that cannot be read at all (no CSV, missing
+# columns, too many rows) raises BatchError.
+import csv
+import io
+import os
+import posixpath
+import zipfile
+from collections import namedtuple
+
+from PIL import Image
+
+COLUMNS = ("description", "quantity", "location", "image")
+MAX_LENGTHS = {"description": 200, "quantity": 50, "location": 100}  # FoodAlert column sizes
+
+# What storing an image from a batch can raise: truncated upload, corrupt zip member
+IMAGE_READ_ERRORS = (OSError, ValueError, zipfile.BadZipFile)
+
+# number: 1-based data row (the header is not counted); errors: [] when valid
+Row = namedtuple("Row", ["number", "description", "quantity", "location", "image", "errors"])
+
+
+class BatchError(ValueError):
+    """The upload is not a readable batch (the message says why)."""
+
+
+class MultipartBatch:
+    """CSV file plus image files from the same multipart request."""
+
+    def __init__(self, csv_file, image_files):
+        self.csv_file = csv_file
+        self.images = {_file_name(f.filename): f for f in image_files if f and f.filename}
+
+    def open_csv(self):
+        self.csv_file.stream.seek(0)
+        return _NonClosing(self.csv_file.stream)
+
+    def has_image(self, name):
+        return _file_name(name) in self.images
+
+    def image_size(self, name):
+        f = self.images[_file_name(name)]
+        f.stream.seek(0, os.SEEK_END)
+        size = f.stream.tell()
+        f.stream.seek(0)
+        return size
+
+    def open_image(self, name):
+        stream = self.images[_file_name(name)].stream
+        stream.seek(0)  # the same image may back several rows
+        return _NonClosing(stream)
+
+
+def _file_name(path):
+    """A CSV path or upload name without its folders ("photos/a.jpg" -> "a.jpg")."""
+    return posixpath.basename(path.replace("\\", "/"))
+
+
+class ZipBatch:
+    """CSV and images inside one zip archive."""
+
+    def __init__(self, stream):
+        try:
+            self.zip = zipfile.ZipFile(stream)
+        except zipfile.BadZipFile:
+            raise BatchError("alerts is not a valid zip archive")
+        entries = {i.filename: i for i in self.zip.infolist() if not i.is_dir()}
+        csvs = [n for n in entries if n.lower().endswith(".csv") and not posixpath.basename(n).startswith(".")]
+        if len(csvs) != 1:
+            raise BatchError(f"the zip archive must contain exactly one .csv file (found {len(csvs)})")
+        self.csv_name = csvs[0]
+        self.base = posixpath.dirname(self.csv_name)
+        self.entries = entries
+
+    def _entry(self, name):
+        return self.entries.get(posixpath.normpath(posixpath.join(self.base, name)))
+
+    def open_csv(self):
+        return self.zip.open(self.csv_name)
+
+    def has_image(self, name):
+        return self._entry(name) is not None
+
+    def image_size(self, name):
+        return self._entry(name).file_size
+
+    def open_image(self, name):
+        return self.zip.open(self._entry(name))
+
+
+class _NonClosing(io.BufferedIOBase):
+    """Readable view of a stream that leaves it open (multipart files are reused)."""
+
+    def __init__(self, stream):
+        super().__init__()
+        self.stream = stream
+
+    def readable(self):
+        return True
+
+    def read(self, size=-1):
+        return self.stream.read(size)
+
+    read1 = read
+
+
+def open_batch(files):
+    """The batch in a request's files (werkzeug MultiDict); raises BatchError."""
+    upload = files.get("alerts")
+    if upload is None or not upload.filename:
+        raise BatchError('send the batch as an "alerts" file (.csv with "images" files, or .zip)')
+    if upload.filename.lower().endswith(".zip"):
+        return ZipBatch(upload.stream)
+    return MultipartBatch(upload, files.getlist("images"))
+
+
+def image_error(batch, name):
+    """Why Pillow cannot parse this image of the batch, or None if it can."""
+    try:
+        with batch.open_image(name) as stream, Image.open(stream) as img:
+            img.verify()
+    except Image.UnidentifiedImageError:
+        return f"image {name} is not a readable image"
+    except Exception as e:  # verify() raises anything from OSError to SyntaxError on a corrupt file
+        return f"image {name} is not a readable image ({e})"
+    return None
+
+
+def validate(number, record, batch, allowed_extensions, max_image_bytes, image_errors):
+    """The Row for one CSV record; image_errors memoises image_error() per image name."""
+    fields = {c: (record.get(c) or "").strip() for c in COLUMNS}
+    errors = [f"{c} is required" for c in COLUMNS if not fields[c]]
+    errors += [f"{c} is longer than {n} characters" for c, n in MAX_LENGTHS.items() if len(fields[c]) > n]
+    image = fields["image"]
+    if image:
+        extension = image.rsplit(".", 1)[1].lower() if "." in image else ""
+        if extension not in allowed_extensions:
+            errors.append(f"image {image} is not one of {', '.join(sorted(allowed_extensions))}")
+        elif not batch.has_image(image):
+            errors.append(f"image {image} is not in the batch")
+        elif batch.image_size(image) > max_image_bytes:
+            errors.append(f"image {image} is larger than {max_image_bytes // (1024 * 1024)} MB")
+        else:
+            if image not in image_errors:
+                image_errors[image] = image_error(batch, image)
+            if image_errors[image]:
+                errors.append(image_errors[image])
+    return Row(number, fields["description"], fields["quantity"], fields["location"], image, errors)
+
+
+def read_rows(batch, allowed_extensions, max_image_bytes, max_rows):
+    """Every Row of the batch's CSV, read as a stream; raises BatchError.
+
+    The whole CSV is read before anything is inserted, so a batch that turns
+    out to be unreadable halfway through creates no alerts.
+    """
+    with io.TextIOWrapper(batch.open_csv(), encoding="utf-8-sig", newline="") as text:
+        reader = csv.DictReader(text)
+        try:
+            header = [(name or "").strip().lower() for name in reader.fieldnames or []]
+        except (UnicodeDecodeError, csv.Error) as e:
+            raise BatchError(f"the CSV header could not be read: {e}")
+        missing = [c for c in COLUMNS if c not in header]
+        if missing:
+            raise BatchError(f"the CSV is missing column(s): {', '.join(missing)}")
+        reader.fieldnames = header
+
+        rows, image_errors = [], {}
+        while True:
+            try:
+                record = next(reader)
+            except StopIteration:
+                return rows
+            except (UnicodeDecodeError, csv.Error) as e:
+                raise BatchError(f"the CSV could not be read after row {len(rows)}: {e}")
+            if len(rows) == max_rows:
+                raise BatchError(f"a batch holds at most {max_rows} rows")
+            rows.append(validate(len(rows) + 1, record, batch, allowed_extensions, max_image_bytes, image_errors))
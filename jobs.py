@@ -0,0 +1,160 @@
+# jobs.py
+# Persistent background job queue with a local worker pool.
+#
+# Jobs are rows in a table (food_waste/models.py defines ClassificationJob), so
+# queued work survives restarts: on startup anything left "running" by a dead
+# process is put back to "pending". With several worker processes sharing the
+# table (gunicorn), pass stale_after instead: only jobs "running" for longer
+# than that are requeued, checked periodically, so one process never takes
+# back a sibling's live job. Workers claim a job with a conditional UPDATE (the
+# same pattern claim_alerts uses), run the handler outside any transaction,
+# then mark it done, or reschedule it with exponential backoff until
+# max_attempts is reached.
+#
+# Job model columns used here: id, status, attempts, run_after, last_error,
+# updated_at.
+import logging
+import threading
+import time
+from datetime import datetime, timedelta
+
+PENDING, RUNNING, DONE, FAILED = "pending", "running", "done", "failed"
+
+
+class JobQueue:
+    def __init__(self, app, db, model, handler, on_failure=None, workers=2,
+                 max_attempts=3, backoff_seconds=10, poll_interval=2.0, stale_after=None):
+        self.app = app
+        self.db = db
+        self.model = model
+        self.handler = handler
+        self.on_failure = on_failure
+        self.workers = workers
+        self.max_attempts = max_attempts
+        self.backoff = backoff_seconds
+        self.poll_interval = poll_interval
+        self.stale_after = stale_after
+
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._next_recover = 0.0
+        self._recover_lock = threading.Lock()
+        self._threads = []
+
+    # ---------- Producer side ----------
+    def enqueue(self, **fields):
+        """Add a job to the current session; call notify() after committing."""
+        job = self.model(status=PENDING, attempts=0, run_after=datetime.utcnow(), **fields)
+        self.db.session.add(job)
+        return job
+
+    def enqueue_many(self, rows):
+        """Add one job per dict of fields with a single bulk INSERT; call notify() after committing."""
+        if rows:
+            now = datetime.utcnow()
+            self.db.session.execute(self.db.insert(self.model),
+                                    [dict(status=PENDING, attempts=0, run_after=now, **fields) for fields in rows])
+
+    def notify(self):
+        self._wake.set()
+
+    # ---------- Workers ----------
+    def start(self):
+        for i in range(self.workers):
+            t = threading.Thread(target=self._run, name=f"job-worker-{i}", daemon=True)
+            t.start()
+            self._threads.append(t)
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+
+    def _recover(self):
+        """Requeue jobs a dead process left running.
+
+        Without stale_after: every running job, once per process. With it: jobs
+        not updated for stale_after seconds, at most every stale_after / 4.
+        """
+        with self._recover_lock:
+            now = time.monotonic()
+            if now < self._next_recover:
+                return
+            Job = self.model
+            query = Job.query.filter_by(status=RUNNING)
+            if self.stale_after is not None:
+                query = query.filter(Job.updated_at < datetime.utcnow() - timedelta(seconds=self.stale_after))
+            count = query.update({"status": PENDING, "updated_at": datetime.utcnow()}, synchronize_session=False)
+            self.db.session.commit()
+            if count:
+                logging.info(f"Requeued {count} interrupted job(s)")
+            self._next_recover = now + self.stale_after / 4 if self.stale_after is not None else float("inf")
+
+    def _claim_next(self):
+        Job = self.model
+        while True:
+            now = datetime.utcnow()
+            job = (Job.query.filter(Job.status == PENDING, Job.run_after <= now)
+                   .order_by(Job.run_after, Job.id).first())
+            if job is None:
+                return None
+            won = Job.query.filter_by(id=job.id, status=PENDING).update(
+                {"status": RUNNING, "attempts": Job.attempts + 1, "updated_at": now},
+                synchronize_session=False)
+            self.db.session.commit()
+            if won:
+                self.db.session.refresh(job)
+                return job
+            # Another worker took it first; look for the next one.
+
+    def run_pending(self):
+        """Process jobs until none are due. Returns the number processed."""
+        processed = 0
+        with self.app.app_context():
+            self._recover()
+            while not self._stop.is_set():
+                job = self._claim_next()
+                if job is None:
+                    break
+                self._execute(job)
+                processed += 1
+        return processed
+
+    def _execute(self, job):
+        Job = self.model
+        try:
+            self.handler(job)
+        except Exception as e:
+            self.db.session.rollback()
+            final = job.attempts >= self.max_attempts
+            logging.error(f"Job {job.id} attempt {job.attempts} failed{' permanently' if final else ''}: {e}",
+                          exc_info=True)
+            now = datetime.utcnow()
+            Job.query.filter_by(id=job.id).update({
+                "status": FAILED if final else PENDING,
+                "last_error": str(e)[:500],
+                "run_after": now + timedelta(seconds=self.backoff * 2 ** (job.attempts - 1)),
+                "updated_at": now,
+            }, synchronize_session=False)
+            self.db.session.commit()
+            if final and self.on_failure:
+                try:
+                    self.on_failure(job)
+                except Exception as hook_error:
+                    self.db.session.rollback()
+                    logging.error(f"Job {job.id} failure hook failed: {hook_error}", exc_info=True)
+            return
+
+        Job.query.filter_by(id=job.id).update(
+            {"status": DONE, "last_error": None, "updated_at": datetime.utcnow()}, synchronize_session=False)
+        self.db.session.commit()
+
+    def _run(self):
+        while not self._stop.is_set():
+            # Sleep first: gives the app time to create its tables on startup,
+            # and enqueue() callers wake us immediately via notify().
+            self._wake.wait(self.poll_interval)
+            self._wake.clear()
+            try:
+                self.run_pending()
+            except Exception as e:
+                logging.warning(f"Job worker poll failed: {e}")
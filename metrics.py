@@ -0,0 +1,304 @@
+# metrics.py
+# Request latency histograms, upload stage timers and an on-demand sampling
+# profiler, exported in the Prometheus text format.
+#
+#   http_request_duration_seconds{method, endpoint, status}   every request
+#   upload_stage_duration_seconds{stage}                       save / decode /
+#                                                              preprocess /
+#                                                              predict / commit
+#   inference_batch_duration_seconds, inference_batch_size     one forward pass
+#
+# Histograms are plain counters behind a lock, so recording costs a bisect and
+# a few additions. Values are per process: with several workers, scrape each
+# one (or sum them in Prometheus).
+#
+# Profiling: when PROFILE_TOKEN is set, a request carrying
+# "X-Profile: <token>" is sampled by a background OS thread (also under
+# gevent, see SamplingProfiler) every few milliseconds. The folded stacks are
+# written to PROFILE_DIR (flamegraph.pl / speedscope input) and the file name
+# is returned in the X-Profile response header.
+import _thread
+import logging
+import os
+import sys
+import threading
+import time
+from bisect import bisect_left
+from collections import Counter
+from contextlib import contextmanager
+
+from flask import Response, abort, g, has_request_context, request
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names, values, extra=""):
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value):
+    return "+Inf" if value == float("inf") else repr(float(value)) if isinstance(value, float) else str(value)
+
+
+# ---------- Metric types ----------
+class Histogram:
+    def __init__(self, name, help_text, label_names=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(sorted(buckets))
+        self._series = {}  # label values -> [bucket counts..., sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, value, *label_values):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [0] * (len(self.buckets) + 2)
+            if index < len(self.buckets):
+                series[index] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def snapshot(self):
+        with self._lock:
+            return {labels: list(series) for labels, series in self._series.items()}
+
+    def expose(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for labels, series in sorted(self.snapshot().items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets, series):
+                cumulative += count
+                le = 'le="' + _number(bound) + '"'
+                lines.append(f"{self.name}_bucket{_labels(self.label_names, labels, le)} {cumulative}")
+            le = 'le="+Inf"'
+            lines.append(f"{self.name}_bucket{_labels(self.label_names, labels, le)} {series[-1]}")
+            lines.append(f"{self.name}_sum{_labels(self.label_names, labels)} {series[-2]!r}")
+            lines.append(f"{self.name}_count{_labels(self.label_names, labels)} {series[-1]}")
+        return lines
+
+
+class Gauges:
+    """Values read at scrape time: fn() -> {label value: number} (or a number)."""
+
+    def __init__(self, name, help_text, fn, label_name=None, kind="gauge"):
+        self.name = name
+        self.help = help_text
+        self.fn = fn
+        self.label_name = label_name
+        self.kind = kind
+
+    def expose(self):
+        try:
+            values = self.fn()
+        except Exception as e:
+            logging.warning(f"Metric {self.name} unavailable: {e}")
+            return []
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        if isinstance(values, dict):
+            for key, value in sorted(values.items()):
+                lines.append(f"{self.name}{_labels((self.label_name,), (key,))} {_number(value)}")
+        else:
+            lines.append(f"{self.name} {_number(values)}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric):
+        """Add a metric; one registered under the same name (a second app) is replaced."""
+        self._metrics = [m for m in self._metrics if m.name != metric.name] + [metric]
+        return metric
+
+    def histogram(self, *args, **kwargs):
+        return self.register(Histogram(*args, **kwargs))
+
+    def gauge(self, *args, **kwargs):
+        return self.register(Gauges(*args, **kwargs))
+
+    def expose(self):
+        return "\n".join(line for metric in self._metrics for line in metric.expose()) + "\n"
+
+
+registry = Registry()
+request_latency = registry.histogram(
+    "http_request_duration_seconds", "Time spent handling a request.", ("method", "endpoint", "status"))
+stage_latency = registry.histogram(
+    "upload_stage_duration_seconds", "Time spent in each stage of handling an uploaded image.", ("stage",))
+batch_latency = registry.histogram(
+    "inference_batch_duration_seconds", "Duration of one batched forward pass.", ("backend",))
+batch_size = registry.histogram(
+    "inference_batch_size", "Images per batched forward pass.", ("backend",), buckets=BATCH_SIZE_BUCKETS)
+
+
+# ---------- Stage timers ----------
+@contextmanager
+def stage(name):
+    """Time a block into upload_stage_duration_seconds{stage=name}.
+
+    Inside a request the timing is also added to its Server-Timing header.
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        stage_latency.observe(elapsed, name)
+        if has_request_context():
+            timings = g.setdefault("stage_timings", {})
+            timings[name] = timings.get(name, 0.0) + elapsed
+
+
+def timed_predict(predict_fn, backend_name):
+    """Wrap a backend's predict so every batched call is recorded."""
+    def predict(batch):
+        start = time.perf_counter()
+        try:
+            return predict_fn(batch)
+        finally:
+            batch_latency.observe(time.perf_counter() - start, backend_name)
+            batch_size.observe(len(batch), backend_name)
+    return predict
+
+
+# ---------- Sampling profiler ----------
+def _os_threads():
+    """get_ident, start_new_thread, allocate_lock and sleep for real OS threads.
+
+    gevent's monkey-patching turns the threading primitives into greenlet
+    ones: a sampler started through them would run on the event loop it is
+    meant to observe, and its thread ids would not be the OS thread ids that
+    sys._current_frames() is keyed by. The originals are used instead.
+    """
+    monkey = sys.modules.get("gevent.monkey")
+    if monkey is None:
+        return _thread.get_ident, _thread.start_new_thread, _thread.allocate_lock, time.sleep
+    return (monkey.get_original("_thread", "get_ident"), monkey.get_original("_thread", "start_new_thread"),
+            monkey.get_original("_thread", "allocate_lock"), monkey.get_original("time", "sleep"))
+
+
+class SamplingProfiler:
+    """Samples the calling thread's Python stack every `interval` seconds until stopped.
+
+    Create it on the thread to profile. Under gevent that thread runs many
+    greenlets: while the request's greenlet is parked the sampler reads its
+    own frame (gr_frame), while it runs the OS thread's current frame.
+    """
+
+    def __init__(self, interval=0.005):
+        get_ident, self._start_new_thread, allocate_lock, self._sleep = _os_threads()
+        self.thread_id = get_ident()
+        self.greenlet = sys.modules["greenlet"].getcurrent() if "gevent.monkey" in sys.modules else None
+        self.interval = interval
+        self.stacks = Counter()
+        self.samples = 0
+        self._stopping = False
+        self._done = allocate_lock()
+
+    def start(self):
+        self._done.acquire()
+        self._start_new_thread(self._run, ())
+        return self
+
+    def stop(self):
+        self._stopping = True
+        self._done.acquire()  # the sampler releases it on its way out
+        self._done.release()
+        return self
+
+    def _run(self):
+        try:
+            while True:
+                self._sleep(self.interval)
+                if self._stopping:
+                    break
+                self._sample()
+        finally:
+            self._done.release()
+
+    def _sample(self):
+        frame = self.greenlet.gr_frame if self.greenlet is not None else None  # None while it runs
+        if frame is None:
+            frame = sys._current_frames().get(self.thread_id)
+        if frame is None:
+            return
+        stack = []
+        while frame is not None:
+            code = frame.f_code
+            stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}:{frame.f_lineno}")
+            frame = frame.f_back
+        self.stacks[";".join(reversed(stack))] += 1
+        self.samples += 1
+
+    def folded(self):
+        """Collapsed stacks, one "frame;frame;frame count" line each."""
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+
+# ---------- Flask integration ----------
+def init_app(app):
+    """Time every request, honour X-Profile and serve /metrics.
+
+    Reads METRICS_TOKEN, PROFILE_TOKEN, PROFILE_DIR and PROFILE_INTERVAL_MS
+    from app.config.
+    """
+
+    @app.before_request
+    def start_timer():
+        g.request_start = time.perf_counter()
+        token = app.config["PROFILE_TOKEN"]
+        if token and request.headers.get("X-Profile") == token:
+            g.profiler = SamplingProfiler(app.config["PROFILE_INTERVAL_MS"] / 1000.0).start()
+
+    @app.after_request
+    def record_request(response):
+        start = g.pop("request_start", None)
+        if start is None:
+            return response
+        elapsed = time.perf_counter() - start
+        # Route rule, not the raw path, so ids in URLs don't create new series
+        endpoint = request.url_rule.rule if request.url_rule else "<unmatched>"
+        request_latency.observe(elapsed, request.method, endpoint, response.status_code)
+
+        timings = g.pop("stage_timings", {})
+        if timings:
+            response.headers["Server-Timing"] = ", ".join(
+                f"{name};dur={seconds * 1000:.2f}" for name, seconds in timings.items())
+
+        profiler = g.pop("profiler", None)
+        if profiler is not None:
+            profiler.stop()
+            os.makedirs(app.config["PROFILE_DIR"], exist_ok=True)
+            filename = (f"{time.strftime('%Y%m%d-%H%M%S')}-{request.endpoint or 'unmatched'}"
+                        f"-{os.getpid()}-{threading.get_ident()}.folded")
+            with open(os.path.join(app.config["PROFILE_DIR"], filename), "w") as f:
+                f.write(profiler.folded())
+            response.headers["X-Profile"] = filename
+            logging.info(f"📈 Profiled {request.method} {request.path}: {profiler.samples} samples "
+                         f"in {elapsed * 1000:.1f} ms -> {filename}")
+        return response
+
+    @app.teardown_request
+    def stop_profiler(exc):
+        profiler = g.pop("profiler", None)  # only left over if after_request never ran
+        if profiler is not None:
+            profiler.stop()
+
+    @app.route("/metrics")
+    def metrics():
+        token = app.config["METRICS_TOKEN"]
+        if token and request.headers.get("Authorization") != f"Bearer {token}":
+            abort(401)
+        return Response(registry.expose(), mimetype="text/plain; version=0.0.4")
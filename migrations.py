@@ -0,0 +1,115 @@
+# migrations.py
+# Ordered, idempotent schema migrations for existing databases.
+#
+# db.create_all() only creates missing tables; it never adds columns or
+# indexes to a food_waste.db that already exists. Each migration below runs
+# once and is recorded in the schema_migrations table. New databases get the
+# same schema from the models, so every step must tolerate already being
+# applied (CREATE INDEX IF NOT EXISTS, column existence checks).
+#
+# Usage:
+#   python migrations.py            # apply pending migrations to the app database
+import logging
+from datetime import datetime
+
+from sqlalchemy import inspect, text
+
+
+def _add_column(conn, table, column, ddl):
+    if column not in {c["name"] for c in inspect(conn).get_columns(table)}:
+        conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {ddl}"))
+
+
+def food_alert_image_columns(conn):
+    # Databases created by server.py predate the image/prediction columns.
+    _add_column(conn, "food_alert", "image_filename", "VARCHAR(200)")
+    _add_column(conn, "food_alert", "prediction", "VARCHAR(100)")
+
+
+def food_alert_dashboard_indexes(conn):
+    # NGO feed: WHERE collected = 0 ORDER BY date_posted DESC, id DESC
+    conn.execute(text("CREATE INDEX IF NOT EXISTS ix_food_alert_collected_date "
+                      "ON food_alert (collected, date_posted, id)"))
+    # Mess feed: WHERE posted_by = ? ORDER BY date_posted DESC, id DESC
+    conn.execute(text("CREATE INDEX IF NOT EXISTS ix_food_alert_posted_by_date "
+                      "ON food_alert (posted_by, date_posted, id)"))
+
+
+def food_alert_collection_claims(conn):
+    # Who claimed an alert and when (set atomically by claim_alerts)
+    _add_column(conn, "food_alert", "collected_by", 'INTEGER REFERENCES "user" (id)')
+    _add_column(conn, "food_alert", "collected_at", "TIMESTAMP")
+
+
+def food_alert_coordinates(conn):
+    # Geocoded pickup point plus the R-tree behind the nearest-alerts search
+    from geo import Gazetteer, install_geo_index
+
+    _add_column(conn, "food_alert", "latitude", "FLOAT")
+    _add_column(conn, "food_alert", "longitude", "FLOAT")
+    conn.execute(text("CREATE INDEX IF NOT EXISTS ix_food_alert_lat_lon ON food_alert (latitude, longitude)"))
+
+    gazetteer = Gazetteer()
+    rows = conn.execute(text("SELECT id, location FROM food_alert WHERE latitude IS NULL")).fetchall()
+    updates = []
+    for alert_id, location in rows:
+        coords = gazetteer.geocode(location)
+        if coords:
+            updates.append({"id": alert_id, "lat": coords[0], "lon": coords[1]})
+    if updates:
+        conn.execute(text("UPDATE food_alert SET latitude = :lat, longitude = :lon WHERE id = :id"), updates)
+    install_geo_index(conn)
+
+
+def analytics_rollups(conn):
+    # Trigger-maintained per-day / per-poster / per-class counts (see analytics.py)
+    from analytics import install_analytics
+
+    install_analytics(conn)
+
+
+def archival_indexes(conn):
+    # Archiver: WHERE collected = 1 AND collected_at < ?, then its jobs by alert_id (see archive.py)
+    conn.execute(text("CREATE INDEX IF NOT EXISTS ix_food_alert_collected_at "
+                      "ON food_alert (collected, collected_at)"))
+    conn.execute(text("CREATE INDEX IF NOT EXISTS ix_classification_job_alert_id "
+                      "ON classification_job (alert_id)"))
+
+
+MIGRATIONS = [
+    ("0001_food_alert_image_columns", food_alert_image_columns),
+    ("0002_food_alert_dashboard_indexes", food_alert_dashboard_indexes),
+    ("0003_food_alert_collection_claims", food_alert_collection_claims),
+    ("0004_food_alert_coordinates", food_alert_coordinates),
+    ("0005_analytics_rollups", analytics_rollups),
+    ("0006_archival_indexes", archival_indexes),
+]
+
+
+def run_migrations(engine):
+    """Apply every migration not yet recorded; returns the ids applied."""
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE IF NOT EXISTS schema_migrations ("
+                          "id VARCHAR(100) PRIMARY KEY, applied_at TIMESTAMP NOT NULL)"))
+        applied = {row[0] for row in conn.execute(text("SELECT id FROM schema_migrations"))}
+
+    done = []
+    for migration_id, migrate in MIGRATIONS:
+        if migration_id in applied:
+            continue
+        with engine.begin() as conn:
+            migrate(conn)
+            conn.execute(text("INSERT INTO schema_migrations (id, applied_at) VALUES (:id, :at)"),
+                         {"id": migration_id, "at": datetime.utcnow()})
+        logging.info(f"Applied migration {migration_id}")
+        done.append(migration_id)
+    return done
+
+
+if __name__ == "__main__":
+    from app import app, db
+
+    with app.app_context():
+        db.create_all()
+        applied = run_migrations(db.engine)
+    print(f"Applied {len(applied)} migration(s): {', '.join(applied) or 'none pending'}")
@@ -1,24 +1,36 @@
-import numpy as np
-from tensorflow.keras.models import load_model
-from tensorflow.keras.preprocessing import image
+# predict_image.py
+# Classify one or a few images from the command line.
+#
+#   python predict_image.py dataset/train/fruits/apple.jpg
+#   python predict_image.py photo1.jpg photo2.jpg --backend keras
+#
+# For thousands of images use bulk_classify.py, which decodes in parallel
+# and batches the model calls.
+import argparse
+import os
 
-# Load your trained model
-model = load_model('food_waste_model.h5')
+import numpy as np
 
-# List of classes in order
-classes = ['cooked_food', 'fruits', 'others', 'vegetables']
+from food_waste.model_registry import CLASS_LABELS
+from inference import load_backend
+from preprocessing import BatchBuffer
 
-# Path of the test image
-img_path =r'C:\Users\mukul\Downloads\food_waste_ai_project\dataset\train\fruits\apple.jpg'
-  # Change this to your image file name
-img = image.load_img(img_path, target_size=(128, 128))
+parser = argparse.ArgumentParser(description="Classify food images")
+parser.add_argument("images", nargs="+", help="image file(s)")
+parser.add_argument("--backend", default=os.environ.get("INFERENCE_BACKEND", "auto"),
+                    help="auto | tflite-int8 | tflite-fp16 | numpy | keras")
+parser.add_argument("--model-dir", default=os.environ.get("MODEL_DIR", "."))
+args = parser.parse_args()
 
-# Convert image to array and normalize
-img_array = image.img_to_array(img)
-img_array = np.expand_dims(img_array, axis=0) / 255.0
+# Load your trained model
+model = load_backend(args.backend, args.model_dir)
 
-# Predict
-predictions = model.predict(img_array)
-predicted_class = classes[np.argmax(predictions)]
+# Decode the images into one batch and predict it (the model normalizes the pixels itself)
+batch = BatchBuffer(len(args.images))
+for path in args.images:
+    batch.add(path)
+predictions = model.predict(batch.model_input())
 
-print(f"Prediction: {predicted_class}")
+for img_path, probs in zip(args.images, predictions):
+    predicted_class = CLASS_LABELS[int(np.argmax(probs))]
+    print(f"{img_path}: Prediction: {predicted_class} ({probs.max() * 100:.1f}%)")
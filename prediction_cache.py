@@ -0,0 +1,182 @@
+# prediction_cache.py
+# Two-tier cache of classifier results keyed by the SHA-256 of the uploaded bytes.
+#
+#   memory  LRU of recent predictions, bounded by max_entries and ttl_seconds
+#   sqlite  persistent tier so hits survive restarts (prediction_cache.db)
+#
+# Keys also include the model version, a content hash of the watched model
+# files plus `salt` (the preprocessing version). When any of them changes (a
+# retrained food_waste_model.h5, a new export, different input pixels) both
+# tiers are cleared automatically.
+#
+# Expired rows are deleted from the sqlite tier when the cache is opened and
+# then by put(), at most once per PURGE_INTERVAL, so the file does not grow
+# with entries that can never be served again.
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+CHUNK_SIZE = 64 * 1024
+PURGE_INTERVAL = 3600  # seconds between expiry sweeps of the sqlite tier
+
+
+def sha256_stream(stream, chunk_size=CHUNK_SIZE):
+    """Hash a file-like object in chunks and rewind it for the caller."""
+    digest = hashlib.sha256()
+    for chunk in iter(lambda: stream.read(chunk_size), b""):
+        digest.update(chunk)
+    stream.seek(0)
+    return digest.hexdigest()
+
+
+class PredictionCache:
+    def __init__(self, db_path, model_paths, max_entries=1024, ttl_seconds=7 * 24 * 3600, salt=""):
+        self.db_path = db_path
+        self.model_paths = [p for p in model_paths if p]
+        self.salt = salt
+        self.max_entries = int(max_entries)
+        self.ttl = float(ttl_seconds)
+
+        self._lock = threading.Lock()
+        self._memory = OrderedDict()  # digest -> (prediction, stored_at)
+        self._counters = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "invalidations": 0}
+
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS predictions ("
+            " digest TEXT PRIMARY KEY, prediction TEXT NOT NULL, stored_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+        self._conn.commit()
+
+        self._model_stat = None
+        self.model_version = None
+        self._check_model_version()
+        self._next_purge = 0.0
+        self.purge_expired()
+
+    # ---------- Model version ----------
+    def _stat_models(self):
+        stats = []
+        for path in self.model_paths:
+            try:
+                st = os.stat(path)
+                stats.append((path, st.st_mtime_ns, st.st_size))
+            except FileNotFoundError:
+                stats.append((path, None, None))
+        return tuple(stats)
+
+    def _hash_models(self):
+        digest = hashlib.sha256(self.salt.encode())
+        for path in self.model_paths:
+            if os.path.exists(path):
+                with open(path, "rb") as f:
+                    digest.update(sha256_stream(f).encode())
+        return digest.hexdigest()[:16]
+
+    def _check_model_version(self):
+        """Called under the lock on every lookup; only re-hashes when stat() changes."""
+        stat = self._stat_models()
+        if stat == self._model_stat:
+            return
+        self._model_stat = stat
+        version = self._hash_models()
+        if version == self.model_version:
+            return
+
+        row = self._conn.execute("SELECT value FROM meta WHERE key = 'model_version'").fetchone()
+        if self.model_version is not None or (row and row[0] != version):
+            logging.info(f"Model changed ({row[0] if row else self.model_version} -> {version}), "
+                         "clearing prediction cache")
+            self._counters["invalidations"] += 1
+            self._clear_locked()
+        self.model_version = version
+        self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('model_version', ?)", (version,))
+        self._conn.commit()
+
+    # ---------- Lookups ----------
+    def get(self, digest):
+        """Return the cached prediction for these upload bytes, or None."""
+        now = time.time()
+        with self._lock:
+            self._check_model_version()
+
+            entry = self._memory.get(digest)
+            if entry is not None:
+                if now - entry[1] <= self.ttl:
+                    self._memory.move_to_end(digest)
+                    self._counters["memory_hits"] += 1
+                    return entry[0]
+                del self._memory[digest]
+
+            row = self._conn.execute(
+                "SELECT prediction, stored_at FROM predictions WHERE digest = ?", (digest,)
+            ).fetchone()
+            if row is not None and now - row[1] <= self.ttl:
+                self._remember(digest, row[0], row[1])
+                self._counters["disk_hits"] += 1
+                return row[0]
+
+            self._counters["misses"] += 1
+            return None
+
+    def put(self, digest, prediction):
+        now = time.time()
+        with self._lock:
+            self._check_model_version()
+            self._remember(digest, prediction, now)
+            self._conn.execute(
+                "INSERT OR REPLACE INTO predictions (digest, prediction, stored_at) VALUES (?, ?, ?)",
+                (digest, prediction, now),
+            )
+            self._conn.commit()
+            if now >= self._next_purge:
+                self._purge_locked(now)
+
+    def _remember(self, digest, prediction, stored_at):
+        self._memory[digest] = (prediction, stored_at)
+        self._memory.move_to_end(digest)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    # ---------- Maintenance ----------
+    def clear(self):
+        with self._lock:
+            self._clear_locked()
+
+    def _clear_locked(self):
+        self._memory.clear()
+        self._conn.execute("DELETE FROM predictions")
+        self._conn.commit()
+
+    def purge_expired(self):
+        """Drop persistent entries older than the TTL. Returns the number removed."""
+        with self._lock:
+            return self._purge_locked(time.time())
+
+    def _purge_locked(self, now):
+        cur = self._conn.execute("DELETE FROM predictions WHERE stored_at < ?", (now - self.ttl,))
+        self._conn.commit()
+        self._next_purge = now + min(self.ttl, PURGE_INTERVAL)
+        if cur.rowcount:
+            logging.info(f"Prediction cache purged {cur.rowcount} expired prediction(s)")
+        return cur.rowcount
+
+    def stats(self):
+        with self._lock:
+            hits = self._counters["memory_hits"] + self._counters["disk_hits"]
+            lookups = hits + self._counters["misses"]
+            disk_entries = self._conn.execute("SELECT COUNT(*) FROM predictions").fetchone()[0]
+            return {
+                **self._counters,
+                "hits": hits,
+                "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+                "memory_entries": len(self._memory),
+                "disk_entries": disk_entries,
+                "model_version": self.model_version,
+            }
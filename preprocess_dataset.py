@@ -0,0 +1,109 @@
+# preprocess_dataset.py
+# Decode, resize and shard the training images once.
+#
+# Every image under dataset/train and dataset/val, in the formats
+# image_dataset_from_directory reads, is decoded and resized to 128x128 exactly
+# like image_dataset_from_directory does (bilinear), stored as raw uint8 pixels
+# in TFRecord shards:
+#
+#   shards/manifest.json
+#   shards/train/train-00000-of-00008.tfrecord
+#   shards/val/val-00000-of-00002.tfrecord
+#
+# train_model.py --data-source shards then streams these files with parallel
+# interleave + prefetch, with no JPEG decoding and no need to fit in RAM.
+#
+# Usage:
+#   python preprocess_dataset.py
+#   python preprocess_dataset.py --dataset dataset --output shards --shard-size 2000
+import argparse
+import json
+import math
+import os
+import time
+
+import tensorflow as tf
+
+IMAGE_EXTENSIONS = ('.bmp', '.gif', '.jpeg', '.jpg', '.png')  # image_dataset_from_directory's ALLOWLIST_FORMATS
+AUTOTUNE = tf.data.AUTOTUNE
+
+
+def list_images(split_dir, class_names=None):
+    """(paths, labels, class_names) with labels in alphabetical class order,
+    the same order image_dataset_from_directory assigns."""
+    if class_names is None:
+        class_names = sorted(d for d in os.listdir(split_dir) if os.path.isdir(os.path.join(split_dir, d)))
+    paths, labels = [], []
+    for label, category in enumerate(class_names):
+        category_path = os.path.join(split_dir, category)
+        if not os.path.isdir(category_path):
+            continue
+        for f in sorted(os.listdir(category_path)):
+            if f.lower().endswith(IMAGE_EXTENSIONS):
+                paths.append(os.path.join(category_path, f))
+                labels.append(label)
+    return paths, labels, class_names
+
+
+def decode_and_resize(path, label, image_size):
+    img = tf.io.decode_image(tf.io.read_file(path), channels=3, expand_animations=False)
+    img = tf.image.resize(img, image_size, method="bilinear")
+    return tf.cast(tf.clip_by_value(tf.round(img), 0, 255), tf.uint8), label
+
+
+def serialize(img, label):
+    return tf.train.Example(features=tf.train.Features(feature={
+        "image": tf.train.Feature(bytes_list=tf.train.BytesList(value=[img.tobytes()])),
+        "label": tf.train.Feature(int64_list=tf.train.Int64List(value=[int(label)])),
+    })).SerializeToString()
+
+
+def write_split(split, paths, labels, out_dir, image_size, shard_size):
+    os.makedirs(out_dir, exist_ok=True)
+    num_shards = max(1, math.ceil(len(paths) / shard_size))
+    ds = (tf.data.Dataset.from_tensor_slices((paths, labels))
+          .map(lambda p, l: decode_and_resize(p, l, image_size), num_parallel_calls=AUTOTUNE)
+          .prefetch(AUTOTUNE))
+
+    writer, shard = None, -1
+    for i, (img, label) in enumerate(ds.as_numpy_iterator()):
+        if i % shard_size == 0:
+            if writer:
+                writer.close()
+            shard += 1
+            writer = tf.io.TFRecordWriter(os.path.join(out_dir, f"{split}-{shard:05d}-of-{num_shards:05d}.tfrecord"))
+        writer.write(serialize(img, label))
+    if writer:
+        writer.close()
+    return num_shards
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Preprocess dataset/ into TFRecord shards")
+    parser.add_argument("--dataset", default="dataset")
+    parser.add_argument("--output", default="shards")
+    parser.add_argument("--image-size", type=int, default=128)
+    parser.add_argument("--shard-size", type=int, default=1000, help="images per shard file")
+    args = parser.parse_args()
+
+    image_size = (args.image_size, args.image_size)
+    manifest = {"image_size": list(image_size), "splits": {}}
+    class_names = None
+    for split in ("train", "val"):
+        split_dir = os.path.join(args.dataset, split)
+        paths, labels, class_names = list_images(split_dir, class_names)
+        t0 = time.perf_counter()
+        num_shards = write_split(split, paths, labels, os.path.join(args.output, split), image_size, args.shard_size)
+        elapsed = time.perf_counter() - t0
+        manifest["splits"][split] = {"images": len(paths), "shards": num_shards}
+        print(f"[INFO] {split}: {len(paths)} images -> {num_shards} shard(s) "
+              f"in {elapsed:.1f}s ({len(paths) / max(elapsed, 1e-9):.0f} img/s)")
+
+    manifest["class_names"] = class_names
+    with open(os.path.join(args.output, "manifest.json"), "w") as f:
+        json.dump(manifest, f, indent=2)
+    print(f"[INFO] Classes: {class_names}. Manifest written to {args.output}/manifest.json")
+
+
+if __name__ == "__main__":
+    main()
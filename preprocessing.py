@@ -0,0 +1,130 @@
+# preprocessing.py
+# Image -> model input, shared by the web app, the CLI tools and the checks.
+#
+# The network from train_model.py starts with Rescaling(1./255) and was
+# trained on float32 pixels in 0..255, resized to 128x128 by tf.image.resize
+# (bilinear, half-pixel centres, no antialiasing). Serving has to feed it the
+# same thing: raw 0..255 values, normalized once, by the model itself.
+#
+#   decode_into(src, out)  decode one image straight into a uint8 (128, 128, 3)
+#                          slot, usually a row of a BatchBuffer:
+#                          1. JPEGs use draft mode, so libjpeg decodes at
+#                             1/2, 1/4 or 1/8 scale (never below
+#                             DRAFT_OVERSAMPLE x the target size) instead of
+#                             materializing the full-size photo
+#                          2. bilinear resize with the same sampling grid
+#                             as tf.image.resize, rounded into the slot
+#   BatchBuffer            preallocated uint8 pixels plus the float32 array
+#                          handed to the backends, reused for every batch
+#
+# check_preprocessing.py measures how closely this matches the training
+# pipeline; benchmarks/bench_preprocessing.py measures its cost.
+from functools import lru_cache
+
+import numpy as np
+from PIL import Image
+
+IMG_SIZE = (128, 128)
+
+# Bumped whenever decode_into() output changes; cached model inputs and
+# predictions made with an older version are not reused.
+VERSION = 2
+
+# Draft-decoded JPEGs keep at least this many source pixels per output pixel
+# on each axis, which keeps them within a couple of grey levels of a
+# full-size decode (see check_preprocessing.py).
+DRAFT_OVERSAMPLE = 2
+
+
+# ---------- Resize ----------
+@lru_cache(maxsize=64)
+def _bilinear_taps(in_size, out_size):
+    """Source indices and weights of tf.image.resize's bilinear filter along one axis."""
+    position = (np.arange(out_size) + 0.5) * (in_size / out_size) - 0.5
+    floor = np.floor(position)
+    lower = np.maximum(floor, 0).astype(np.intp)
+    upper = np.minimum(np.ceil(position), in_size - 1).astype(np.intp)
+    return lower, upper, (position - floor).astype(np.float32)
+
+
+def resize_bilinear(pixels, out):
+    """Resize uint8 (H, W, 3) pixels into `out` (h, w, 3), rounding like preprocess_dataset.py."""
+    y0, y1, fy = _bilinear_taps(pixels.shape[0], out.shape[0])
+    x0, x1, fx = _bilinear_taps(pixels.shape[1], out.shape[1])
+    fx = fx[:, None]
+    top, bottom = pixels[y0], pixels[y1]  # gather the rows first: h rows instead of H
+    top_left = top[:, x0].astype(np.float32)
+    top = top_left + (top[:, x1] - top_left) * fx
+    bottom_left = bottom[:, x0].astype(np.float32)
+    bottom = bottom_left + (bottom[:, x1] - bottom_left) * fx
+    top += (bottom - top) * fy[:, None, None]
+    np.rint(top, out=top)
+    np.copyto(out, top, casting="unsafe")
+    return out
+
+
+# ---------- Decode ----------
+def decode_into(source, out, draft=True):
+    """Decode an image file (path or file object) into the uint8 (h, w, 3) array `out`."""
+    with Image.open(source) as img:
+        if draft and img.format == "JPEG":
+            img.draft("RGB", (out.shape[1] * DRAFT_OVERSAMPLE, out.shape[0] * DRAFT_OVERSAMPLE))
+        if img.mode != "RGB":
+            img = img.convert("RGB")
+        return resize_bilinear(np.asarray(img), out)
+
+
+def decode(source, target_size=IMG_SIZE, draft=True):
+    """Decode an image into a new uint8 (H, W, 3) array."""
+    return decode_into(source, np.empty((*target_size, 3), dtype=np.uint8), draft)
+
+
+def model_input(pixels, out=None):
+    """float32 copy of uint8 pixels, still in 0..255: the model's Rescaling layer normalizes."""
+    if out is None:
+        return pixels.astype(np.float32)
+    np.copyto(out, pixels, casting="unsafe")
+    return out
+
+
+class BatchBuffer:
+    """Reusable uint8 pixel rows and the float32 model input made from them.
+
+        buffer.clear()
+        for path in paths:
+            buffer.add(path)
+        probs = backend.predict(buffer.model_input())
+    """
+
+    def __init__(self, capacity, target_size=IMG_SIZE):
+        self.pixels = np.empty((capacity, *target_size, 3), dtype=np.uint8)
+        self.inputs = np.empty(self.pixels.shape, dtype=np.float32)
+        self.count = 0
+
+    @property
+    def capacity(self):
+        return len(self.pixels)
+
+    def __len__(self):
+        return self.count
+
+    def clear(self):
+        self.count = 0
+
+    def _next_row(self):
+        if self.count == self.capacity:
+            raise ValueError(f"BatchBuffer is full ({self.capacity} images)")
+        self.count += 1
+        return self.pixels[self.count - 1]
+
+    def add(self, source, draft=True):
+        """Decode an image file into the next row."""
+        decode_into(source, self._next_row(), draft)
+
+    def add_pixels(self, pixels):
+        """Copy already decoded uint8 pixels (e.g. a cached .npy) into the next row."""
+        np.copyto(self._next_row(), pixels)
+
+    def model_input(self):
+        """float32 view over the filled rows; valid until the next model_input() call."""
+        return model_input(self.pixels[:self.count], self.inputs[:self.count])
@@ -0,0 +1,116 @@
+# routing.py
+# Pickup-route planning for one NGO vehicle.
+#
+# Given a depot, a vehicle capacity and candidate stops (uncollected alerts
+# with coordinates and a load parsed from FoodAlert.quantity), plan_route
+# returns an ordered round trip depot -> stops -> depot:
+#
+#   1. haversine distance matrix for depot + stops, computed once with NumPy
+#   2. capacity-aware nearest neighbour: keep driving to the closest stop whose
+#      load still fits, until nothing else fits
+#   3. 2-opt on that tour: reverse any segment that shortens it, with the gain
+#      of every candidate segment end for a given start evaluated in one
+#      vectorized step, until no improving move is left
+#
+# 2-opt only reorders the chosen stops, so the load never changes.
+import re
+from collections import namedtuple
+
+import numpy as np
+
+from geo import EARTH_RADIUS_KM
+
+Stop = namedtuple("Stop", ["id", "latitude", "longitude", "load"])
+Route = namedtuple("Route", ["stops", "legs_km", "total_km", "total_load"])
+
+_NUMBER = re.compile(r"\d+(?:\.\d+)?")
+
+
+def parse_quantity(quantity, default=1.0):
+    """Load of a free-text quantity ("12 kg", "30 plates", "2.5") = its first number."""
+    match = _NUMBER.search(quantity or "")
+    return float(match.group()) if match else default
+
+
+def distance_matrix(latitudes, longitudes):
+    """(n, n) great-circle distances in km."""
+    lat = np.radians(np.asarray(latitudes, dtype=np.float64))
+    lon = np.radians(np.asarray(longitudes, dtype=np.float64))
+    dlat = lat[:, None] - lat[None, :]
+    dlon = lon[:, None] - lon[None, :]
+    a = np.sin(dlat / 2) ** 2 + np.cos(lat)[:, None] * np.cos(lat)[None, :] * np.sin(dlon / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def nearest_neighbour_tour(dist, loads, capacity, max_stops=None):
+    """Node order starting and ending at the depot (node 0)."""
+    n = len(dist)
+    remaining = float("inf") if capacity is None else float(capacity)
+    available = np.ones(n, dtype=bool)
+    available[0] = False
+    tour = [0]
+    while max_stops is None or len(tour) - 1 < max_stops:
+        candidates = available & (loads <= remaining)
+        if not candidates.any():
+            break
+        row = np.where(candidates, dist[tour[-1]], np.inf)
+        nxt = int(np.argmin(row))
+        tour.append(nxt)
+        available[nxt] = False
+        remaining -= loads[nxt]
+    tour.append(0)
+    return np.asarray(tour)
+
+
+def two_opt(tour, dist, max_passes=50):
+    """Improve a closed tour (depot at both ends) in place with 2-opt moves.
+
+    Reversing tour[i+1..j] replaces edges (a,b) and (c,d) with (a,c) and (b,d),
+    where a, b = tour[i], tour[i+1] and c, d = tour[j], tour[j+1]. For each i the
+    gain of every j is one NumPy expression; the best improving j is applied.
+    """
+    tour = tour.copy()
+    n = len(tour)
+    if n < 5:
+        return tour
+    for _ in range(max_passes):
+        improved = False
+        for i in range(n - 3):
+            a, b = tour[i], tour[i + 1]
+            c, d = tour[i + 2:n - 1], tour[i + 3:n]
+            delta = dist[a, c] + dist[b, d] - dist[a, b] - dist[c, d]
+            k = int(np.argmin(delta))
+            if delta[k] < -1e-9:
+                j = i + 2 + k
+                tour[i + 1:j + 1] = tour[i + 1:j + 1][::-1].copy()
+                improved = True
+        if not improved:
+            break
+    return tour
+
+
+def tour_length(tour, dist):
+    return float(dist[tour[:-1], tour[1:]].sum())
+
+
+def plan_route(depot, stops, capacity=None, max_stops=None, improve=True):
+    """Ordered Route over a subset of `stops` that fits `capacity`.
+
+    depot: (lat, lon). stops: iterable of Stop. capacity: total load the
+    vehicle can carry (None = unlimited); stops heavier than that are skipped.
+    """
+    stops = list(stops)
+    if not stops:
+        return Route([], [], 0.0, 0.0)
+    dist = distance_matrix([depot[0]] + [s.latitude for s in stops],
+                           [depot[1]] + [s.longitude for s in stops])
+    loads = np.asarray([0.0] + [s.load for s in stops])
+
+    tour = nearest_neighbour_tour(dist, loads, capacity, max_stops)
+    if improve:
+        tour = two_opt(tour, dist)
+
+    ordered = [stops[i - 1] for i in tour[1:-1]]
+    legs = dist[tour[:-1], tour[1:]]
+    return Route(ordered, [round(float(x), 3) for x in legs], round(float(legs.sum()), 3),
+                 float(sum(s.load for s in ordered)))
@@ -1,43 +1,41 @@
-import tensorflow as tf
-from tensorflow.keras import layers, models
+import argparse
+import json
 import os
 import sys
+import time
 import traceback
 
-# Debugging info
-print("Python version:", sys.version)
-print("TensorFlow version:", tf.__version__)
-print("Eager execution:", tf.executing_eagerly())
+# oneDNN's graph rewrites break MirroredStrategy over logical CPU devices
+# (--cpu-devices); it has to be switched off before TensorFlow is imported.
+if any(arg.startswith("--cpu-devices") for arg in sys.argv):
+    os.environ.setdefault("TF_ENABLE_ONEDNN_OPTS", "0")
 
-try:
-    # Paths
-    train_dir = "dataset/train"
-    val_dir = "dataset/val"
+import tensorflow as tf
+from tensorflow.keras import layers, models
 
-    # Parameters
-    img_height, img_width = 128, 128  # Reduced size for speed
-    batch_size = 32                  # Reduced for stability
-    AUTOTUNE = tf.data.AUTOTUNE
+# Parameters
+img_height, img_width = 128, 128  # Reduced size for speed
+batch_size = 32                  # Reduced for stability
+AUTOTUNE = tf.data.AUTOTUNE
 
-    print("\n[INFO] Loading datasets...")
 
-    # Load datasets
+# ---------- Input pipelines ----------
+def load_directory_datasets(train_dir="dataset/train", val_dir="dataset/val", batch=batch_size):
+    """Original pipeline: decode JPEGs every epoch, cache decoded images in RAM."""
     raw_train_ds = tf.keras.utils.image_dataset_from_directory(
         train_dir,
         image_size=(img_height, img_width),
-        batch_size=batch_size,
+        batch_size=batch,
         shuffle=True
     )
     raw_val_ds = tf.keras.utils.image_dataset_from_directory(
         val_dir,
         image_size=(img_height, img_width),
-        batch_size=batch_size
+        batch_size=batch
     )
 
     # Get class names before prefetch
     class_names = raw_train_ds.class_names
-    num_classes = len(class_names)
-    print(f"[INFO] Classes found: {class_names}\n")
 
     # Optimize dataset pipeline
     train_ds = (raw_train_ds
@@ -48,9 +46,142 @@ try:
     val_ds = (raw_val_ds
               .cache()
               .prefetch(buffer_size=AUTOTUNE))
+    return train_ds, val_ds, class_names
+
+
+def parse_shard_example(serialized):
+    features = tf.io.parse_single_example(serialized, {
+        "image": tf.io.FixedLenFeature([], tf.string),
+        "label": tf.io.FixedLenFeature([], tf.int64),
+    })
+    img = tf.reshape(tf.io.decode_raw(features["image"], tf.uint8), (img_height, img_width, 3))
+    # Same float32 0..255 values image_dataset_from_directory yields; the
+    # model's Rescaling layer does the normalization.
+    return tf.cast(img, tf.float32), tf.cast(features["label"], tf.int32)
+
+
+def shard_dataset(shard_dir, split, training, batch=batch_size):
+    files = tf.data.Dataset.list_files(os.path.join(shard_dir, split, "*.tfrecord"), shuffle=training)
+    ds = files.interleave(
+        tf.data.TFRecordDataset,
+        cycle_length=AUTOTUNE,
+        num_parallel_calls=AUTOTUNE,
+        deterministic=not training,
+    )
+    if training:
+        ds = ds.shuffle(1000)
+    return (ds
+            .map(parse_shard_example, num_parallel_calls=AUTOTUNE)
+            .batch(batch)
+            .prefetch(AUTOTUNE))
+
+
+def load_shard_datasets(shard_dir="shards", batch=batch_size):
+    """Stream preprocessed TFRecord shards written by preprocess_dataset.py."""
+    manifest_path = os.path.join(shard_dir, "manifest.json")
+    if not os.path.exists(manifest_path):
+        raise FileNotFoundError(f"{manifest_path} not found, run preprocess_dataset.py first")
+    with open(manifest_path) as f:
+        manifest = json.load(f)
+    if tuple(manifest["image_size"]) != (img_height, img_width):
+        raise ValueError(f"Shards are {manifest['image_size']}, model expects {[img_height, img_width]}")
+
+    train_ds = shard_dataset(shard_dir, "train", training=True, batch=batch)
+    val_ds = shard_dataset(shard_dir, "val", training=False, batch=batch)
+    return train_ds, val_ds, manifest["class_names"]
+
+
+def load_datasets(data_source, shard_dir="shards", batch=batch_size):
+    if data_source == "shards":
+        return load_shard_datasets(shard_dir, batch)
+    return load_directory_datasets(batch=batch)
+
+
+def count_train_samples(data_source, shard_dir="shards", train_dir="dataset/train"):
+    if data_source == "shards":
+        with open(os.path.join(shard_dir, "manifest.json")) as f:
+            return json.load(f)["splits"]["train"]["images"]
+    return sum(len(files) for _, _, files in os.walk(train_dir))
+
+
+# ---------- Performance modes ----------
+def configure_precision(precision):
+    """float32, mixed_bfloat16 (CPUs with AVX-512/AMX) or mixed_float16 (GPUs)."""
+    tf.keras.mixed_precision.set_global_policy(precision)
+
+
+def make_strategy(name, cpu_devices=0):
+    """Distribution strategy; must run before TensorFlow initializes its devices.
+
+    mirrored     data parallel across local devices. On a CPU-only machine the
+                 CPU is split into `cpu_devices` logical devices, one replica each.
+    multiworker  synchronous data parallel across machines listed in TF_CONFIG.
+    """
+    if name == "mirrored":
+        cpus = tf.config.list_physical_devices("CPU")
+        if cpu_devices > 1 and not tf.config.list_physical_devices("GPU"):
+            tf.config.set_logical_device_configuration(
+                cpus[0], [tf.config.LogicalDeviceConfiguration()] * cpu_devices)
+            devices = [d.name for d in tf.config.list_logical_devices("CPU")]
+            return tf.distribute.MirroredStrategy(devices=devices)
+        return tf.distribute.MirroredStrategy()
+    if name == "multiworker":
+        return tf.distribute.MultiWorkerMirroredStrategy()
+    return tf.distribute.get_strategy()
 
-    # Model
-    print("[INFO] Building model...")
+
+def is_chief(strategy):
+    """Only the chief (or a single process) writes checkpoints, logs and the model."""
+    return strategy.extended.should_checkpoint
+
+
+class EpochTimingLogger(tf.keras.callbacks.Callback):
+    """Append one JSON line per epoch: wall time, samples/sec and the epoch's metrics."""
+
+    def __init__(self, path, samples_per_epoch, run_info):
+        super().__init__()
+        self.path = path
+        self.samples_per_epoch = samples_per_epoch
+        self.run_info = run_info
+
+    def on_epoch_begin(self, epoch, logs=None):
+        self._start = time.perf_counter()
+
+    def on_epoch_end(self, epoch, logs=None):
+        seconds = time.perf_counter() - self._start
+        record = {
+            **self.run_info,
+            "epoch": epoch + 1,
+            "wall_time_s": round(seconds, 3),
+            "samples_per_s": round(self.samples_per_epoch / seconds, 1),
+            **{k: float(v) for k, v in (logs or {}).items()},
+        }
+        with open(self.path, "a") as f:
+            f.write(json.dumps(record) + "\n")
+        print(f"[INFO] Epoch {epoch + 1}: {seconds:.1f}s, {record['samples_per_s']} samples/s")
+
+
+def build_callbacks(args, chief, samples_per_epoch, run_info):
+    callbacks = [
+        # Saves model, optimizer and epoch at the end of every epoch and restores
+        # them on the next start, so an interrupted run resumes where it stopped.
+        # Deleted automatically once training finishes.
+        tf.keras.callbacks.BackupAndRestore(backup_dir=os.path.join(args.checkpoint_dir, "backup")),
+    ]
+    if args.patience > 0:
+        callbacks.append(tf.keras.callbacks.EarlyStopping(
+            monitor="val_loss", patience=args.patience, restore_best_weights=True, verbose=1))
+    if chief:
+        callbacks.append(tf.keras.callbacks.ModelCheckpoint(
+            os.path.join(args.checkpoint_dir, "best.weights.h5"),
+            monitor="val_loss", save_best_only=True, save_weights_only=True))
+        if args.metrics_log:
+            callbacks.append(EpochTimingLogger(args.metrics_log, samples_per_epoch, run_info))
+    return callbacks
+
+
+# ---------- Model ----------
+def build_model(num_classes, jit_compile=False):
     model = models.Sequential([
         layers.Rescaling(1./255, input_shape=(img_height, img_width, 3)),
         layers.Conv2D(32, (3,3), activation='relu'),
@@ -62,32 +193,107 @@ try:
         layers.Flatten(),
         layers.Dense(128, activation='relu'),
         layers.Dropout(0.5),
-        layers.Dense(num_classes, activation='softmax')
+        # Softmax in float32 even under mixed precision, for a stable loss
+        layers.Dense(num_classes, activation='softmax', dtype='float32')
     ])
 
     model.compile(
         optimizer='adam',
         loss='sparse_categorical_crossentropy',
-        metrics=['accuracy']
+        metrics=['accuracy'],
+        jit_compile=jit_compile
     )
+    return model
 
-    model.summary()
 
-    print("\n[INFO] Starting training...\n")
-    sys.stdout.flush()
+def float32_copy(model, num_classes):
+    """Same weights under the float32 policy, so the saved .h5 serves at full precision."""
+    tf.keras.mixed_precision.set_global_policy("float32")
+    serving_model = build_model(num_classes)
+    serving_model.set_weights(model.get_weights())
+    return serving_model
 
-    # Train
-    history = model.fit(
-        train_ds,
-        validation_data=val_ds,
-        epochs=10,
-        verbose=1
-    )
 
-    # Save the model
-    model.save("food_waste_model.h5")
-    print("\n[INFO] Training complete. Model saved as food_waste_model.h5")
+def main():
+    parser = argparse.ArgumentParser(description="Train the food waste classifier")
+    parser.add_argument("--data-source", choices=["directory", "shards"], default="directory",
+                        help="decode dataset/ JPEGs, or stream shards from preprocess_dataset.py")
+    parser.add_argument("--shard-dir", default="shards")
+    parser.add_argument("--epochs", type=int, default=10)
+    parser.add_argument("--batch-size", type=int, default=batch_size, help="per replica")
+    parser.add_argument("--precision", choices=["float32", "mixed_bfloat16", "mixed_float16"],
+                        default="float32", help="mixed_bfloat16 is the CPU mixed-precision mode")
+    parser.add_argument("--xla", action="store_true", help="compile train/eval steps with XLA")
+    parser.add_argument("--strategy", choices=["default", "mirrored", "multiworker"], default="default")
+    parser.add_argument("--cpu-devices", type=int, default=0,
+                        help="with --strategy mirrored on CPU: number of logical CPU replicas")
+    parser.add_argument("--patience", type=int, default=3, help="early stopping patience, 0 disables")
+    parser.add_argument("--checkpoint-dir", default="checkpoints")
+    parser.add_argument("--metrics-log", default="training_metrics.jsonl",
+                        help="per-epoch JSON lines (empty to disable)")
+    parser.add_argument("--output", default="food_waste_model.h5")
+    args = parser.parse_args()
+
+    # Debugging info
+    print("Python version:", sys.version)
+    print("TensorFlow version:", tf.__version__)
+    print("Eager execution:", tf.executing_eagerly())
+
+    try:
+        strategy = make_strategy(args.strategy, args.cpu_devices)
+        chief = is_chief(strategy)
+        replicas = strategy.num_replicas_in_sync
+        global_batch = args.batch_size * replicas
+        print(f"[INFO] Strategy: {args.strategy} ({replicas} replica(s)), precision: {args.precision}, "
+              f"XLA: {args.xla}, global batch: {global_batch}")
+
+        print(f"\n[INFO] Loading datasets ({args.data_source})...")
+        train_ds, val_ds, class_names = load_datasets(args.data_source, args.shard_dir, global_batch)
+        num_classes = len(class_names)
+        print(f"[INFO] Classes found: {class_names}\n")
+
+        # Model
+        print("[INFO] Building model...")
+        configure_precision(args.precision)
+        with strategy.scope():
+            model = build_model(num_classes, jit_compile=args.xla)
+        model.summary()
+
+        os.makedirs(args.checkpoint_dir, exist_ok=True)
+        run_info = {
+            "data_source": args.data_source,
+            "precision": args.precision,
+            "xla": args.xla,
+            "strategy": args.strategy,
+            "replicas": replicas,
+            "global_batch": global_batch,
+        }
+        callbacks = build_callbacks(args, chief, count_train_samples(args.data_source, args.shard_dir),
+                                    run_info)
+
+        print("\n[INFO] Starting training...\n")
+        sys.stdout.flush()
+
+        # Train (resumes from checkpoint_dir/backup if a previous run was interrupted)
+        history = model.fit(
+            train_ds,
+            validation_data=val_ds,
+            epochs=args.epochs,
+            callbacks=callbacks,
+            verbose=1
+        )
+
+        # Save the model
+        if chief:
+            if args.precision != "float32":
+                model = float32_copy(model, num_classes)
+            model.save(args.output)
+            print(f"\n[INFO] Training complete. Model saved as {args.output}")
+
+    except Exception as e:
+        print("\n[ERROR] Training failed!")
+        traceback.print_exc()
+
 
-except Exception as e:
-    print("\n[ERROR] Training failed!")
-    traceback.print_exc()
+if __name__ == "__main__":
+    main()
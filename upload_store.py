@@ -0,0 +1,189 @@
+# upload_store.py
+# Content-addressed storage for uploaded food images.
+#
+# Uploads are streamed to a temp file in chunks while being hashed, then moved
+# to a sharded path derived from their SHA-256:
+#
+#     static/uploads/ab/cd/abcd1234...ef.jpg
+#
+# Identical bytes are stored once, and two uploads can never overwrite each
+# other. FoodAlert.image_filename holds that relative name; a blob's reference
+# count is the number of alerts pointing at it. Blobs nobody references are
+# removed by BlobGarbageCollector in the background, after a grace period so
+# an upload that is saved but not yet committed is never collected.
+#
+# Derived files (thumbnails etc., see derivatives.py) live next to their blob
+# as <digest>.<variant>.<ext>; they are not blobs themselves and are removed
+# together with the blob they were made from. Each GC pass also sweeps the
+# variants left without an original: those of legacy flat uploads, deleted with
+# their alert, and any build that finished after its blob was collected.
+import hashlib
+import logging
+import os
+import tempfile
+import threading
+import time
+from collections import namedtuple
+
+from derivatives import remove_orphaned_variants
+
+CHUNK_SIZE = 64 * 1024
+
+StoredBlob = namedtuple("StoredBlob", ["name", "digest", "size", "deduplicated"])
+
+_EXTENSION_ALIASES = {"jpeg": "jpg"}
+
+
+class UploadStore:
+    def __init__(self, root, chunk_size=CHUNK_SIZE):
+        self.root = root
+        self.chunk_size = chunk_size
+        self._tmp_dir = os.path.join(root, ".tmp")
+        os.makedirs(self._tmp_dir, exist_ok=True)
+
+    @staticmethod
+    def blob_name(digest, extension):
+        extension = _EXTENSION_ALIASES.get(extension.lower(), extension.lower())
+        return f"{digest[:2]}/{digest[2:4]}/{digest}.{extension}"
+
+    @staticmethod
+    def is_blob(name):
+        """True for names created by this store (legacy uploads are flat files)."""
+        parts = (name or "").split("/")
+        return len(parts) == 3 and len(parts[0]) == 2 and len(parts[1]) == 2
+
+    def path(self, name):
+        return os.path.join(self.root, *name.split("/"))
+
+    def save(self, stream, filename):
+        """Stream an upload into the store and return its StoredBlob."""
+        extension = filename.rsplit(".", 1)[1] if "." in filename else "bin"
+        digest = hashlib.sha256()
+        size = 0
+
+        fd, tmp_path = tempfile.mkstemp(dir=self._tmp_dir)
+        try:
+            with os.fdopen(fd, "wb") as out:
+                for chunk in iter(lambda: stream.read(self.chunk_size), b""):
+                    digest.update(chunk)
+                    out.write(chunk)
+                    size += len(chunk)
+
+            hexdigest = digest.hexdigest()
+            name = self.blob_name(hexdigest, extension)
+            target = self.path(name)
+            if os.path.exists(target):
+                # Already stored: refresh mtime so the GC grace period restarts.
+                os.utime(target)
+                os.remove(tmp_path)
+                return StoredBlob(name, hexdigest, size, True)
+
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            os.replace(tmp_path, target)
+            return StoredBlob(name, hexdigest, size, False)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def shard_dirs(self):
+        """Yield (relative name, path) for every ab/cd directory of the sharded tree."""
+        with os.scandir(self.root) as level1:
+            for d1 in level1:
+                if len(d1.name) != 2 or not d1.is_dir():
+                    continue
+                with os.scandir(d1.path) as level2:
+                    for d2 in level2:
+                        if len(d2.name) == 2 and d2.is_dir():
+                            yield f"{d1.name}/{d2.name}", d2.path
+
+    def iter_blobs(self):
+        """Yield (name, mtime, size) for every blob in the sharded tree."""
+        for prefix, directory in self.shard_dirs():
+            with os.scandir(directory) as blobs:
+                for blob in blobs:
+                    if blob.is_file() and blob.name.count(".") == 1:
+                        st = blob.stat()
+                        yield f"{prefix}/{blob.name}", st.st_mtime, st.st_size
+
+    def collect_garbage(self, referenced, grace_seconds=3600):
+        """Delete blobs not in `referenced` and untouched for grace_seconds.
+
+        Returns (blobs_removed, bytes_freed).
+        """
+        cutoff = time.time() - grace_seconds
+        removed = freed = 0
+        for name, mtime, size in list(self.iter_blobs()):
+            if name in referenced or mtime > cutoff:
+                continue
+            try:
+                os.remove(self.path(name))
+            except FileNotFoundError:
+                continue
+            removed += 1
+            freed += size
+            freed += self._remove_derived(name)
+
+        for directory in [self.root, *(path for _, path in self.shard_dirs())]:
+            freed += remove_orphaned_variants(directory, cutoff)
+
+        # Stale temp files from interrupted uploads
+        for entry in os.scandir(self._tmp_dir):
+            if entry.is_file() and entry.stat().st_mtime < cutoff:
+                os.remove(entry.path)
+        return removed, freed
+
+    def _remove_derived(self, name):
+        directory = os.path.dirname(self.path(name))
+        prefix = os.path.basename(name).split(".", 1)[0] + "."
+        freed = 0
+        for entry in os.scandir(directory):
+            if entry.name.startswith(prefix) and entry.name.count(".") > 1:
+                freed += entry.stat().st_size
+                os.remove(entry.path)
+        return freed
+
+
+class BlobGarbageCollector:
+    """Background thread that periodically removes unreferenced blobs.
+
+    `referenced_names` is a callable returning the set of blob names still
+    referenced (the app queries FoodAlert.image_filename).
+    """
+
+    def __init__(self, store, referenced_names, interval_seconds=600, grace_seconds=3600):
+        self.store = store
+        self.referenced_names = referenced_names
+        self.interval = interval_seconds
+        self.grace = grace_seconds
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="upload-gc", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def wake(self):
+        """Run a collection pass soon (e.g. after an alert was deleted)."""
+        self._wake.set()
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+
+    def run_once(self):
+        removed, freed = self.store.collect_garbage(self.referenced_names(), self.grace)
+        if removed:
+            logging.info(f"Upload GC removed {removed} orphaned blob(s), {freed / 1024:.0f} KB")
+        return removed, freed
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            if self._stop.is_set():
+                break
+            try:
+                self.run_once()
+            except Exception as e:
+                logging.error(f"Upload GC failed: {e}", exc_info=True)